@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark the anomaly detector against labelled synthetic anomalies
+Run from the repository root: python benchmark_anomaly.py
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Add streamlit_app to path
+sys.path.insert(0, 'streamlit_app')
+
+from data.simulator import CrowdDataSimulator, ANOMALY_LABELS, NORMAL
+from data.location_registry import LocationRegistry
+from models.anomaly_detector import AnomalyDetector, CampusAnomalyDetector, hour_of_week
+from models.online_detector import OnlineAnomalyDetector
+
+# Precision the online detector must reach on the labelled panel (base anomaly rate ~0.017).
+# Measured ~0.43 with the week-slot baseline (recall ~0.25, nothing flagged in the first week);
+# without seasonality (season_minutes=None) it only reaches ~0.08
+ONLINE_MIN_PRECISION = 0.35
+
+
+def labelled_windows(n_locations=200, days=30, window_size=12, seed=7):
+    """
+    History panel with injected anomalies, cut into sliding windows
+    A window is labelled with the anomaly type of its last reading.
+    Returns:
+        (clean_history, windows, labels, anomalous, panel_labels, timestamps) with clean_history
+        the first location's uninjected levels, windows of shape (n_windows, window_size) and the
+        injected (locations x time) panel with its per-reading labels and time steps
+    """
+    simulator = CrowdDataSimulator(seed=seed)
+    registry = LocationRegistry.synthetic(n_locations, seed=seed)
+    timestamps, levels = simulator.generate_historical_panel(registry, days=days, interval_minutes=10)
+
+    start = time.perf_counter()
+    anomalous, labels = simulator.inject_anomalies(levels)
+    inject_ms = (time.perf_counter() - start) * 1000
+
+    # Windows never span two locations because each row is windowed separately
+    windows = sliding_window_view(anomalous, window_size, axis=1).reshape(-1, window_size)
+    window_labels = labels[:, window_size - 1:].reshape(-1)
+
+    print(f"Labelled panel ({n_locations} locations, {days} days @ 10 min)")
+    print(f"  inject_anomalies: {inject_ms:8.1f} ms for {levels.size:,} readings")
+    print(f"  windows:          {len(windows):,}")
+    for code, name in ANOMALY_LABELS.items():
+        print(f"    {name:<8} {np.count_nonzero(window_labels == code):>10,}")
+
+    return levels[0], windows, window_labels, anomalous, labels, np.asarray(timestamps, dtype='datetime64[s]')
+
+
+def precision_recall(predicted, labels):
+    """Precision and recall of boolean predictions against NORMAL/anomaly labels"""
+    actual = labels != NORMAL
+    true_positives = np.count_nonzero(predicted & actual)
+    precision = true_positives / max(np.count_nonzero(predicted), 1)
+    recall = true_positives / max(np.count_nonzero(actual), 1)
+    return precision, recall
+
+
+def benchmark_detector(detector, name, windows, labels, n_eval=20000, seed=0, location_ids=None, timestamps=None):
+    """
+    Throughput and precision/recall of detector.detect_many on a random sample of windows
+    location_ids/timestamps (one per window) select calibrated thresholds.
+    """
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(windows), size=min(n_eval, len(windows)), replace=False)
+
+    start = time.perf_counter()
+    results = detector.detect_many(
+        windows[sample],
+        location_ids=location_ids[sample] if location_ids is not None else None,
+        timestamps=timestamps[sample] if timestamps is not None else None
+    )
+    predicted = np.array([result['is_anomaly'] for result in results], dtype=bool)
+    elapsed = time.perf_counter() - start
+
+    precision, recall = precision_recall(predicted, labels[sample])
+    print(f"\n{name} ({len(sample):,} windows)")
+    print(f"  windows/s:    {len(sample) / elapsed:10.0f}")
+    print(f"  precision:    {precision:10.3f}")
+    print(f"  recall:       {recall:10.3f}")
+
+    # Recall per anomaly type
+    for code, label_name in ANOMALY_LABELS.items():
+        if code == NORMAL:
+            continue
+        mask = labels[sample] == code
+        if mask.any():
+            print(f"    {label_name:<8} recall {predicted[mask].mean():6.3f}")
+
+
+def benchmark_calibration(detector, windows, labels, n_locations=200, days=30, calibration_days=28, seed=7,
+                          window_size=12):
+    """
+    Calibrate per-location/hour-of-week thresholds on the clean history from before the
+    labelled panel (held out in time), then re-score the labelled windows
+    """
+    simulator = CrowdDataSimulator(seed=seed)
+    registry = LocationRegistry.synthetic(n_locations, seed=seed)
+    timestamps, levels = simulator.generate_historical_panel(registry, days=days + calibration_days,
+                                                             interval_minutes=10)
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+
+    # The labelled panel covers the last `days`; calibrate only on the span before it
+    evaluation_steps = windows.shape[0] // n_locations + window_size - 1
+    calibration_steps = len(timestamps) - evaluation_steps
+    calibration_times = timestamps[:calibration_steps]
+    evaluation_times = timestamps[calibration_steps:]
+
+    history = pd.DataFrame({
+        'timestamp': np.tile(calibration_times, n_locations),
+        'location_id': np.repeat(registry.ids, calibration_steps),
+        'crowd_level': levels[:, :calibration_steps].reshape(-1)
+    })
+
+    start = time.perf_counter()
+    n_windows = detector.calibrate(history)
+    elapsed = time.perf_counter() - start
+    print(f"\nCalibration ({n_locations} locations, {calibration_days} earlier days, {n_windows:,} windows)")
+    print(f"  calibrate:    {elapsed:10.2f} s")
+
+    # Locations never calibrated fall back to the all-location thresholds
+    unseen = np.full(3, registry.ids.max() + 1)
+    probe_times = evaluation_times[:3]
+    assert np.array_equal(detector.thresholds_for(3, unseen), np.full(3, detector.threshold))
+    assert np.array_equal(detector.thresholds_for(3, unseen, probe_times),
+                          detector.hour_thresholds[-1, hour_of_week(probe_times)])
+
+    # Location and last-reading time of every labelled window (windows are location-major)
+    per_location = evaluation_steps - window_size + 1
+    window_location_ids = np.repeat(registry.ids, per_location)
+    window_times = np.tile(evaluation_times[window_size - 1:], n_locations)
+    benchmark_detector(detector, "Autoencoder (calibrated thresholds, held out)", windows, labels,
+                       location_ids=window_location_ids, timestamps=window_times)
+
+
+def benchmark_online(anomalous, labels, timestamps, min_precision=ONLINE_MIN_PRECISION):
+    """Per-tick update cost and precision/recall of the online detector, replaying the panel tick by tick"""
+    detector = OnlineAnomalyDetector(np.arange(len(anomalous)))
+    predicted = np.zeros(anomalous.shape, dtype=bool)
+
+    start = time.perf_counter()
+    for tick in range(anomalous.shape[1]):
+        predicted[:, tick] = detector.update(anomalous[:, tick], timestamp=timestamps[tick])['is_anomaly']
+    elapsed = time.perf_counter() - start
+
+    precision, recall = precision_recall(predicted, labels)
+    print(f"\nOnline detector ({anomalous.shape[0]} locations x {anomalous.shape[1]:,} ticks)")
+    print(f"  us/tick:      {elapsed / anomalous.shape[1] * 1e6:10.1f}")
+    print(f"  readings/s:   {anomalous.size / elapsed:10.0f}")
+    print(f"  precision:    {precision:10.3f}")
+    print(f"  recall:       {recall:10.3f}")
+
+    for code, label_name in ANOMALY_LABELS.items():
+        if code == NORMAL:
+            continue
+        mask = labels == code
+        if mask.any():
+            print(f"    {label_name:<8} recall {predicted[mask].mean():6.3f}")
+
+    assert precision >= min_precision, f"Online detector precision {precision:.3f} below {min_precision}"
+
+
+def campus_event_panel(levels, n_events=20, share=0.7, factor=1.6, seed=11):
+    """
+    Copy of a panel with campus-wide events: a share of all locations surging together
+    Returns:
+        (panel, event_steps) with event_steps a boolean mask over time steps
+    """
+    rng = np.random.default_rng(seed)
+    panel = np.array(levels, dtype=np.float32)
+    n_locations, n_steps = panel.shape
+    event_steps = np.zeros(n_steps, dtype=bool)
+
+    for start in rng.choice(n_steps - 6, size=n_events, replace=False):
+        duration = rng.integers(3, 7)
+        affected = rng.random(n_locations) < share
+        panel[np.ix_(affected, np.arange(start, start + duration))] *= factor
+        event_steps[start:start + duration] = True
+
+    return np.clip(panel, 0, 1), event_steps
+
+
+def benchmark_multivariate(detector, n_locations=200, days=30, train_days=21, window_size=12, seed=7):
+    """Campus-wide scoring in one forward pass against per-location scoring, on panels with campus events"""
+    simulator = CrowdDataSimulator(seed=seed)
+    registry = LocationRegistry.synthetic(n_locations, seed=seed)
+    timestamps, levels = simulator.generate_historical_panel(registry, days=days, interval_minutes=10)
+    split = train_days * 144
+
+    campus = CampusAnomalyDetector(registry.ids, window_size=window_size)
+    start = time.perf_counter()
+    campus.train(levels[:, :split])
+    print(f"\nCampus detector ({n_locations} locations) trained in {time.perf_counter() - start:.1f} s")
+
+    panel, event_steps = campus_event_panel(levels[:, split:])
+    windows = sliding_window_view(panel, window_size, axis=1).transpose(1, 0, 2)
+    # A window is an event window if any of its readings falls in an event
+    is_event = sliding_window_view(event_steps, window_size).any(axis=1)
+
+    # Latency of scoring the whole campus for one tick
+    tick = windows[len(windows) // 2]
+    loop_ms = min_time_ms(lambda: [detector.detect(row) for row in tick])
+    many_ms = min_time_ms(lambda: detector.detect_many(tick))
+    campus_ms = min_time_ms(lambda: campus.detect(tick))
+    print(f"  per tick, detect() per location: {loop_ms:8.2f} ms")
+    print(f"  per tick, detect_many:           {many_ms:8.2f} ms")
+    print(f"  per tick, campus (one pass):     {campus_ms:8.2f} ms")
+
+    # Alerts: per-location scoring raises one per flagged location, the campus detector one per event
+    results = campus.detect_many(windows)
+    flagged = np.array([result['is_campus_event'] for result in results])
+    per_location_alerts = np.array([
+        sum(result['is_anomaly'] for result in detector.detect_many(windows[i])) for i in range(len(windows))
+    ])
+
+    true_positives = np.count_nonzero(flagged & is_event)
+    print(f"  campus event windows:            {np.count_nonzero(is_event):8d} of {len(windows):,}")
+    print(f"  campus detector precision:       {true_positives / max(np.count_nonzero(flagged), 1):8.3f}")
+    print(f"  campus detector recall:          {true_positives / max(np.count_nonzero(is_event), 1):8.3f}")
+    print(f"  per-location alerts/event window:{per_location_alerts[is_event].mean():8.1f}")
+    print(f"  per-location alerts/quiet window:{per_location_alerts[~is_event].mean():8.1f}")
+
+
+def min_time_ms(func, repeats=5):
+    """Best wall-clock time of func() in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    print("=" * 60)
+    print("Anomaly Detector Benchmark")
+    print("=" * 60)
+
+    clean_history, windows, labels, anomalous, panel_labels, timestamps = labelled_windows()
+
+    benchmark_detector(AnomalyDetector(), "Rule-based fallback", windows, labels)
+    benchmark_online(anomalous, panel_labels, timestamps)
+
+    # Train the autoencoder on one location's clean history
+    detector = AnomalyDetector()
+    detector.train(pd.DataFrame({'crowd_level': clean_history}), epochs=100)
+    benchmark_detector(detector, "Autoencoder", windows, labels)
+    benchmark_calibration(detector, windows, labels)
+    benchmark_multivariate(detector)
+
+    print("\n✅ Benchmark finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched LSTM crowd forecasting
+Run from the repository root: python benchmark_forecaster.py
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add streamlit_app to path
+sys.path.insert(0, 'streamlit_app')
+
+from data.simulator import CrowdDataSimulator
+from data.location_registry import LocationRegistry
+from data.locations import UF_LOCATIONS
+from models.lstm_forecaster import CrowdForecaster, DEFAULT_HORIZON_STEPS
+from models.streaming_forecaster import StreamingForecaster, DEFAULT_REWARM_EVERY, STREAMING_MAE_TOLERANCE
+
+MODEL_PATH = os.path.join('streamlit_app', 'models', 'lstm_crowd_model.pth')
+
+# Time one page render may spend on forecasting
+PAGE_RENDER_BUDGET_MS = 200
+
+
+def time_call(func, repeats=3):
+    """Best wall-clock time of func() in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def recent_sequences(n_locations, sequence_length=12):
+    """Last sequence_length readings for n synthetic locations"""
+    simulator = CrowdDataSimulator()
+    registry = LocationRegistry.synthetic(n_locations)
+    days = max(1, -(-sequence_length // 144))
+    _, levels = simulator.generate_historical_panel(registry, days=days, interval_minutes=10)
+    return levels[:, -sequence_length:]
+
+
+def benchmark_predict_many(forecaster, n_locations):
+    """Per-location cost of a predict() loop against one predict_many() call"""
+    sequences = recent_sequences(n_locations, forecaster.sequence_length)
+
+    loop_ms = time_call(lambda: [forecaster.predict(sequence) for sequence in sequences])
+    batch_ms = time_call(lambda: forecaster.predict_many(sequences), repeats=10)
+
+    print(f"\n{n_locations} locations")
+    print(f"  predict loop: {loop_ms:10.2f} ms  ({loop_ms * 1000 / n_locations:8.1f} us/location)")
+    print(f"  predict_many: {batch_ms:10.2f} ms  ({batch_ms * 1000 / n_locations:8.1f} us/location)")
+    print(f"  speedup:      {loop_ms / batch_ms:10.1f}x")
+
+
+def benchmark_horizon(forecaster, n_locations, label, horizon_steps=DEFAULT_HORIZON_STEPS):
+    """Latency of a full 24h forecast for every location against the page render budget"""
+    print(f"\n{label}: {n_locations} locations, {horizon_steps} steps ahead")
+
+    sequences = recent_sequences(n_locations, forecaster.sequence_length)
+    autoregressive_ms = time_call(lambda: forecaster.predict_horizon(sequences, horizon_steps, 'autoregressive'))
+    verdict = "within" if autoregressive_ms <= PAGE_RENDER_BUDGET_MS else "OVER"
+    print(f"  autoregressive: {autoregressive_ms:10.2f} ms  ({verdict} {PAGE_RENDER_BUDGET_MS} ms budget)")
+
+    if forecaster.horizon_model is not None:
+        sequences = recent_sequences(n_locations, forecaster.horizon_sequence_length)
+        direct_ms = time_call(lambda: forecaster.predict_horizon(sequences, horizon_steps, 'direct'))
+        verdict = "within" if direct_ms <= PAGE_RENDER_BUDGET_MS else "OVER"
+        print(f"  direct head:    {direct_ms:10.2f} ms  ({verdict} {PAGE_RENDER_BUDGET_MS} ms budget)")
+
+
+def train_timing_horizon_model(forecaster, horizon_steps=DEFAULT_HORIZON_STEPS):
+    """Briefly train a direct horizon model (for timing only; its accuracy is not evaluated)"""
+    simulator = CrowdDataSimulator()
+    registry = LocationRegistry.synthetic(4)
+    timestamps, levels = simulator.generate_historical_panel(registry, days=7, interval_minutes=10)
+    history = pd.concat(
+        [pd.DataFrame({'timestamp': timestamps, 'crowd_level': row}) for row in levels], ignore_index=True
+    )
+    forecaster.train_horizon_model(history, horizon_steps=horizon_steps, epochs=1)
+
+
+def benchmark_streaming(forecaster, n_locations=200, days=2):
+    """
+    Streaming forecasts (re-warming and O(1) modes) against predict_many on the same
+    windows: per-tick cost and MAE on what followed
+    """
+    simulator = CrowdDataSimulator()
+    registry = LocationRegistry.synthetic(n_locations)
+    _, levels = simulator.generate_historical_panel(registry, days=days, interval_minutes=10)
+
+    sequence_length = forecaster.sequence_length
+    steps = forecaster.forecast_steps
+    ticks = range(sequence_length, levels.shape[1] - steps + 1)
+    actual = np.array([levels[:, t:t + steps] for t in ticks])
+
+    start = time.perf_counter()
+    windowed = np.array([forecaster.predict_many(levels[:, t - sequence_length:t]) for t in ticks])
+    windowed_ms = (time.perf_counter() - start) * 1000 / len(ticks)
+    windowed_mae = np.abs(windowed - actual).mean()
+
+    print(f"\nStreaming vs windowed: {n_locations} locations, {len(ticks)} steps")
+    print(f"  {'mode':<20} {'ms/tick':>8} {'MAE':>8} {'max diff':>9}")
+    print(f"  {'predict_many':<20} {windowed_ms:8.2f} {windowed_mae:8.4f} {0:9.4f}")
+
+    maes = {}
+    for label, rewarm_every in ((f"re-warm every {DEFAULT_REWARM_EVERY}", DEFAULT_REWARM_EVERY), ("O(1) (no re-warm)", None)):
+        streaming = StreamingForecaster(forecaster, registry.ids, rewarm_every=rewarm_every)
+        streaming.warm_up(levels[:, :sequence_length])
+
+        streamed = []
+        start = time.perf_counter()
+        for t in ticks:
+            streamed.append(streaming.forecast())
+            streaming.update(levels[:, t])
+        streaming_ms = (time.perf_counter() - start) * 1000 / len(ticks)
+        streamed = np.array(streamed)
+
+        maes[rewarm_every] = np.abs(streamed - actual).mean()
+        print(f"  {label:<20} {streaming_ms:8.2f} {maes[rewarm_every]:8.4f} {np.abs(streamed - windowed).max():9.4f}")
+
+    streaming_mae = maes[DEFAULT_REWARM_EVERY]
+    assert streaming_mae <= windowed_mae + STREAMING_MAE_TOLERANCE, \
+        f"Streaming MAE {streaming_mae:.4f} exceeds windowed MAE {windowed_mae:.4f} + {STREAMING_MAE_TOLERANCE}"
+
+
+def main():
+    print("=" * 60)
+    print("LSTM Forecaster Benchmark")
+    print("=" * 60)
+
+    forecaster = CrowdForecaster(model_path=MODEL_PATH)
+    if not forecaster.is_trained:
+        print("❌ No trained model found; run train_lstm_model.py first")
+        sys.exit(1)
+
+    for n_locations in (20, 200, 2000):
+        benchmark_predict_many(forecaster, n_locations)
+
+    print("\n" + "=" * 60)
+    print("Streaming state")
+    print("=" * 60)
+    benchmark_streaming(forecaster)
+
+    print("\n" + "=" * 60)
+    print("24h horizon")
+    print("=" * 60)
+    if forecaster.horizon_model is None:
+        train_timing_horizon_model(forecaster)
+    benchmark_horizon(forecaster, len(UF_LOCATIONS), "Full campus")
+    benchmark_horizon(forecaster, 2000, "Large deployment")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark the crowd data simulator
+Run from the repository root: python benchmark_simulator.py
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+# Add streamlit_app to path
+sys.path.insert(0, 'streamlit_app')
+
+from data.simulator import CrowdDataSimulator
+from data.feed import CrowdFeed, ring_buffer_consumer
+from data.timeseries_store import RingBufferStore
+from data.locations import UF_LOCATIONS
+from data.location_registry import LocationRegistry
+
+
+def legacy_generate_historical_data(simulator, location, days=7, interval_minutes=10):
+    """Original per-row implementation of generate_historical_data, kept as the baseline"""
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+
+    timestamps = []
+    current = start_time
+    while current <= end_time:
+        timestamps.append(current)
+        current += timedelta(minutes=interval_minutes)
+
+    data = []
+    base_pattern = simulator.base_patterns.get(location['category'], np.zeros(24))
+
+    for ts in timestamps:
+        hour = ts.hour
+        minute = ts.minute
+
+        hour_value = base_pattern[hour]
+        next_hour = (hour + 1) % 24
+        next_hour_value = base_pattern[next_hour]
+        interpolated = hour_value + (next_hour_value - hour_value) * (minute / 60)
+
+        day_factor = 1.0
+        if ts.weekday() >= 5:
+            if location['category'] in ['ACADEMIC', 'LIBRARIES']:
+                day_factor = 0.6
+            elif location['category'] in ['GYMS', 'DINING', 'OUTDOORS']:
+                day_factor = 1.2
+
+        noise = np.random.normal(0, 0.05)
+        crowd_level = np.clip((interpolated * day_factor) + noise, 0, 1)
+        headcount = int(crowd_level * location['capacity'])
+
+        data.append({
+            'timestamp': ts,
+            'headcount': headcount,
+            'crowd_level': crowd_level,
+            'capacity': location['capacity']
+        })
+
+    return pd.DataFrame(data)
+
+
+def time_call(func, repeats=3):
+    """Best wall-clock time of func() in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def benchmark_historical_data(days=30, interval_minutes=1):
+    """Compare the vectorized history generator against the per-row baseline"""
+    simulator = CrowdDataSimulator()
+    location = UF_LOCATIONS[0]
+
+    legacy_ms = time_call(lambda: legacy_generate_historical_data(simulator, location, days, interval_minutes))
+    vectorized_ms = time_call(lambda: simulator.generate_historical_data(location, days, interval_minutes), repeats=10)
+    rows = len(simulator.generate_historical_data(location, days, interval_minutes))
+
+    speedup = legacy_ms / vectorized_ms
+    print(f"generate_historical_data ({days} days @ {interval_minutes} min, {rows} rows)")
+    print(f"  legacy loop:  {legacy_ms:10.1f} ms")
+    print(f"  vectorized:   {vectorized_ms:10.1f} ms")
+    print(f"  speedup:      {speedup:10.1f}x")
+    return speedup
+
+
+def benchmark_historical_panel(days=1, interval_minutes=10):
+    """Compare one panel generation against per-location generation for the whole campus"""
+    simulator = CrowdDataSimulator()
+
+    per_location_ms = time_call(lambda: [simulator.generate_historical_data(loc, days, interval_minutes) for loc in UF_LOCATIONS])
+    panel_ms = time_call(lambda: simulator.generate_historical_panel(UF_LOCATIONS, days, interval_minutes))
+
+    print(f"\nCampus refresh ({len(UF_LOCATIONS)} locations, {days} day @ {interval_minutes} min)")
+    print(f"  per-location: {per_location_ms:10.2f} ms")
+    print(f"  panel:        {panel_ms:10.2f} ms")
+
+
+def benchmark_registry(n_zones=10000):
+    """Vectorized refresh of a large array-backed zone registry"""
+    simulator = CrowdDataSimulator()
+    registry = LocationRegistry.synthetic(n_zones)
+
+    refresh_ms = time_call(lambda: simulator.snapshot(locations=registry), repeats=10)
+
+    print(f"\nZone registry refresh ({n_zones} zones)")
+    print(f"  snapshot:     {refresh_ms:10.2f} ms")
+    return refresh_ms
+
+
+def benchmark_stream(ticks=2000):
+    """Throughput of the snapshot feed with a ring-buffer subscriber, unthrottled"""
+    simulator = CrowdDataSimulator()
+    store = RingBufferStore()
+    feed = CrowdFeed(simulator, tick_seconds=1.0, acceleration=600, realtime=False)
+    feed.subscribe(ring_buffer_consumer(store), name='ring_buffer')
+
+    start = time.perf_counter()
+    feed.start(max_ticks=ticks)
+    feed.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nStreaming feed ({len(UF_LOCATIONS)} locations, {ticks} ticks)")
+    print(f"  snapshots/s:  {ticks / elapsed:10.0f}")
+
+
+def main():
+    print("=" * 60)
+    print("Crowd Data Simulator Benchmark")
+    print("=" * 60)
+
+    speedup = benchmark_historical_data(days=30, interval_minutes=1)
+    if speedup < 50:
+        print("\n❌ Expected at least a 50x speedup")
+        sys.exit(1)
+
+    benchmark_historical_panel(days=1, interval_minutes=10)
+    refresh_ms = benchmark_registry(n_zones=10000)
+    if refresh_ms > 50:
+        print("\n❌ Expected a 10k-zone refresh under 50 ms")
+        sys.exit(1)
+
+    benchmark_stream()
+
+    print("\n✅ Benchmark passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Accuracy regression check for the dynamically quantized LSTM forecaster
+Compares the int8 model against the float model on a held-out simulated week.
+Run from the repository root: python evaluate_quantized_model.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+# Add streamlit_app to path
+sys.path.insert(0, 'streamlit_app')
+
+from data.simulator import CrowdDataSimulator
+from data.locations import UF_LOCATIONS
+from models.lstm_forecaster import CrowdForecaster
+from models.windowing import sliding_windows
+
+MODEL_PATH = os.path.join('streamlit_app', 'models', 'lstm_crowd_model.pth')
+
+# Seed not used for training data, so the week is held out
+HOLDOUT_SEED = 2024
+
+# Largest acceptable increase in mean absolute error over the float model
+MAE_TOLERANCE = 0.005
+
+
+def holdout_windows(sequence_length, forecast_steps):
+    """(inputs, targets) from one simulated week for every location"""
+    simulator = CrowdDataSimulator(seed=HOLDOUT_SEED)
+    _, levels = simulator.generate_historical_panel(UF_LOCATIONS, days=7, interval_minutes=10)
+
+    # Window each location separately so no window spans two locations
+    windows = np.concatenate([sliding_windows(row, sequence_length + forecast_steps) for row in levels])
+    return windows[:, :sequence_length], windows[:, sequence_length:]
+
+
+def time_call(func, repeats=10):
+    """Best wall-clock time of func() in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    print("=" * 60)
+    print("Quantized LSTM Forecaster Accuracy Check")
+    print("=" * 60)
+
+    float_model = CrowdForecaster(model_path=MODEL_PATH)
+    quantized_model = CrowdForecaster(model_path=MODEL_PATH, quantized=True)
+    if not float_model.is_trained:
+        print("❌ No trained model found; run train_lstm_model.py first")
+        sys.exit(1)
+    if not quantized_model.quantized:
+        print("❌ Dynamic quantization is not supported on this machine")
+        sys.exit(1)
+
+    inputs, targets = holdout_windows(float_model.sequence_length, float_model.forecast_steps)
+
+    float_predictions = float_model.predict_many(inputs)
+    quantized_predictions = quantized_model.predict_many(inputs)
+
+    float_mae = np.abs(float_predictions - targets).mean()
+    quantized_mae = np.abs(quantized_predictions - targets).mean()
+    max_diff = np.abs(quantized_predictions - float_predictions).max()
+
+    print(f"\nHeld-out week ({len(UF_LOCATIONS)} locations, {len(inputs):,} windows)")
+    print(f"  float MAE:       {float_mae:.4f}")
+    print(f"  int8 MAE:        {quantized_mae:.4f}")
+    print(f"  max abs diff:    {max_diff:.4f}")
+
+    batch = inputs[:512]
+    float_ms = time_call(lambda: float_model.predict_many(batch))
+    quantized_ms = time_call(lambda: quantized_model.predict_many(batch))
+    print(f"\nLatency (batch of {len(batch)})")
+    print(f"  float:           {float_ms:8.2f} ms")
+    print(f"  int8:            {quantized_ms:8.2f} ms")
+
+    if quantized_mae - float_mae > MAE_TOLERANCE:
+        print(f"\n❌ Quantized MAE regressed by more than {MAE_TOLERANCE}")
+        sys.exit(1)
+
+    print("\n✅ Quantized model within tolerance")
+
+
+if __name__ == "__main__":
+    main()
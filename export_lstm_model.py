@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Export the trained LSTM forecaster to TorchScript and ONNX
+Checks each exported backend against the torch model (max abs diff) and
+compares latency at several batch sizes.
+Run from the repository root: python export_lstm_model.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+# Add streamlit_app to path
+sys.path.insert(0, 'streamlit_app')
+
+from models.lstm_forecaster import CrowdForecaster, BACKENDS
+
+MODEL_PATH = os.path.join('streamlit_app', 'models', 'lstm_crowd_model.pth')
+BATCH_SIZES = (1, 32, 512)
+
+# Largest acceptable difference from the torch model
+PARITY_TOLERANCE = 1e-4
+
+
+def time_call(func, repeats=20):
+    """Best wall-clock time of func() in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    print("=" * 60)
+    print("Exporting LSTM Forecaster")
+    print("=" * 60)
+
+    reference = CrowdForecaster(model_path=MODEL_PATH)
+    if not reference.is_trained:
+        print("❌ No trained model found; run train_lstm_model.py first")
+        sys.exit(1)
+
+    reference.export(MODEL_PATH)
+
+    forecasters = {'torch': reference}
+    for backend in BACKENDS:
+        if backend == 'torch':
+            continue
+        forecaster = CrowdForecaster(model_path=MODEL_PATH, backend=backend)
+        if forecaster.backend == backend:
+            forecasters[backend] = forecaster
+        else:
+            print(f"⚠️  Skipping {backend}: fell back to {forecaster.backend}")
+
+    rng = np.random.default_rng(0)
+    batches = {size: rng.random((size, reference.sequence_length), dtype=np.float32) for size in BATCH_SIZES}
+
+    # Parity against the torch model
+    print("\nParity (max abs diff vs torch)")
+    failed = False
+    expected = reference.predict_many(batches[max(BATCH_SIZES)])
+    for backend, forecaster in forecasters.items():
+        if backend == 'torch':
+            continue
+        diff = np.abs(forecaster.predict_many(batches[max(BATCH_SIZES)]) - expected).max()
+        status = "✓" if diff <= PARITY_TOLERANCE else "❌"
+        failed |= diff > PARITY_TOLERANCE
+        print(f"  {status} {backend:<12} {diff:.2e}")
+
+    # Latency per batch size
+    print("\nLatency (ms per predict_many call)")
+    print(f"  {'batch':>6} " + " ".join(f"{backend:>12}" for backend in forecasters))
+    for size in BATCH_SIZES:
+        timings = [time_call(lambda: forecaster.predict_many(batches[size])) for forecaster in forecasters.values()]
+        print(f"  {size:>6} " + " ".join(f"{ms:12.3f}" for ms in timings))
+
+    if failed:
+        print(f"\n❌ Exported model differs from torch by more than {PARITY_TOLERANCE}")
+        sys.exit(1)
+
+    print("\n✅ Export complete")
+
+
+if __name__ == "__main__":
+    main()
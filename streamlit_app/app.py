@@ -11,9 +11,10 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from data.simulator import CrowdDataSimulator
+from data.snapshot_cache import get_snapshot_provider
 from data.uf_events_real import UFEventGenerator
 from data.locations import UF_LOCATIONS
-from models.lstm_forecaster import CrowdForecaster
+from models.model_registry import get_shared_forecaster
 from models.event_classifier_improved import ImprovedEventCategorizer
 from models.anomaly_detector import AnomalyDetector
 from utils.navigation import create_top_navbar
@@ -147,10 +148,8 @@ def init_session_state():
         st.session_state.event_generator = UFEventGenerator()
         st.session_state.events = st.session_state.event_generator.generate_semester_events(50)
 
-    if 'forecaster' not in st.session_state:
-        # Load the trained LSTM model
-        model_path = os.path.join(os.path.dirname(__file__), 'models', 'lstm_crowd_model.pth')
-        st.session_state.forecaster = CrowdForecaster(model_path=model_path)
+    # Shared LSTM model from the registry (re-read every run to pick up new versions)
+    st.session_state.forecaster = get_shared_forecaster()
 
     if 'event_classifier' not in st.session_state:
         st.session_state.event_classifier = ImprovedEventCategorizer()
@@ -186,7 +185,7 @@ stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
 
 # Track data retrieval performance
 data_start = time_module.time()
-all_crowds = st.session_state.simulator.get_all_current_crowds()
+all_crowds = get_snapshot_provider().get_all_current_crowds()
 avg_occupancy = sum(c['percentage'] for c in all_crowds) / len(all_crowds)
 data_time_ms = (time_module.time() - data_start) * 1000
 
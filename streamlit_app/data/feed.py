@@ -0,0 +1,275 @@
+"""
+Streaming crowd feed
+Runs a snapshot source (CrowdDataSimulator, or anything with the same stream()
+API) on a background thread and fans each snapshot out to subscribers through
+bounded queues, for load-testing the forecasting and metrics paths.
+"""
+import queue
+import threading
+import numpy as np
+
+# Backpressure policies for a full subscriber queue
+BLOCK = 'block'              # Producer waits for the slow consumer
+DROP_OLDEST = 'drop_oldest'  # Oldest queued snapshot is discarded
+
+
+class Subscription:
+    """One consumer's bounded queue of snapshots"""
+
+    def __init__(self, name, maxsize, policy):
+        self.name = name
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def put(self, snapshot, stop_event):
+        """Deliver a snapshot, applying this subscription's backpressure policy"""
+        if snapshot is None:
+            self.close()
+            return
+        if self.policy == DROP_OLDEST:
+            while True:
+                try:
+                    self.queue.put_nowait(snapshot)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        else:
+            # Block, but wake up periodically so stop() is never stuck behind a dead consumer
+            while True:
+                if stop_event.is_set():
+                    # Abandoned on shutdown
+                    self.dropped += 1
+                    return
+                try:
+                    self.queue.put(snapshot, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        self.delivered += 1
+
+    def close(self):
+        """
+        Queue the end-of-feed marker without ever blocking the producer
+        A full queue (a stuck BLOCK consumer) loses its oldest snapshot to make room.
+        """
+        while True:
+            try:
+                self.queue.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next snapshot (None marks the end of the feed)"""
+        return self.queue.get(timeout=timeout)
+
+    def __iter__(self):
+        while True:
+            snapshot = self.get()
+            if snapshot is None:
+                return
+            yield snapshot
+
+
+class CrowdFeed:
+    """Background producer of snapshots with bounded-queue fan-out to subscribers"""
+
+    def __init__(self, source, tick_seconds=1.0, acceleration=1.0, start=None, realtime=True):
+        """
+        Initialize crowd feed
+        Args:
+            source: Object with a stream(tick_seconds, acceleration, start, max_ticks, realtime) generator
+            tick_seconds: Wall-clock seconds between ticks
+            acceleration: Simulated seconds per wall-clock second
+            start: Simulated start time (default: now)
+            realtime: False produces snapshots as fast as subscribers accept them
+        """
+        self.source = source
+        self.tick_seconds = tick_seconds
+        self.acceleration = acceleration
+        self.start_time = start
+        self.realtime = realtime
+
+        self.ticks = 0
+        self._subscriptions = []
+        self._workers = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback=None, name=None, maxsize=16, policy=BLOCK):
+        """
+        Add a subscriber
+        Args:
+            callback: Optional function called with each snapshot on its own worker thread.
+                      Without a callback, iterate the returned Subscription instead.
+            name: Label for the subscriber
+            maxsize: Queue capacity (the backpressure bound)
+            policy: BLOCK or DROP_OLDEST when the queue is full
+        Returns:
+            Subscription
+        """
+        subscription = Subscription(name or f'subscriber-{len(self._subscriptions)}', maxsize, policy)
+        self._subscriptions.append(subscription)
+
+        if callback is not None:
+            def consume():
+                for snapshot in subscription:
+                    # A failing callback must not stop the queue draining (BLOCK would stall the producer)
+                    try:
+                        callback(snapshot)
+                    except Exception as e:
+                        subscription.errors += 1
+                        print(f"Error in feed subscriber '{subscription.name}': {str(e)}")
+            worker = threading.Thread(target=consume, name=f'feed-{subscription.name}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        return subscription
+
+    def run(self, max_ticks=None):
+        """Produce snapshots on the calling thread until max_ticks or stop()"""
+        try:
+            for snapshot in self.source.stream(
+                tick_seconds=self.tick_seconds,
+                acceleration=self.acceleration,
+                start=self.start_time,
+                max_ticks=max_ticks,
+                realtime=self.realtime
+            ):
+                if self._stop_event.is_set():
+                    break
+                for subscription in self._subscriptions:
+                    subscription.put(snapshot, self._stop_event)
+                self.ticks += 1
+        finally:
+            # Signal end of feed to every subscriber
+            for subscription in self._subscriptions:
+                subscription.close()
+
+    def start(self, max_ticks=None):
+        """Run the producer on a background thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(max_ticks,), name='crowd-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the producer and wait for callback subscribers to drain"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def join(self, timeout=None):
+        """Wait for a bounded run (max_ticks) to finish and subscribers to drain"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def stats(self):
+        """Delivery, drop and callback error counters per subscriber"""
+        return {
+            'ticks': self.ticks,
+            'subscribers': {
+                s.name: {'delivered': s.delivered, 'dropped': s.dropped, 'errors': s.errors,
+                         'queued': s.queue.qsize()}
+                for s in self._subscriptions
+            }
+        }
+
+
+def ring_buffer_consumer(store):
+    """Subscriber callback that appends every location's level to a RingBufferStore"""
+    def consume(snapshot):
+        for location_id, level in zip(snapshot['location_ids'].tolist(), snapshot['crowd_level'].tolist()):
+            store.append(location_id, snapshot['timestamp'], level)
+    return consume
+
+
+def prometheus_consumer(locations):
+    """Subscriber callback that updates the per-location Prometheus gauges"""
+    from monitoring.prometheus_metrics import MetricsCollector
+
+    by_id = {loc['id']: loc for loc in locations}
+
+    def consume(snapshot):
+        crowds = []
+        for location_id, level, headcount, capacity in zip(
+            snapshot['location_ids'].tolist(), snapshot['crowd_level'].tolist(),
+            snapshot['headcount'].tolist(), snapshot['capacity'].tolist()
+        ):
+            location = by_id.get(location_id, {})
+            crowds.append({
+                'location_id': location_id,
+                'location_name': location.get('name', str(location_id)),
+                'location_type': location.get('category', 'unknown'),
+                'headcount': headcount,
+                'capacity': capacity,
+                'percentage': int(level * 100)
+            })
+        MetricsCollector.update_location_metrics(crowds)
+    return consume
+
+
+def anomaly_consumer(detector, store, window_size=12, on_anomaly=None):
+    """
+    Subscriber callback that runs the anomaly detector on every location's recent window
+    in one detect_many() call, with calibrated per-location/hour-of-week thresholds.
+    Expects the store to be fed by ring_buffer_consumer (or the simulator).
+    on_anomaly(location_id, result) is called for every flagged location.
+    """
+    def consume(snapshot):
+        location_ids, windows = [], []
+        for location_id in snapshot['location_ids'].tolist():
+            # Copy: tail() is a live view the ring buffer keeps writing to
+            window = np.array(store.tail(location_id, window_size))
+            if len(window) >= 2:
+                location_ids.append(location_id)
+                windows.append(window)
+        if not windows:
+            return
+
+        results = detector.detect_many(windows, location_ids=location_ids, timestamps=snapshot['timestamp'])
+        if on_anomaly is not None:
+            for location_id, result in zip(location_ids, results):
+                if result['is_anomaly']:
+                    on_anomaly(location_id, result)
+    return consume
+
+
+def streaming_forecast_consumer(streaming_forecaster):
+    """Subscriber callback that advances a StreamingForecaster's per-location state"""
+    def consume(snapshot):
+        streaming_forecaster.update(snapshot['crowd_level'], snapshot['location_ids'], snapshot['timestamp'])
+    return consume
+
+
+def online_anomaly_consumer(online_detector, on_anomaly=None):
+    """
+    Subscriber callback that scores every location with an OnlineAnomalyDetector
+    in one vectorized update per tick.
+    on_anomaly(location_id, result) is called for every flagged location.
+    """
+    def consume(snapshot):
+        result = online_detector.update(snapshot['crowd_level'], snapshot['location_ids'], snapshot['timestamp'])
+        if on_anomaly is not None:
+            for i in np.flatnonzero(result['is_anomaly']).tolist():
+                on_anomaly(int(result['location_ids'][i]), {
+                    'is_anomaly': True,
+                    'robust_z': float(result['robust_z'][i]),
+                    'severity': str(result['severity'][i])
+                })
+    return consume
@@ -0,0 +1,120 @@
+"""
+Array-backed location registry
+Stores locations (or sensor zones) as a struct of arrays so the simulator and
+models can process thousands of zones with vectorized NumPy calls
+"""
+import numpy as np
+
+from utils.config import UF_CENTER
+
+# Category code table; code i refers to CATEGORIES[i]
+CATEGORIES = ['LIBRARIES', 'GYMS', 'DINING', 'ACADEMIC', 'HOUSING', 'STUDY SPOTS', 'OUTDOORS', 'AQUATICS']
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+
+def category_code(category):
+    """Integer code for a category name (-1 if unknown)"""
+    return CATEGORY_CODES.get(category, -1)
+
+
+class LocationRegistry:
+    """Struct-of-arrays view of a set of locations"""
+
+    def __init__(self, ids, lat, lon, capacity, category_codes, names=None, zone_ids=None):
+        """
+        Initialize location registry
+        Args:
+            ids: Integer location ids (used to key simulator noise)
+            lat, lon: Coordinates
+            capacity: Maximum headcount per location
+            category_codes: Codes into CATEGORIES
+            names: Optional display names
+            zone_ids: Optional sensor zone identifiers (e.g. 'Z-SWRC-01')
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.capacity = np.asarray(capacity, dtype=np.int64)
+        self.category_codes = np.asarray(category_codes, dtype=np.int8)
+        self.names = list(names) if names is not None else [str(i) for i in self.ids.tolist()]
+        self.zone_ids = list(zone_ids) if zone_ids is not None else None
+
+        self._index = None
+
+    @classmethod
+    def from_locations(cls, locations):
+        """Build a registry from location dicts such as UF_LOCATIONS"""
+        return cls(
+            ids=[loc['id'] for loc in locations],
+            lat=[loc['lat'] for loc in locations],
+            lon=[loc['lon'] for loc in locations],
+            capacity=[loc['capacity'] for loc in locations],
+            category_codes=[category_code(loc['category']) for loc in locations],
+            names=[loc['name'] for loc in locations]
+        )
+
+    @classmethod
+    def from_facilities(cls, facilities, first_id=1000, center=UF_CENTER):
+        """
+        Build a registry of sensor zones from a facility table
+        Args:
+            facilities: Dict of facility name -> {'zones': [(sub_area, zone_id, capacity), ...], 'category': ...}
+                        (the FACILITIES layout in generate_training_data_v2.py)
+            first_id: Integer id given to the first zone
+            center: Coordinates used for every zone (the table has no per-zone positions)
+        """
+        names, zone_ids, capacities, codes = [], [], [], []
+        for facility in facilities.values():
+            for sub_area, zone_id, capacity in facility['zones']:
+                names.append(sub_area)
+                zone_ids.append(zone_id)
+                capacities.append(capacity)
+                codes.append(category_code(facility['category']))
+
+        n = len(names)
+        return cls(
+            ids=np.arange(first_id, first_id + n),
+            lat=np.full(n, center[0]),
+            lon=np.full(n, center[1]),
+            capacity=capacities,
+            category_codes=codes,
+            names=names,
+            zone_ids=zone_ids
+        )
+
+    @classmethod
+    def synthetic(cls, n, seed=0, center=UF_CENTER, first_id=100000):
+        """Random registry of n zones around campus (for load tests and benchmarks)"""
+        rng = np.random.default_rng(seed)
+        return cls(
+            ids=np.arange(first_id, first_id + n),
+            lat=center[0] + rng.normal(0, 0.005, n),
+            lon=center[1] + rng.normal(0, 0.005, n),
+            capacity=rng.integers(10, 500, n),
+            category_codes=rng.integers(0, len(CATEGORIES), n)
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def indices_of(self, location_ids):
+        """Row index for each location id (-1 if unknown)"""
+        if self._index is None:
+            self._index = {location_id: i for i, location_id in enumerate(self.ids.tolist())}
+        return np.array([self._index.get(location_id, -1) for location_id in location_ids], dtype=np.intp)
+
+    def categories(self):
+        """Category name for every row"""
+        return [CATEGORIES[code] if code >= 0 else 'UNKNOWN' for code in self.category_codes.tolist()]
+
+    def to_location(self, i):
+        """Location dict for row i, in the UF_LOCATIONS layout"""
+        code = int(self.category_codes[i])
+        return {
+            'id': int(self.ids[i]),
+            'name': self.names[i],
+            'category': CATEGORIES[code] if code >= 0 else 'UNKNOWN',
+            'lat': float(self.lat[i]),
+            'lon': float(self.lon[i]),
+            'capacity': int(self.capacity[i])
+        }
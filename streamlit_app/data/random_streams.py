@@ -0,0 +1,128 @@
+"""
+Counter-based random streams for the crowd simulator
+
+Every random value is a pure function of (seed, location_id, time_bucket, stream),
+computed with the Philox4x32-10 counter-based generator. Any point can be
+recomputed on its own, in any order, in any process, and gives the same number,
+so generated data can be cached, shared between sessions and sharded.
+"""
+import numpy as np
+
+# Width of one time bucket in seconds (readings within the same minute share noise)
+BUCKET_SECONDS = 60
+
+# Independent stream ids for different uses of randomness
+NOISE_STREAM = 0
+ANOMALY_STREAM = 1
+
+# Philox4x32 constants (Salmon et al., "Parallel Random Numbers: As Easy as 1, 2, 3")
+_PHILOX_M0 = np.uint64(0xD2511F53)
+_PHILOX_M1 = np.uint64(0xCD9E8D57)
+_PHILOX_W0 = np.uint64(0x9E3779B9)
+_PHILOX_W1 = np.uint64(0xBB67AE85)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+
+# Each Philox block yields four 32-bit words, i.e. two Box-Muller pairs, i.e. four normals
+_LANES = 4
+
+
+def philox4x32(counter, key, rounds=10):
+    """
+    Vectorized Philox4x32 block function
+    Args:
+        counter: Sequence of four uint32-valued arrays (broadcastable)
+        key: Sequence of two uint32-valued arrays (broadcastable with counter)
+        rounds: Number of Philox rounds (10 is the standard choice)
+    Returns:
+        Tuple of four uint64 arrays holding the 32-bit output words
+    """
+    c0, c1, c2, c3 = [np.asarray(c, dtype=np.uint64) & _MASK32 for c in counter]
+    k0, k1 = [np.asarray(k, dtype=np.uint64) & _MASK32 for k in key]
+
+    for r in range(rounds):
+        if r > 0:
+            k0 = (k0 + _PHILOX_W0) & _MASK32
+            k1 = (k1 + _PHILOX_W1) & _MASK32
+        p0 = c0 * _PHILOX_M0
+        p1 = c2 * _PHILOX_M1
+        c0, c1, c2, c3 = (p1 >> _SHIFT32) ^ c1 ^ k0, p1 & _MASK32, (p0 >> _SHIFT32) ^ c3 ^ k1, p0 & _MASK32
+
+    return c0, c1, c2, c3
+
+
+def time_buckets(timestamps, bucket_seconds=BUCKET_SECONDS):
+    """Integer time bucket for each timestamp (seconds since the epoch // bucket_seconds)"""
+    seconds = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+    return seconds // bucket_seconds
+
+
+def _block_words(seed, location_ids, blocks, stream):
+    """Philox output words for a (locations x blocks) grid"""
+    location_ids = np.asarray(location_ids, dtype=np.int64)[:, None]
+    blocks = np.asarray(blocks, dtype=np.int64)[None, :]
+    counter = (blocks & 0xFFFFFFFF, blocks >> 32, stream, 0)
+    key = (seed, location_ids)
+    return philox4x32(counter, key)
+
+
+def _box_muller(u1, u2):
+    """Radius and angle of the Box-Muller transform for 32-bit uniform words"""
+    scale = 1.0 / 4294967296.0
+    radius = np.sqrt(-2.0 * np.log((u1 + 0.5) * scale))
+    theta = (2.0 * np.pi * scale) * (u2 + 0.5)
+    return radius, theta
+
+
+def standard_normal(seed, location_ids, buckets, stream=NOISE_STREAM):
+    """
+    Standard normal values for every (location, time bucket) pair
+    Args:
+        seed: Simulator seed
+        location_ids: 1-D array of integer location ids (length L)
+        buckets: 1-D array of integer time buckets (length T)
+        stream: Stream id, so unrelated uses of randomness do not collide
+    Returns:
+        Float64 array of shape (L, T). Entry [i, j] depends only on
+        (seed, location_ids[i], buckets[j], stream).
+    """
+    location_ids = np.asarray(location_ids, dtype=np.int64).reshape(-1)
+    buckets = np.asarray(buckets, dtype=np.int64).reshape(-1)
+    if len(location_ids) == 0 or len(buckets) == 0:
+        return np.zeros((len(location_ids), len(buckets)))
+
+    first_block = int(buckets.min()) // _LANES
+    last_block = int(buckets.max()) // _LANES
+    n_blocks = last_block - first_block + 1
+
+    if n_blocks * _LANES <= 2 * len(buckets):
+        # Dense range (e.g. 1-minute history): compute every block once and use all four lanes
+        w0, w1, w2, w3 = _block_words(seed, location_ids, np.arange(first_block, last_block + 1), stream)
+        radius_a, theta_a = _box_muller(w0, w1)
+        radius_b, theta_b = _box_muller(w2, w3)
+        lanes = np.stack([
+            radius_a * np.cos(theta_a),
+            radius_a * np.sin(theta_a),
+            radius_b * np.cos(theta_b),
+            radius_b * np.sin(theta_b)
+        ], axis=-1).reshape(len(location_ids), n_blocks * _LANES)
+        return lanes[:, buckets - first_block * _LANES]
+
+    # Sparse buckets (e.g. 10-minute history): one block per point, pick its lane
+    lane = buckets % _LANES
+    w0, w1, w2, w3 = _block_words(seed, location_ids, buckets // _LANES, stream)
+    second_pair = lane >= 2
+    radius, theta = _box_muller(np.where(second_pair, w2, w0), np.where(second_pair, w3, w1))
+    return radius * np.where(lane % 2 == 1, np.sin(theta), np.cos(theta))
+
+
+def location_generator(seed, location_id, time_bucket, stream=NOISE_STREAM):
+    """
+    np.random.Generator for ad-hoc draws tied to one location and time bucket
+    Uses NumPy's Philox bit generator keyed by (seed, location_id) with the
+    counter positioned at (time_bucket, stream), so the same arguments always
+    produce the same sequence.
+    """
+    key = np.array([seed, location_id], dtype=np.uint64)
+    counter = np.array([time_bucket, stream, 0, 0], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=key, counter=counter))
@@ -0,0 +1,222 @@
+"""
+Persistent columnar store for crowd readings
+Readings are appended into per-zone, per-day partitions of memory-mapped .npy
+column files, so range and latest queries only touch the partitions they need:
+
+    <root>/<zone_id>/<YYYY-MM-DD>/timestamps-<seq>.npy   (int64 seconds since epoch)
+    <root>/<zone_id>/<YYYY-MM-DD>/counts-<seq>.npy       (float32 count_in_area)
+
+Each append writes a new immutable chunk; compact() merges a partition's chunks.
+Chunk files are written under a temporary name and moved into place with
+os.replace, so a listed chunk is always complete.
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'readings')
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Timestamp format of the sensor export (data.csv)
+CSV_TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M:%S'
+
+
+def _to_seconds(timestamps):
+    """Seconds since the epoch as int64 for datetimes, strings or datetime64 values"""
+    return np.asarray(pd.to_datetime(timestamps), dtype='datetime64[s]').astype(np.int64)
+
+
+def _save_atomic(path, array):
+    """np.save to a hidden temporary file next to path, then rename it over path"""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f'.{name}.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class ReadingStore:
+    """Append-only, time-partitioned columnar store of zone readings"""
+
+    def __init__(self, root=DEFAULT_STORE_PATH):
+        """
+        Initialize reading store
+        Args:
+            root: Directory holding the zone partitions (created if missing)
+        """
+        self.root = root
+        # Reentrant: compact() reads partitions while holding it
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _zone_dir(self, zone_id):
+        return os.path.join(self.root, str(zone_id).replace(os.sep, '_'))
+
+    def _partition_dir(self, zone_id, day):
+        return os.path.join(self._zone_dir(zone_id), str(np.datetime64(int(day), 'D')))
+
+    def _partitions(self, zone_id):
+        """Sorted partition day numbers (days since epoch) for a zone"""
+        zone_dir = self._zone_dir(zone_id)
+        if not os.path.isdir(zone_dir):
+            return np.zeros(0, dtype=np.int64)
+        days = [np.datetime64(name, 'D').astype(np.int64) for name in os.listdir(zone_dir)]
+        return np.sort(np.array(days, dtype=np.int64))
+
+    def _chunk_ids(self, partition_dir):
+        if not os.path.isdir(partition_dir):
+            return []
+        return sorted(
+            int(name[len('timestamps-'):-len('.npy')])
+            for name in os.listdir(partition_dir)
+            if name.startswith('timestamps-')
+        )
+
+    def _read_partition(self, partition_dir):
+        """
+        Memory-map every chunk of a partition. Returns (seconds, counts) lists.
+        Listing and mapping hold the store lock so a concurrent compact() is seen
+        either entirely before or entirely after; the maps stay valid afterwards.
+        """
+        seconds, counts = [], []
+        with self._lock:
+            for chunk_id in self._chunk_ids(partition_dir):
+                seconds.append(np.load(os.path.join(partition_dir, f'timestamps-{chunk_id}.npy'), mmap_mode='r'))
+                counts.append(np.load(os.path.join(partition_dir, f'counts-{chunk_id}.npy'), mmap_mode='r'))
+        return seconds, counts
+
+    def append(self, zone_id, timestamps, counts):
+        """
+        Append readings for one zone
+        Args:
+            zone_id: Zone identifier (e.g. 'Z-SWRC-01')
+            timestamps: Array-like of reading times
+            counts: Array-like of counts, same length as timestamps
+        """
+        seconds = _to_seconds(timestamps)
+        counts = np.asarray(counts, dtype=np.float32)
+        if len(seconds) == 0:
+            return
+
+        order = np.argsort(seconds, kind='stable')
+        seconds, counts = seconds[order], counts[order]
+        days = seconds // SECONDS_PER_DAY
+
+        # Split the sorted batch at day boundaries, one chunk per partition
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        with self._lock:
+            for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(days)]):
+                partition_dir = self._partition_dir(zone_id, days[start])
+                os.makedirs(partition_dir, exist_ok=True)
+                chunk_ids = self._chunk_ids(partition_dir)
+                chunk_id = chunk_ids[-1] + 1 if chunk_ids else 0
+
+                # Write counts first so a visible timestamps file always has its counts
+                _save_atomic(os.path.join(partition_dir, f'counts-{chunk_id}.npy'), counts[start:end])
+                _save_atomic(os.path.join(partition_dir, f'timestamps-{chunk_id}.npy'), seconds[start:end])
+
+    def append_frame(self, df, zone_column='zone_id', timestamp_column='timestamp', value_column='count_in_area'):
+        """Append a DataFrame of readings for any number of zones"""
+        for zone_id, group in df.groupby(zone_column, sort=False):
+            self.append(zone_id, group[timestamp_column].to_numpy(), group[value_column].to_numpy())
+
+    def ingest_csv(self, path, chunksize=1_000_000):
+        """
+        Import a data.csv-style file (timestamp, facility, sub_area, zone_id, count_in_area, ...)
+        Reads in chunks, so the file never has to fit in memory.
+        Returns number of rows ingested.
+        """
+        rows = 0
+        for chunk in pd.read_csv(path, usecols=['timestamp', 'zone_id', 'count_in_area'], chunksize=chunksize):
+            chunk = chunk.dropna(subset=['zone_id', 'count_in_area'])
+            try:
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format=CSV_TIMESTAMP_FORMAT)
+            except ValueError:
+                # Older exports mix in ISO timestamps; parse those per element
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format='mixed')
+            self.append_frame(chunk)
+            rows += len(chunk)
+        return rows
+
+    def range(self, zone_id, start, end):
+        """
+        Readings for a zone with start <= timestamp < end
+        Only partitions overlapping the requested days are opened.
+        Returns:
+            (timestamps, counts) as datetime64[s] and float32 arrays, sorted by time
+        """
+        start_s, end_s = _to_seconds([pd.Timestamp(start), pd.Timestamp(end)])
+        days = self._partitions(zone_id)
+        days = days[(days >= start_s // SECONDS_PER_DAY) & (days <= (end_s - 1) // SECONDS_PER_DAY)]
+
+        seconds, counts = [], []
+        for day in days:
+            for chunk_seconds, chunk_counts in zip(*self._read_partition(self._partition_dir(zone_id, day))):
+                # Chunks are sorted, so the window is a contiguous slice
+                lo, hi = np.searchsorted(chunk_seconds, [start_s, end_s])
+                seconds.append(chunk_seconds[lo:hi])
+                counts.append(chunk_counts[lo:hi])
+
+        if not seconds:
+            return np.zeros(0, dtype='datetime64[s]'), np.zeros(0, dtype=np.float32)
+
+        seconds = np.concatenate(seconds)
+        counts = np.concatenate(counts)
+        order = np.argsort(seconds, kind='stable')
+        return seconds[order].astype('datetime64[s]'), counts[order]
+
+    def latest(self, zone_ids):
+        """
+        Most recent reading per zone, read from each zone's newest partition only
+        Returns:
+            Dict of zone_id -> (timestamp, count); zones without readings are omitted
+        """
+        result = {}
+        for zone_id in zone_ids:
+            days = self._partitions(zone_id)
+            if len(days) == 0:
+                continue
+            best_second, best_count = None, None
+            for chunk_seconds, chunk_counts in zip(*self._read_partition(self._partition_dir(zone_id, days[-1]))):
+                if len(chunk_seconds) and (best_second is None or chunk_seconds[-1] >= best_second):
+                    best_second, best_count = int(chunk_seconds[-1]), float(chunk_counts[-1])
+            if best_second is not None:
+                result[zone_id] = (np.datetime64(best_second, 's'), best_count)
+        return result
+
+    def days(self, zone_id):
+        """Days (since the epoch) that have readings for a zone, sorted"""
+        return self._partitions(zone_id)
+
+    def zones(self):
+        """All zone ids with stored readings"""
+        return sorted(os.listdir(self.root))
+
+    def compact(self, zone_id):
+        """
+        Merge each partition's chunks into a single sorted chunk
+        The merged chunk is written to temporary files and renamed into place, and the
+        chunks it replaces are removed, all under the store lock.
+        """
+        with self._lock:
+            for day in self._partitions(zone_id):
+                partition_dir = self._partition_dir(zone_id, day)
+                chunk_ids = self._chunk_ids(partition_dir)
+                if len(chunk_ids) <= 1:
+                    continue
+
+                seconds, counts = self._read_partition(partition_dir)
+                seconds = np.concatenate(seconds)
+                counts = np.concatenate(counts)
+                order = np.argsort(seconds, kind='stable')
+
+                new_id = chunk_ids[-1] + 1
+                _save_atomic(os.path.join(partition_dir, f'counts-{new_id}.npy'), counts[order])
+                _save_atomic(os.path.join(partition_dir, f'timestamps-{new_id}.npy'), seconds[order])
+
+                # Timestamps first, so every listed chunk still has its counts
+                for chunk_id in chunk_ids:
+                    os.remove(os.path.join(partition_dir, f'timestamps-{chunk_id}.npy'))
+                    os.remove(os.path.join(partition_dir, f'counts-{chunk_id}.npy'))
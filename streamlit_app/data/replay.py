@@ -0,0 +1,307 @@
+"""
+Replay of recorded crowd history
+Plays a recording back through the same snapshot()/stream() API as
+CrowdDataSimulator, so feeds, pages and benchmarks can run on real data.
+A recording is a dense, time-major grid of counts that is memory-mapped on open:
+
+    <path>/manifest.json   (step, start time and per-zone ids, names, capacity, category)
+    <path>/counts.npy      (float32, n_steps x n_zones)
+
+Each snapshot reads one contiguous row, so recordings larger than memory play
+back without being loaded.
+"""
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+from data.location_registry import LocationRegistry
+from data.reading_store import ReadingStore, SECONDS_PER_DAY
+from data.simulator import SnapshotStream
+from utils.config import UF_CENTER
+
+MANIFEST_FILE = 'manifest.json'
+COUNTS_FILE = 'counts.npy'
+
+
+def _seconds(timestamp):
+    """Seconds since the epoch for one datetime, string or datetime64 value"""
+    return int(np.datetime64(pd.Timestamp(timestamp), 's').astype(np.int64))
+
+
+def _write_manifest(path, step_seconds, start_seconds, n_steps, registry):
+    manifest = {
+        'step_seconds': int(step_seconds),
+        'start': int(start_seconds),
+        'n_steps': int(n_steps),
+        'ids': registry.ids.tolist(),
+        'zone_ids': registry.zone_ids if registry.zone_ids is not None else [str(i) for i in registry.ids.tolist()],
+        'names': registry.names,
+        'capacity': registry.capacity.tolist(),
+        'category_codes': registry.category_codes.tolist()
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f)
+
+
+def record_panel(path, timestamps, levels, locations):
+    """
+    Write a history panel (e.g. from generate_historical_panel) as a recording
+    Args:
+        path: Recording directory (created if missing)
+        timestamps: Evenly spaced timestamps of the panel columns
+        levels: (locations x time) crowd levels in [0, 1]
+        locations: LocationRegistry or list of location dicts for the panel rows
+    """
+    registry = locations if isinstance(locations, LocationRegistry) else LocationRegistry.from_locations(locations)
+    seconds = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+    step_seconds = int(seconds[1] - seconds[0]) if len(seconds) > 1 else 600
+
+    os.makedirs(path, exist_ok=True)
+    counts = np.lib.format.open_memmap(
+        os.path.join(path, COUNTS_FILE), mode='w+', dtype=np.float32, shape=(len(seconds), len(registry))
+    )
+    counts[:] = (np.asarray(levels, dtype=np.float32) * registry.capacity[:, None]).T
+    counts.flush()
+    del counts
+
+    _write_manifest(path, step_seconds, seconds[0], len(seconds), registry)
+
+
+def record_store(store, path, registry=None, step_minutes=10, start=None, end=None):
+    """
+    Resample a ReadingStore onto a regular grid and write it as a recording
+    Works one day at a time, so memory stays bounded by one day of readings.
+    Each step holds the last reading at or before it (forward fill across days).
+    Args:
+        store: ReadingStore to read from
+        path: Recording directory (created if missing)
+        registry: LocationRegistry with zone_ids (e.g. LocationRegistry.from_facilities(FACILITIES))
+                  supplying ids, names, capacities and categories. Without it every stored
+                  zone is recorded and capacity is the zone's largest count.
+        step_minutes: Grid step
+        start, end: Time range to record (default: everything in the store)
+    """
+    step_seconds = step_minutes * 60
+    if registry is None:
+        zone_ids = store.zones()
+    elif registry.zone_ids is None:
+        raise ValueError("record_store needs a registry with zone_ids (e.g. LocationRegistry.from_facilities)")
+    else:
+        zone_ids = registry.zone_ids
+
+    # Default range spans every stored partition
+    if start is None or end is None:
+        days = np.concatenate([store.days(zone_id) for zone_id in zone_ids] or [np.zeros(0, dtype=np.int64)])
+        if len(days) == 0:
+            raise ValueError("Store has no readings for the requested zones")
+    start_seconds = _seconds(start) if start is not None else int(days.min()) * SECONDS_PER_DAY
+    end_seconds = _seconds(end) if end is not None else (int(days.max()) + 1) * SECONDS_PER_DAY
+    start_seconds -= start_seconds % step_seconds
+    n_steps = -(-(end_seconds - start_seconds) // step_seconds)
+
+    os.makedirs(path, exist_ok=True)
+    counts = np.lib.format.open_memmap(
+        os.path.join(path, COUNTS_FILE), mode='w+', dtype=np.float32, shape=(n_steps, len(zone_ids))
+    )
+
+    steps_per_block = max(SECONDS_PER_DAY // step_seconds, 1)
+    carry = np.zeros(len(zone_ids), dtype=np.float32)
+    peak = np.zeros(len(zone_ids), dtype=np.float32)
+
+    for block_start in range(0, n_steps, steps_per_block):
+        block_end = min(block_start + steps_per_block, n_steps)
+        block = np.full((block_end - block_start, len(zone_ids)), np.nan, dtype=np.float32)
+        block_seconds = start_seconds + block_start * step_seconds
+
+        for z, zone_id in enumerate(zone_ids):
+            seconds, values = store.range(
+                zone_id,
+                np.datetime64(block_seconds, 's'),
+                np.datetime64(start_seconds + block_end * step_seconds, 's')
+            )
+            if len(values):
+                # Readings are sorted, so the last one in each step wins
+                rows = (seconds.astype(np.int64) - block_seconds) // step_seconds
+                block[rows, z] = values
+                peak[z] = max(peak[z], values.max())
+
+        # Forward fill each zone from its previous reading
+        block = np.vstack([carry[None, :], block])
+        filled = np.where(np.isnan(block), 0, np.arange(len(block))[:, None])
+        block = block[np.maximum.accumulate(filled, axis=0), np.arange(len(zone_ids))]
+        carry = block[-1]
+        counts[block_start:block_end] = block[1:]
+
+    counts.flush()
+    del counts
+
+    if registry is None:
+        registry = LocationRegistry(
+            ids=np.arange(1000, 1000 + len(zone_ids)),
+            lat=np.full(len(zone_ids), UF_CENTER[0]),
+            lon=np.full(len(zone_ids), UF_CENTER[1]),
+            capacity=np.maximum(np.ceil(peak), 1),
+            category_codes=np.full(len(zone_ids), -1),
+            names=zone_ids,
+            zone_ids=zone_ids
+        )
+    _write_manifest(path, step_seconds, start_seconds, n_steps, registry)
+
+
+def convert_csv(csv_path, path, registry=None, step_minutes=10, store_root=None):
+    """
+    Convert a data.csv-style sensor export into a recording
+    The CSV is ingested in chunks into a ReadingStore (a temporary one unless
+    store_root is given) and resampled from there, so it is never held in memory.
+    """
+    if store_root is not None:
+        store = ReadingStore(store_root)
+        store.ingest_csv(csv_path)
+        record_store(store, path, registry=registry, step_minutes=step_minutes)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReadingStore(tmp)
+        store.ingest_csv(csv_path)
+        record_store(store, path, registry=registry, step_minutes=step_minutes)
+
+
+class ReplaySource(SnapshotStream):
+    """Snapshot source that plays back a memory-mapped recording"""
+
+    def __init__(self, path, loop=False):
+        """
+        Initialize replay source
+        Args:
+            path: Recording directory written by record_panel, record_store or convert_csv
+            loop: Wrap around to the start when playback passes the end of the recording
+        """
+        self.path = path
+        self.loop = loop
+
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        self.step_seconds = manifest['step_seconds']
+        self.start_seconds = manifest['start']
+        self.n_steps = manifest['n_steps']
+        self.counts = np.load(os.path.join(path, COUNTS_FILE), mmap_mode='r')
+
+        n_zones = len(manifest['ids'])
+        self.registry = LocationRegistry(
+            ids=manifest['ids'],
+            lat=np.full(n_zones, UF_CENTER[0]),
+            lon=np.full(n_zones, UF_CENTER[1]),
+            capacity=manifest['capacity'],
+            category_codes=manifest['category_codes'],
+            names=manifest['names'],
+            zone_ids=manifest['zone_ids']
+        )
+        self.locations = [self.registry.to_location(i) for i in range(n_zones)]
+
+    @property
+    def start_time(self):
+        """Timestamp of the first recorded step"""
+        return pd.Timestamp(self.start_seconds, unit='s').to_pydatetime()
+
+    @property
+    def end_time(self):
+        """Timestamp just past the last recorded step"""
+        return self.start_time + timedelta(seconds=self.n_steps * self.step_seconds)
+
+    def _rows(self, seconds):
+        """Recording row for each time (the step containing it)"""
+        rows = (np.asarray(seconds, dtype=np.int64) - self.start_seconds) // self.step_seconds
+        if self.loop:
+            return rows % self.n_steps
+        return np.clip(rows, 0, self.n_steps - 1)
+
+    def _columns(self, locations):
+        """Column indices for a registry or list of location dicts (None = all zones)"""
+        if locations is None:
+            return None
+        ids = locations.ids if isinstance(locations, LocationRegistry) else [loc['id'] for loc in locations]
+        columns = self.registry.indices_of(ids)
+        if (columns < 0).any():
+            raise KeyError(f"Locations not in the recording: {np.asarray(ids)[columns < 0].tolist()}")
+        return columns
+
+    def snapshot(self, at=None, locations=None):
+        """
+        Recorded crowd levels for many locations at one instant
+        Args:
+            at: Timestamp to read (default: the start of the recording)
+            locations: List of location dicts or a LocationRegistry (default: all recorded zones)
+        Returns:
+            Dict in the CrowdDataSimulator.snapshot() layout
+        """
+        at = at if at is not None else self.start_time
+        columns = self._columns(locations)
+        row = self.counts[self._rows(_seconds(at))]
+        capacity = self.registry.capacity
+
+        if columns is not None:
+            row = row[columns]
+            capacity = capacity[columns]
+
+        crowd_levels = np.clip(row / capacity, 0, 1).astype(np.float32)
+        return {
+            'timestamp': at,
+            'location_ids': self.registry.ids if columns is None else self.registry.ids[columns],
+            'crowd_level': crowd_levels,
+            'headcount': np.asarray(row, dtype=np.int64),
+            'capacity': capacity
+        }
+
+    def _tick_times(self, tick_seconds, acceleration, start):
+        """Replay timestamps for successive ticks, ending with the recording unless looping"""
+        step = timedelta(seconds=tick_seconds * acceleration)
+        current = start if start is not None else self.start_time
+        end = self.end_time
+        while self.loop or current < end:
+            yield current
+            current += step
+
+    def historical_panel(self, start=None, end=None, locations=None):
+        """
+        Recorded crowd levels for a time range, in the generate_historical_panel layout
+        Args:
+            start, end: Time range (default: the whole recording)
+            locations: List of location dicts or a LocationRegistry (default: all recorded zones)
+        Returns:
+            (timestamps, levels) with levels a float32 (locations x time) array
+        """
+        first, last = 0, self.n_steps
+        if start is not None:
+            first = int(np.clip((_seconds(start) - self.start_seconds) // self.step_seconds, 0, self.n_steps))
+        if end is not None:
+            last = int(np.clip(-(-(_seconds(end) - self.start_seconds) // self.step_seconds), first, self.n_steps))
+        columns = self._columns(locations)
+
+        counts = self.counts[first:last]
+        capacity = self.registry.capacity
+        if columns is not None:
+            counts = counts[:, columns]
+            capacity = capacity[columns]
+
+        timestamps = pd.to_datetime(
+            self.start_seconds + np.arange(first, last) * self.step_seconds, unit='s'
+        )
+        levels = np.clip(counts.T / capacity[:, None], 0, 1).astype(np.float32)
+        return timestamps, levels
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m data.replay <data.csv> <recording_dir>")
+        sys.exit(1)
+
+    from data.generate_training_data_v2 import FACILITIES
+
+    convert_csv(sys.argv[1], sys.argv[2], registry=LocationRegistry.from_facilities(FACILITIES))
+    print(f"Recording written to {sys.argv[2]}")
@@ -1,16 +1,119 @@
 """
 Data simulator for generating realistic crowd levels and historical data
 """
+import asyncio
+import time
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from data.locations import UF_LOCATIONS
+from data.location_registry import CATEGORIES, LocationRegistry
+from data.random_streams import ANOMALY_STREAM, NOISE_STREAM, location_generator, standard_normal, time_buckets
+from data.timeseries_store import get_timeseries_store
 
-class CrowdDataSimulator:
-    def __init__(self, seed=42):
-        np.random.seed(seed)
+# Weekend multipliers applied to the base daily pattern, by category
+WEEKEND_FACTORS = {
+    'ACADEMIC': 0.6,
+    'LIBRARIES': 0.6,
+    'GYMS': 1.2,
+    'DINING': 1.2,
+    'OUTDOORS': 1.2,
+    'AQUATICS': 1.3
+}
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Standard deviation of the crowd level noise
+NOISE_SCALE = 0.05
+
+# Ground-truth labels returned by inject_anomalies
+NORMAL, SPIKE, DROP, PLATEAU = 0, 1, 2, 3
+ANOMALY_LABELS = {NORMAL: 'normal', SPIKE: 'spike', DROP: 'drop', PLATEAU: 'plateau'}
+
+
+def _minute_of_week(timestamps):
+    """
+    Minute-of-week (0 = Monday 00:00) for each entry of a DatetimeIndex
+    Computed from whole minutes since the epoch, which is much cheaper than
+    the .hour/.minute/.weekday accessors on long indexes
+    """
+    total_minutes = np.asarray(timestamps, dtype='datetime64[m]').astype(np.int64)
+    # 1970-01-01 was a Thursday, three days after the start of the week
+    return (total_minutes + 3 * MINUTES_PER_DAY) % MINUTES_PER_WEEK
+
+
+def panel_frame(timestamps, levels, location):
+    """
+    DataFrame view of one location's row of a history panel, with the same
+    columns as generate_historical_data (for charts)
+    """
+    crowd_levels = np.asarray(levels, dtype=np.float64)
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'headcount': (crowd_levels * location['capacity']).astype(int),
+        'crowd_level': crowd_levels,
+        'capacity': np.full(len(timestamps), location['capacity'])
+    })
+
+
+class SnapshotStream:
+    """
+    Tick-driven snapshot streaming shared by snapshot sources
+    Subclasses provide snapshot(at) and _tick_times(tick_seconds, acceleration, start).
+    """
+
+    def stream(self, tick_seconds=1.0, acceleration=1.0, start=None, max_ticks=None, realtime=True):
+        """
+        Generator of snapshots for all locations at a fixed tick rate
+        Args:
+            tick_seconds: Wall-clock seconds between ticks
+            acceleration: Simulated seconds per wall-clock second (60 = one minute per second)
+            start: Simulated start time (default: now for the simulator, the first reading for a replay)
+            max_ticks: Stop after this many snapshots (default: until the source runs out)
+            realtime: Sleep between ticks; False yields as fast as the consumer pulls
+        Yields:
+            Snapshot dicts as returned by snapshot()
+        """
+        next_tick = time.monotonic()
+        for tick, at in enumerate(self._tick_times(tick_seconds, acceleration, start)):
+            if max_ticks is not None and tick >= max_ticks:
+                return
+            if realtime:
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_tick += tick_seconds
+            yield self.snapshot(at)
+
+    async def astream(self, tick_seconds=1.0, acceleration=1.0, start=None, max_ticks=None, realtime=True):
+        """Async iterator version of stream() (sleeps with asyncio instead of blocking)"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        for tick, at in enumerate(self._tick_times(tick_seconds, acceleration, start)):
+            if max_ticks is not None and tick >= max_ticks:
+                return
+            if realtime:
+                delay = next_tick - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_tick += tick_seconds
+            yield self.snapshot(at)
+
+
+class CrowdDataSimulator(SnapshotStream):
+    def __init__(self, seed=42, store=None):
+        # Noise is keyed by (seed, location_id, time bucket) rather than drawn from the
+        # global NumPy state, so the same location at the same minute always gets the
+        # same value regardless of call order, session or process
+        self.seed = seed
         self.locations = UF_LOCATIONS
         self.base_patterns = self._generate_base_patterns()
+        self._weekly_profiles = {}
+        self._category_profile_matrix = None
+        self.registry = LocationRegistry.from_locations(self.locations)
+        # Recent readings are shared process-wide unless a store is given
+        self.store = store if store is not None else get_timeseries_store()
 
     def _generate_base_patterns(self):
         """Generate base daily patterns for each location category"""
@@ -21,7 +124,8 @@ class CrowdDataSimulator:
             'ACADEMIC': self._academic_pattern(),
             'HOUSING': self._housing_pattern(),
             'STUDY SPOTS': self._study_pattern(),
-            'OUTDOORS': self._outdoor_pattern()
+            'OUTDOORS': self._outdoor_pattern(),
+            'AQUATICS': self._aquatics_pattern()
         }
         return patterns
 
@@ -88,27 +192,53 @@ class CrowdDataSimulator:
         pattern[17:19] = 0.5  # Early evening
         return pattern
 
-    def get_current_crowd(self, location):
-        """Get current crowd level for a location"""
-        current_hour = datetime.now().hour
-        current_minute = datetime.now().minute
+    def _aquatics_pattern(self):
+        """Pool pattern (lap swim mornings, busiest in the afternoon)"""
+        pattern = np.zeros(24)
+        pattern[6:9] = 0.3  # Morning lap swim
+        pattern[9:12] = 0.15  # Late morning
+        pattern[12:18] = 0.45  # Afternoon swimming
+        pattern[18:21] = 0.25  # Evening
+        return pattern
 
-        # Get base pattern for this location's category
-        base_pattern = self.base_patterns.get(location['category'], np.zeros(24))
+    def _noise(self, location_ids, timestamps, stream=NOISE_STREAM):
+        """Deterministic (locations x timestamps) noise array with standard deviation NOISE_SCALE"""
+        return NOISE_SCALE * standard_normal(self.seed, location_ids, time_buckets(timestamps), stream)
 
-        # Interpolate between hours
-        hour_value = base_pattern[current_hour]
-        next_hour = (current_hour + 1) % 24
-        next_hour_value = base_pattern[next_hour]
-        interpolated = hour_value + (next_hour_value - hour_value) * (current_minute / 60)
+    def _synthetic_levels(self, location, timestamps):
+        """Crowd levels (expected pattern plus deterministic noise) for one location"""
+        expected = self._weekly_profile(location['category'])[_minute_of_week(timestamps)]
+        noise = self._noise([location['id']], timestamps)[0]
+        return np.clip(expected + noise, 0, 1)
+
+    def _record_reading(self, location, timestamp, crowd_level):
+        """Append a reading to the ring-buffer store, backfilling any missed steps first"""
+        step = int(self.store.step_of(timestamp))
+        last_step = self.store.last_step(location['id'])
+
+        # Steps with no live reading are filled from the synthetic history
+        first_missing = step - self.store.window + 1 if last_step is None else last_step + 1
+        first_missing = max(first_missing, step - self.store.window + 1)
+        if first_missing < step:
+            missing_steps = np.arange(first_missing, step)
+            backfill = self._synthetic_levels(location, self.store.step_timestamps(missing_steps))
+            self.store.extend(location['id'], first_missing, backfill)
+
+        self.store.append(location['id'], timestamp, crowd_level)
 
-        # Add random noise
-        noise = np.random.normal(0, 0.05)
-        crowd_level = np.clip(interpolated + noise, 0, 1)
+    def get_current_crowd(self, location):
+        """Get current crowd level for a location"""
+        now = datetime.now()
+
+        # Base pattern for this location's category, interpolated, with noise
+        crowd_level = float(self._synthetic_levels(location, [now])[0])
 
         # Scale to location capacity
         headcount = int(crowd_level * location['capacity'])
 
+        # Keep the process-wide recent history up to date
+        self._record_reading(location, now, crowd_level)
+
         return {
             'location_id': location['id'],
             'location_name': location['name'],
@@ -116,71 +246,189 @@ class CrowdDataSimulator:
             'capacity': location['capacity'],
             'crowd_level': crowd_level,
             'percentage': int(crowd_level * 100),
-            'timestamp': datetime.now()
+            'timestamp': now
         }
 
+    def recent_levels(self, location, n=12):
+        """
+        Last n readings for a location from the ring-buffer store (oldest first)
+        Records a current reading first if the store has nothing for the current step.
+        Returns a read-only view; no history is regenerated.
+        """
+        if self.store.last_step(location['id']) != int(self.store.step_of(datetime.now())):
+            self.get_current_crowd(location)
+        return self.store.tail(location['id'], n)
+
     def get_all_current_crowds(self):
         """Get current crowd levels for all locations"""
-        return [self.get_current_crowd(loc) for loc in self.locations]
+        now = datetime.now()
+        crowd_levels = self._snapshot_levels(self.registry, now).tolist()
+
+        crowds = []
+        for location, crowd_level in zip(self.locations, crowd_levels):
+            self._record_reading(location, now, crowd_level)
+            crowds.append({
+                'location_id': location['id'],
+                'location_name': location['name'],
+                'headcount': int(crowd_level * location['capacity']),
+                'capacity': location['capacity'],
+                'crowd_level': crowd_level,
+                'percentage': int(crowd_level * 100),
+                'timestamp': now
+            })
+        return crowds
+
+    def _expected_levels(self, category, hours, minutes, weekdays):
+        """
+        Expected (noise-free) crowd levels for arrays of time components
+        Args:
+            category: Location category
+            hours, minutes, weekdays: Integer arrays of equal length
+        Returns:
+            Float array of interpolated levels with day-of-week variation applied
+        """
+        base_pattern = self.base_patterns.get(category, np.zeros(24))
+
+        # Interpolate between hours
+        hour_values = base_pattern[hours]
+        next_hour_values = base_pattern[(hours + 1) % 24]
+        interpolated = hour_values + (next_hour_values - hour_values) * (minutes / 60)
+
+        # Day-of-week variation
+        weekend_factor = WEEKEND_FACTORS.get(category, 1.0)
+        day_factor = np.where(weekdays >= 5, weekend_factor, 1.0)
+
+        return interpolated * day_factor
+
+    def _weekly_profile(self, category):
+        """Expected crowd level for every minute of the week (cached per category)"""
+        if category not in self._weekly_profiles:
+            minutes_of_week = np.arange(MINUTES_PER_WEEK)
+            self._weekly_profiles[category] = self._expected_levels(
+                category,
+                (minutes_of_week // 60) % 24,
+                minutes_of_week % 60,
+                minutes_of_week // MINUTES_PER_DAY
+            )
+        return self._weekly_profiles[category]
 
     def generate_historical_data(self, location, days=7, interval_minutes=10):
         """Generate historical crowd data for a location"""
-        end_time = datetime.now()
+        end_time = end_time if end_time is not None else datetime.now()
         start_time = end_time - timedelta(days=days)
 
-        # Generate timestamps
-        timestamps = []
-        current = start_time
-        while current <= end_time:
-            timestamps.append(current)
-            current += timedelta(minutes=interval_minutes)
-
-        # Generate crowd levels
-        data = []
-        base_pattern = self.base_patterns.get(location['category'], np.zeros(24))
-
-        for ts in timestamps:
-            hour = ts.hour
-            minute = ts.minute
-
-            # Interpolate
-            hour_value = base_pattern[hour]
-            next_hour = (hour + 1) % 24
-            next_hour_value = base_pattern[next_hour]
-            interpolated = hour_value + (next_hour_value - hour_value) * (minute / 60)
-
-            # Add noise and day-of-week variation
-            day_factor = 1.0
-            if ts.weekday() >= 5:  # Weekend
-                if location['category'] in ['ACADEMIC', 'LIBRARIES']:
-                    day_factor = 0.6
-                elif location['category'] in ['GYMS', 'DINING', 'OUTDOORS']:
-                    day_factor = 1.2
-
-            noise = np.random.normal(0, 0.05)
-            crowd_level = np.clip((interpolated * day_factor) + noise, 0, 1)
-            headcount = int(crowd_level * location['capacity'])
-
-            data.append({
-                'timestamp': ts,
-                'headcount': headcount,
-                'crowd_level': crowd_level,
-                'capacity': location['capacity']
-            })
+        # Generate timestamps (start and end inclusive)
+        timestamps = pd.date_range(start=start_time, end=end_time, freq=f'{interval_minutes}min')
+
+        # Generate crowd levels for all timestamps at once
+        crowd_levels = self._synthetic_levels(location, timestamps)
+        headcounts = (crowd_levels * location['capacity']).astype(int)
+
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'headcount': headcounts,
+            'crowd_level': crowd_levels,
+            'capacity': np.full(len(timestamps), location['capacity'])
+        })
+
+    def _category_profiles(self):
+        """
+        Weekly profiles stacked by category code (see data.location_registry.CATEGORIES)
+        The extra last row is all zeros, so unknown categories (code -1) index it.
+        """
+        if self._category_profile_matrix is None:
+            self._category_profile_matrix = np.stack(
+                [self._weekly_profile(category) for category in CATEGORIES] + [np.zeros(MINUTES_PER_WEEK)]
+            )
+        return self._category_profile_matrix
+
+    def _as_registry(self, locations):
+        """LocationRegistry for a registry, a list of location dicts, or None (all locations)"""
+        if locations is None or locations is self.locations:
+            return self.registry
+        if isinstance(locations, LocationRegistry):
+            return locations
+        return LocationRegistry.from_locations(locations)
+
+    def generate_historical_panel(self, locations, days=7, interval_minutes=10, end_time=None):
+        """
+        Generate historical crowd levels for many locations in one pass
+        Args:
+            locations: List of location dicts or a LocationRegistry
+            days: Number of days of history
+            interval_minutes: Spacing between readings
+            end_time: Time of the last reading (default: now); pass a step start to get
+                      the ring-buffer store's timeline
+        Returns:
+            (timestamps, levels) where timestamps is a DatetimeIndex shared by all
+            locations and levels is a float32 array of shape (len(locations), len(timestamps)).
+            Row i belongs to locations[i]; slices such as levels[i, -12:] are views.
+        """
+        end_time = end_time if end_time is not None else datetime.now()
+        start_time = end_time - timedelta(days=days)
+        timestamps = pd.date_range(start=start_time, end=end_time, freq=f'{interval_minutes}min')
+
+        if len(locations) == 0:
+            return timestamps, np.zeros((0, len(timestamps)), dtype=np.float32)
+
+        registry = self._as_registry(locations)
+        expected = self._category_profiles()[registry.category_codes[:, None], _minute_of_week(timestamps)[None, :]]
+        noise = self._noise(registry.ids, timestamps)
+        levels = np.clip(expected + noise, 0, 1).astype(np.float32)
+
+        return timestamps, levels
+
+    def _snapshot_levels(self, registry, at):
+        """Float64 crowd levels for every row of a registry at one instant"""
+        expected = self._category_profiles()[registry.category_codes, _minute_of_week([at])[0]]
+        return np.clip(expected + self._noise(registry.ids, [at])[:, 0], 0, 1)
+
+    def snapshot(self, at=None, locations=None):
+        """
+        Crowd levels for many locations at one instant, computed in one vectorized pass
+        Args:
+            at: Timestamp of the snapshot (default: now)
+            locations: List of location dicts or a LocationRegistry (default: all simulator locations)
+        Returns:
+            Dict with 'timestamp' and per-location arrays 'location_ids',
+            'crowd_level' (float32), 'headcount' and 'capacity'
+        """
+        at = at if at is not None else datetime.now()
+        registry = self._as_registry(locations)
+        crowd_levels = self._snapshot_levels(registry, at).astype(np.float32)
+
+        return {
+            'timestamp': at,
+            'location_ids': registry.ids,
+            'crowd_level': crowd_levels,
+            'headcount': (crowd_levels * registry.capacity).astype(np.int64),
+            'capacity': registry.capacity
+        }
 
-        return pd.DataFrame(data)
+    def _tick_times(self, tick_seconds, acceleration, start):
+        """Simulated timestamps for successive ticks"""
+        simulated_step = timedelta(seconds=tick_seconds * acceleration)
+        current = start if start is not None else datetime.now()
+        while True:
+            yield current
+            current += simulated_step
 
     def inject_anomaly(self, location, probability=0.05):
         """Randomly inject an anomaly into current crowd data"""
-        if np.random.random() < probability:
+        normal_crowd = self.get_current_crowd(location)
+
+        # Anomaly draws come from their own stream keyed by location and minute
+        bucket = time_buckets([normal_crowd['timestamp']])[0]
+        rng = location_generator(self.seed, location['id'], bucket, ANOMALY_STREAM)
+
+        if rng.random() < probability:
             # Create spike or drop
-            anomaly_type = np.random.choice(['spike', 'drop'])
-            normal_crowd = self.get_current_crowd(location)
+            anomaly_type = rng.choice(['spike', 'drop'])
 
             if anomaly_type == 'spike':
-                factor = np.random.uniform(1.5, 2.5)
+                factor = rng.uniform(1.5, 2.5)
             else:
-                factor = np.random.uniform(0.2, 0.5)
+                factor = rng.uniform(0.2, 0.5)
 
             anomalous_headcount = int(normal_crowd['headcount'] * factor)
             anomalous_headcount = np.clip(anomalous_headcount, 0, location['capacity'])
@@ -192,6 +440,67 @@ class CrowdDataSimulator:
 
             return normal_crowd
         else:
-            crowd = self.get_current_crowd(location)
-            crowd['is_anomaly'] = False
-            return crowd
+            normal_crowd['is_anomaly'] = False
+            return normal_crowd
+
+    def inject_anomalies(self, levels, spike_rate=0.002, drop_rate=0.002, plateau_rate=0.001,
+                         min_duration=1, max_duration=6, seed=None):
+        """
+        Inject labelled anomalies into a history panel in one vectorized pass
+        Args:
+            levels: (locations x time) array, e.g. from generate_historical_panel (not modified)
+            spike_rate, drop_rate, plateau_rate: Probability that an anomaly of that
+                type starts at any given reading
+            min_duration, max_duration: Anomaly length in readings (inclusive range)
+            seed: Seed for the anomaly draws (default: the simulator seed)
+        Returns:
+            (anomalous_levels, labels) where anomalous_levels is a float32 copy of levels
+            and labels is an int8 array of the same shape holding NORMAL, SPIKE, DROP or PLATEAU.
+            Spikes multiply levels by 1.5-2.5, drops by 0.2-0.5, and plateaus hold the level
+            from the anomaly's first reading (a stuck sensor).
+        """
+        rng = np.random.Generator(np.random.Philox(self.seed if seed is None else seed))
+        levels = np.asarray(levels, dtype=np.float32)
+        n_locations, n_steps = levels.shape
+
+        anomalous = levels.copy()
+        labels = np.zeros(levels.shape, dtype=np.int8)
+
+        flat_anomalous = anomalous.reshape(-1)
+        flat_labels = labels.reshape(-1)
+        flat_original = levels.reshape(-1)
+        positions = np.arange(flat_anomalous.size)
+        step_of_position = positions % n_steps
+
+        for label, rate in ((PLATEAU, plateau_rate), (DROP, drop_rate), (SPIKE, spike_rate)):
+            starts = np.flatnonzero(rng.random(flat_anomalous.size) < rate)
+            if len(starts) == 0:
+                continue
+
+            # Clip each event at the end of its location's row
+            durations = rng.integers(min_duration, max_duration + 1, size=len(starts))
+            ends = np.minimum(starts + durations, starts - step_of_position[starts] + n_steps)
+
+            # Coverage from a difference array: +1 at each start, -1 at each end
+            coverage = np.zeros(flat_anomalous.size + 1, dtype=np.int32)
+            np.add.at(coverage, starts, 1)
+            np.add.at(coverage, ends, -1)
+            covered = np.cumsum(coverage[:-1]) > 0
+
+            # Index of the event covering each reading (the latest start at or before it)
+            event_start = np.zeros(flat_anomalous.size, dtype=np.int64)
+            event_start[starts] = starts
+            event_start = np.maximum.accumulate(event_start)
+
+            if label == PLATEAU:
+                flat_anomalous[covered] = flat_original[event_start[covered]]
+            else:
+                low, high = (1.5, 2.5) if label == SPIKE else (0.2, 0.5)
+                factors = np.ones(flat_anomalous.size, dtype=np.float32)
+                factors[starts] = rng.uniform(low, high, size=len(starts))
+                flat_anomalous[covered] = np.clip(flat_original[covered] * factors[event_start[covered]], 0, 1)
+
+            # Later types take precedence where events overlap
+            flat_labels[covered] = label
+
+        return anomalous, labels
@@ -0,0 +1,191 @@
+"""
+Shared current-crowd snapshot cache
+Computes one campus snapshot per time bucket for the whole process and hands
+every Streamlit session the same immutable result. Recent history panels are
+shared the same way, one per ring-buffer step.
+"""
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+
+import pandas as pd
+
+from data.simulator import CrowdDataSimulator
+
+# Record hit/miss counts when Prometheus metrics are available
+try:
+    from monitoring.prometheus_metrics import MetricsCollector
+    PROMETHEUS_ENABLED = True
+except ImportError:
+    PROMETHEUS_ENABLED = False
+
+DEFAULT_BUCKET_SECONDS = 60
+
+
+class SnapshotProvider:
+    """Process-wide, time-bucketed cache of get_all_current_crowds()"""
+
+    def __init__(self, simulator=None, bucket_seconds=DEFAULT_BUCKET_SECONDS, cache_type='crowd_snapshot'):
+        """
+        Initialize snapshot provider
+        Args:
+            simulator: CrowdDataSimulator to read from (default: a new one)
+            bucket_seconds: Snapshot lifetime; all requests in one bucket share a snapshot
+            cache_type: Label used for the Prometheus cache counters
+        """
+        self.simulator = simulator if simulator is not None else CrowdDataSimulator()
+        self.bucket_seconds = bucket_seconds
+        self.cache_type = cache_type
+
+        self.hits = 0
+        self.misses = 0
+
+        self._bucket = None
+        self._crowds = ()
+        self._by_id = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def _current_bucket(self):
+        return int(time.time() // self.bucket_seconds)
+
+    def _record(self, hit):
+        """Count a cache access. Caller holds the lock."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if PROMETHEUS_ENABLED:
+            MetricsCollector.record_cache_access(self.cache_type, hit)
+
+    def get_all_current_crowds(self):
+        """
+        Current crowd levels for all locations
+        Returns:
+            Tuple of read-only crowd dicts, shared by every caller in the same bucket
+        """
+        bucket = self._current_bucket()
+        if self._bucket == bucket:
+            crowds = self._crowds
+            with self._lock:
+                self._record(hit=True)
+            return crowds
+
+        with self._lock:
+            # Another session may have refreshed while we waited for the lock
+            if self._bucket == bucket:
+                self._record(hit=True)
+                return self._crowds
+
+            crowds = tuple(MappingProxyType(crowd) for crowd in self.simulator.get_all_current_crowds())
+            self._by_id = MappingProxyType({crowd['location_id']: crowd for crowd in crowds})
+            self._crowds = crowds
+            self._bucket = bucket
+            self._record(hit=False)
+            return crowds
+
+    def get_crowd(self, location_id):
+        """Read-only crowd dict for one location from the current snapshot (None if unknown)"""
+        self.get_all_current_crowds()
+        return self._by_id.get(location_id)
+
+    def invalidate(self):
+        """Force the next request to compute a fresh snapshot"""
+        with self._lock:
+            self._bucket = None
+
+
+class HistoryPanelProvider:
+    """
+    Process-wide cache of a recent history panel for all simulator locations
+    The panel ends at the start of the current ring-buffer step, so chart history and
+    model inputs sliced from it share the store's step-aligned timeline. It is rebuilt
+    once per step.
+    """
+
+    def __init__(self, simulator=None, days=1, cache_type='history_panel'):
+        """
+        Initialize history panel provider
+        Args:
+            simulator: CrowdDataSimulator to read from (default: a new one)
+            days: Days of history in the panel
+            cache_type: Label used for the Prometheus cache counters
+        """
+        self.simulator = simulator if simulator is not None else CrowdDataSimulator()
+        self.days = days
+        self.cache_type = cache_type
+
+        self.hits = 0
+        self.misses = 0
+
+        self._step = None
+        self._panel = None
+        self._lock = threading.Lock()
+
+    def _record(self, hit):
+        """Count a cache access. Caller holds the lock."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if PROMETHEUS_ENABLED:
+            MetricsCollector.record_cache_access(self.cache_type, hit)
+
+    def get_panel(self, locations):
+        """
+        Step-aligned history for some locations
+        Args:
+            locations: List of location dicts known to the simulator
+        Returns:
+            (timestamps, levels) as from generate_historical_panel, with levels[i] belonging
+            to locations[i] and the last column at the current step
+        """
+        store = self.simulator.store
+        step = int(store.step_of(datetime.now()))
+
+        with self._lock:
+            if self._step == step:
+                self._record(hit=True)
+            else:
+                end_time = pd.Timestamp(store.step_timestamps(step))
+                timestamps, levels = self.simulator.generate_historical_panel(
+                    self.simulator.registry, days=self.days, interval_minutes=store.step_minutes, end_time=end_time
+                )
+                levels.setflags(write=False)
+                self._panel = (timestamps, levels)
+                self._step = step
+                self._record(hit=False)
+            timestamps, levels = self._panel
+
+        location_ids = [location['id'] for location in locations]
+        rows = self.simulator.registry.indices_of(location_ids)
+        if (rows < 0).any():
+            raise KeyError(f"Unknown locations: {[i for i, row in zip(location_ids, rows) if row < 0]}")
+        return timestamps, levels[rows]
+
+
+# Global instance
+_snapshot_provider = None
+_snapshot_provider_lock = threading.Lock()
+
+def get_snapshot_provider() -> SnapshotProvider:
+    """Get process-wide snapshot provider instance"""
+    global _snapshot_provider
+    if _snapshot_provider is None:
+        with _snapshot_provider_lock:
+            if _snapshot_provider is None:
+                _snapshot_provider = SnapshotProvider()
+    return _snapshot_provider
+
+
+_history_panel_provider = None
+_history_panel_provider_lock = threading.Lock()
+
+def get_history_panel_provider() -> HistoryPanelProvider:
+    """Get process-wide history panel provider instance"""
+    global _history_panel_provider
+    if _history_panel_provider is None:
+        with _history_panel_provider_lock:
+            if _history_panel_provider is None:
+                _history_panel_provider = HistoryPanelProvider()
+    return _history_panel_provider
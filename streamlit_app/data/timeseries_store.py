@@ -0,0 +1,149 @@
+"""
+In-memory ring-buffer store for recent crowd readings
+Keeps a fixed window of readings per location at a fixed step so forecasters
+and anomaly detectors can read the last few readings without regenerating history
+"""
+import threading
+import numpy as np
+
+# Default window: 7 days at 10-minute steps
+DEFAULT_STEP_MINUTES = 10
+DEFAULT_WINDOW = 7 * 24 * 60 // DEFAULT_STEP_MINUTES
+
+
+class RingBufferStore:
+    """Preallocated per-location ring buffers of crowd levels"""
+
+    def __init__(self, window=DEFAULT_WINDOW, step_minutes=DEFAULT_STEP_MINUTES):
+        """
+        Initialize ring-buffer store
+        Args:
+            window: Number of readings kept per location
+            step_minutes: Width of one step; readings in the same step overwrite each other
+        """
+        self.window = window
+        self.step_minutes = step_minutes
+        self.step_seconds = step_minutes * 60
+
+        # Each buffer holds every value twice (at i and i + window) so the last n
+        # readings are always one contiguous slice, even after wrapping around
+        self._buffers = {}
+        self._next_index = {}
+        self._counts = {}
+        self._last_steps = {}
+        self._lock = threading.Lock()
+
+    def step_of(self, timestamp):
+        """Integer step index for a timestamp"""
+        seconds = np.asarray(timestamp, dtype='datetime64[s]').astype(np.int64)
+        return seconds // self.step_seconds
+
+    def step_timestamps(self, steps):
+        """Start timestamp of each step index"""
+        return (np.asarray(steps, dtype=np.int64) * self.step_seconds).astype('datetime64[s]')
+
+    def _buffer(self, location_id):
+        """Get (or allocate) the buffer for a location. Caller holds the lock."""
+        if location_id not in self._buffers:
+            self._buffers[location_id] = np.zeros(2 * self.window, dtype=np.float32)
+            self._next_index[location_id] = 0
+            self._counts[location_id] = 0
+        return self._buffers[location_id]
+
+    def append(self, location_id, timestamp, value):
+        """
+        Record one reading
+        A reading in the same step as the latest one replaces it; readings older
+        than the latest step are ignored.
+        """
+        step = int(self.step_of(timestamp))
+
+        with self._lock:
+            buffer = self._buffer(location_id)
+            last_step = self._last_steps.get(location_id)
+
+            if last_step is not None and step < last_step:
+                return
+
+            index = self._next_index[location_id]
+            if last_step is not None and step == last_step:
+                # Overwrite the latest slot
+                index = (index - 1) % self.window
+            else:
+                self._next_index[location_id] = (index + 1) % self.window
+                self._counts[location_id] = min(self._counts[location_id] + 1, self.window)
+
+            buffer[index] = value
+            buffer[index + self.window] = value
+            self._last_steps[location_id] = step
+
+    def extend(self, location_id, first_step, values):
+        """
+        Record consecutive readings starting at first_step (used to backfill)
+        Steps at or before the latest recorded step are skipped.
+        """
+        values = np.asarray(values, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            buffer = self._buffer(location_id)
+            last_step = self._last_steps.get(location_id)
+
+            if last_step is not None and first_step <= last_step:
+                values = values[last_step - first_step + 1:]
+                first_step = last_step + 1
+            if len(values) == 0:
+                return
+
+            new_last_step = first_step + len(values) - 1
+            values = values[-self.window:]
+
+            indices = (self._next_index[location_id] + np.arange(len(values))) % self.window
+            buffer[indices] = values
+            buffer[indices + self.window] = values
+
+            self._next_index[location_id] = (self._next_index[location_id] + len(values)) % self.window
+            self._counts[location_id] = min(self._counts[location_id] + len(values), self.window)
+            self._last_steps[location_id] = new_last_step
+
+    def tail(self, location_id, n):
+        """
+        Last n readings for a location, oldest first, as a read-only view (O(1), no copy)
+        Returns fewer than n readings if fewer have been recorded. The view tracks
+        the underlying buffer, so copy it if it must survive later appends.
+        """
+        with self._lock:
+            if location_id not in self._buffers:
+                return np.zeros(0, dtype=np.float32)
+
+            n = min(n, self._counts[location_id])
+            end = self._next_index[location_id] + self.window
+            view = self._buffers[location_id][end - n:end]
+
+        view.flags.writeable = False
+        return view
+
+    def last_step(self, location_id):
+        """Step index of the latest reading for a location (None if empty)"""
+        return self._last_steps.get(location_id)
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def clear(self):
+        """Drop all readings"""
+        with self._lock:
+            self._buffers.clear()
+            self._next_index.clear()
+            self._counts.clear()
+            self._last_steps.clear()
+
+
+# Global instance
+_timeseries_store = None
+
+def get_timeseries_store() -> RingBufferStore:
+    """Get process-wide ring-buffer store instance"""
+    global _timeseries_store
+    if _timeseries_store is None:
+        _timeseries_store = RingBufferStore()
+    return _timeseries_store
@@ -1,12 +1,66 @@
 """
-Autoencoder-based anomaly detector for crowd patterns
+Autoencoder-based anomaly detectors for crowd patterns
+AnomalyDetector scores each location on its own; CampusAnomalyDetector scores
+the whole campus (all locations together) in one pass.
 """
+import pickle
 import torch
 import torch.nn as nn
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 import os
 
+from models.windowing import series_boundaries, sliding_windows, window_starts
+
+HOURS_PER_WEEK = 168
+
+
+def _group_quantiles(values, groups, n_groups, quantile):
+    """
+    Linearly interpolated quantile of non-negative values within each group, in one sort
+    Each (group, value) pair is packed into one uint64 key (group in the high bits,
+    the float32 bit pattern, which orders like the value when non-negative, in the low
+    bits), so a single plain sort orders values within groups.
+    Returns:
+        (quantiles, counts) arrays of length n_groups (NaN quantile for empty groups)
+    """
+    keys = np.asarray(values, dtype=np.float32).view(np.uint32).astype(np.uint64)
+    keys |= np.asarray(groups, dtype=np.uint64) << np.uint64(32)
+    keys.sort()
+    sorted_values = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32).view(np.float32).astype(np.float64)
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+
+    position = starts + quantile * np.maximum(counts - 1, 0)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, starts + np.maximum(counts - 1, 0))
+    fraction = position - low
+
+    quantiles = np.full(n_groups, np.nan)
+    has_data = counts > 0
+    quantiles[has_data] = (
+        sorted_values[low[has_data]] * (1 - fraction[has_data]) + sorted_values[high[has_data]] * fraction[has_data]
+    )
+    return quantiles, counts
+
+
+def _load_legacy_checkpoint(path):
+    """
+    Read a checkpoint that pickles a sklearn StandardScaler (the format before plain
+    standardization tensors) and convert it to the current layout. Needs scikit-learn.
+    """
+    checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=False)
+    scaler = checkpoint.pop('scaler')
+    checkpoint['scaler_mean'] = torch.tensor(scaler.mean_, dtype=torch.float64)
+    checkpoint['scaler_scale'] = torch.tensor(scaler.scale_, dtype=torch.float64)
+    return checkpoint
+
+
+def hour_of_week(timestamps):
+    """Hour of the week (0 = Monday 00:00) for a timestamp or array of timestamps"""
+    hours = np.asarray(timestamps, dtype='datetime64[h]').astype(np.int64)
+    # 1970-01-01 was a Thursday, 72 hours after the start of its week
+    return (hours + 72) % HOURS_PER_WEEK
+
 class Autoencoder(nn.Module):
     def __init__(self, input_size=12, encoding_dim=4):
         super(Autoencoder, self).__init__()
@@ -45,19 +99,28 @@ class AnomalyDetector:
         self.window_size = window_size
         self.threshold = threshold
         self.model = Autoencoder(input_size=window_size, encoding_dim=4)
-        self.scaler = StandardScaler()
+        # Per-position standardization of windows: scaled = (window - scaler_mean) / scaler_scale
+        self.scaler_mean = np.zeros(window_size)
+        self.scaler_scale = np.ones(window_size)
         self.is_trained = False
 
+        # Calibrated threshold table (see calibrate): one row per location id, plus a
+        # last row with the all-location thresholds used for unknown locations
+        self.threshold_location_ids = None
+        self.location_thresholds = None
+        self.hour_thresholds = None
+
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
 
-    def prepare_windows(self, data):
-        """Prepare sliding windows from time series data"""
-        windows = []
-        for i in range(len(data) - self.window_size + 1):
-            window = data[i:i + self.window_size]
-            windows.append(window)
-        return np.array(windows)
+    def prepare_windows(self, data, boundaries=None):
+        """
+        Prepare sliding windows from time series data
+        Args:
+            data: 1-D series of crowd levels
+            boundaries: Series start offsets (see series_boundaries) for concatenated histories
+        """
+        return sliding_windows(data, self.window_size, boundaries)
 
     def train(self, historical_data, epochs=100, lr=0.001):
         """
@@ -70,15 +133,18 @@ class AnomalyDetector:
         # Extract crowd levels
         crowd_levels = historical_data['crowd_level'].values
 
-        # Create windows
-        windows = self.prepare_windows(crowd_levels)
+        # Create windows (never spanning two locations of a concatenated history)
+        windows = self.prepare_windows(crowd_levels, series_boundaries(historical_data))
 
         if len(windows) == 0:
             print("Not enough data to train")
             return
 
-        # Normalize
-        windows_scaled = self.scaler.fit_transform(windows)
+        # Standardize each window position (constant positions keep a unit scale)
+        self.scaler_mean = windows.mean(axis=0)
+        std = windows.std(axis=0)
+        self.scaler_scale = np.where(std > 0, std, 1.0)
+        windows_scaled = (windows - self.scaler_mean) / self.scaler_scale
 
         # Convert to tensor
         X_tensor = torch.FloatTensor(windows_scaled)
@@ -99,14 +165,115 @@ class AnomalyDetector:
             if (epoch + 1) % 20 == 0:
                 print(f'Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.4f}')
 
+        # Thresholds calibrated for the previous weights no longer apply
+        self.threshold_location_ids = None
+        self.location_thresholds = None
+        self.hour_thresholds = None
+
         self.is_trained = True
         print("Anomaly detector training completed!")
 
-    def detect(self, recent_data):
+    def calibrate(self, historical_data, quantile=0.99, min_samples=20, batch_size=65536):
+        """
+        Set thresholds from reconstruction-error quantiles over a history
+        Runs the autoencoder over every window in batches and takes the quantile
+        of the errors per location and per location and hour of the week (hours
+        with fewer than min_samples windows use the location's threshold).
+        The all-window quantile becomes the default threshold.
+        Args:
+            historical_data: DataFrame with 'crowd_level' and optionally 'location_id'
+                             and 'timestamp' columns (normal patterns)
+            quantile: Error quantile used as threshold
+            min_samples: Windows needed for an hour-of-week threshold
+            batch_size: Windows per forward pass
+        Returns:
+            Number of windows scored
+        """
+        if not self.is_trained:
+            raise ValueError("Train or load the detector before calibrating")
+
+        crowd_levels = historical_data['crowd_level'].to_numpy(dtype=np.float64)
+        starts = window_starts(len(crowd_levels), self.window_size, series_boundaries(historical_data))
+        if len(starts) == 0:
+            print("Not enough data to calibrate")
+            return 0
+
+        # Score every window (label: its last reading) in fixed-size batches
+        windows = sliding_windows(crowd_levels, self.window_size)
+        errors = np.empty(len(starts), dtype=np.float32)
+        for i in range(0, len(starts), batch_size):
+            errors[i:i + batch_size] = self.reconstruction_errors(windows[starts[i:i + batch_size]])
+        ends = starts + self.window_size - 1
+
+        if 'location_id' in historical_data:
+            location_ids, rows = np.unique(historical_data['location_id'].to_numpy()[ends], return_inverse=True)
+        else:
+            location_ids, rows = np.zeros(0, dtype=np.int64), np.zeros(len(starts), dtype=np.int64)
+        n_locations = len(location_ids)
+
+        # Per-location thresholds, with the all-window threshold as the last row
+        location_thresholds, _ = _group_quantiles(errors, rows, n_locations, quantile)
+        overall = float(np.quantile(errors, quantile))
+        location_thresholds = np.append(location_thresholds, overall)
+
+        hour_thresholds = None
+        if 'timestamp' in historical_data:
+            hours = hour_of_week(historical_data['timestamp'].to_numpy()[ends])
+            n_rows = n_locations + 1
+            cells = np.concatenate([rows * HOURS_PER_WEEK + hours, n_locations * HOURS_PER_WEEK + hours])
+            cell_thresholds, counts = _group_quantiles(
+                np.concatenate([errors, errors]), cells, n_rows * HOURS_PER_WEEK, quantile
+            )
+            hour_thresholds = cell_thresholds.reshape(n_rows, HOURS_PER_WEEK)
+            sparse = counts.reshape(n_rows, HOURS_PER_WEEK) < min_samples
+            hour_thresholds[sparse] = np.broadcast_to(location_thresholds[:, None], hour_thresholds.shape)[sparse]
+
+        self.threshold_location_ids = location_ids.astype(np.int64)
+        self.location_thresholds = location_thresholds
+        self.hour_thresholds = hour_thresholds
+        self.threshold = overall
+
+        print(f"Calibrated thresholds for {n_locations} locations from {len(errors):,} windows "
+              f"(overall {self.threshold:.4f})")
+        return len(errors)
+
+    def threshold_rows(self, location_ids):
+        """Threshold table row for each location id (the all-location row for unknown ids)"""
+        location_ids = np.asarray(location_ids, dtype=np.int64).reshape(-1)
+        known_ids = self.threshold_location_ids
+        if len(known_ids) == 0:
+            return np.zeros(len(location_ids), dtype=np.intp)
+        positions = np.minimum(np.searchsorted(known_ids, location_ids), len(known_ids) - 1)
+        return np.where(known_ids[positions] == location_ids, positions, len(known_ids))
+
+    def thresholds_for(self, n, location_ids=None, timestamps=None):
+        """
+        Threshold for each of n windows, looked up by index in the calibrated table
+        Args:
+            n: Number of windows
+            location_ids: Location id per window (default: all-location thresholds)
+            timestamps: Time of each window's last reading, or one time for all
+                        (default: per-location thresholds without the hour of week)
+        """
+        if self.location_thresholds is None:
+            return np.full(n, self.threshold)
+
+        if location_ids is None:
+            rows = np.full(n, len(self.location_thresholds) - 1)
+        else:
+            rows = self.threshold_rows(location_ids)
+
+        if timestamps is None or self.hour_thresholds is None:
+            return self.location_thresholds[rows]
+        return self.hour_thresholds[rows, np.broadcast_to(hour_of_week(timestamps), (n,))]
+
+    def detect(self, recent_data, location_id=None, timestamp=None):
         """
         Detect if recent pattern is anomalous
         Args:
             recent_data: List or array of recent crowd levels (at least window_size points)
+            location_id: Location of the data, for its calibrated threshold (optional)
+            timestamp: Time of the last reading, for the hour-of-week threshold (optional)
         Returns:
             Dictionary with is_anomaly, reconstruction_error, and confidence
         """
@@ -114,47 +281,186 @@ class AnomalyDetector:
             # If not trained, use simple threshold-based detection
             return self._simple_detect(recent_data)
 
-        self.model.eval()
-
-        # Ensure we have enough data
-        if len(recent_data) < self.window_size:
-            # Pad with median value if needed
-            median_val = np.median(recent_data) if len(recent_data) > 0 else 0.5
-            padding = [median_val] * (self.window_size - len(recent_data))
-            recent_data = padding + list(recent_data)
+        error = float(self.reconstruction_errors(self._window_matrix([recent_data]))[0])
+        location_ids = None if location_id is None else [location_id]
+        return self._result(error, float(self.thresholds_for(1, location_ids, timestamp)[0]))
 
-        # Take last window
-        window = recent_data[-self.window_size:]
-        window_array = np.array(window).reshape(1, -1)
+    def detect_many(self, windows, location_names=None, location_ids=None, timestamps=None):
+        """
+        Detect anomalies for many recent windows at once, with explanations
+        All windows are scored in one vectorized pass (one autoencoder forward pass,
+        or the rule-based fallback on the whole batch), so explanations don't need a
+        second detect() call.
+        Args:
+            windows: Sequence of recent crowd level lists/arrays (one per location),
+                     or an (n, n_points) array
+            location_names: Names used in the explanations (default: 'this location')
+            location_ids: Location id per window, for calibrated thresholds (optional)
+            timestamps: Time of each window's last reading, or one time for all (optional)
+        Returns:
+            List of detect() result dictionaries, in input order, each also carrying
+            'mean_level', 'trend', 'pattern' and 'explanation'
+        """
+        n = len(windows)
+        if n == 0:
+            return []
+
+        if self.is_trained:
+            recent = self._ragged_matrix(windows, self.window_size)
+            errors = self.reconstruction_errors(self._fill_short(recent)).astype(np.float64)
+            thresholds = self.thresholds_for(n, location_ids, timestamps)
+            is_anomaly = errors > thresholds
+            confidence = np.where(
+                is_anomaly,
+                np.minimum((errors - thresholds) / thresholds, 1.0),
+                1.0 - errors / thresholds
+            )
+        else:
+            errors, is_anomaly, confidence, recent = self._simple_scores(self._ragged_matrix(windows))
+            thresholds = np.full(n, self.threshold)
 
-        # Normalize
-        window_scaled = self.scaler.transform(window_array)
+        severity = self._get_severities(errors, thresholds)
+        mean_level, increasing = self._window_stats(recent[:, -self.window_size:])
 
-        # Convert to tensor
-        X = torch.FloatTensor(window_scaled)
+        severity_emoji = {
+            'medium': '⚠️',
+            'high': '🚨',
+            'critical': '🔴'
+        }
 
-        # Reconstruct
+        results = []
+        for i in range(n):
+            if mean_level[i] > 0.7:
+                pattern_type = "unusually high crowd levels"
+            elif mean_level[i] < 0.3:
+                pattern_type = "unusually low crowd levels"
+            else:
+                pattern_type = f"unusual {'increasing' if increasing[i] else 'decreasing'} pattern"
+
+            if is_anomaly[i]:
+                location_name = location_names[i] if location_names is not None else 'this location'
+                emoji = severity_emoji.get(severity[i], '⚠️')
+                explanation = f"{emoji} Anomaly detected at {location_name}: {pattern_type}. "
+                explanation += f"Confidence: {confidence[i]*100:.0f}%"
+            else:
+                explanation = "Normal crowd pattern detected."
+
+            results.append({
+                'is_anomaly': bool(is_anomaly[i]),
+                'reconstruction_error': float(errors[i]),
+                'threshold': float(thresholds[i]),
+                'confidence': float(confidence[i]),
+                'severity': severity[i],
+                'mean_level': float(mean_level[i]),
+                'trend': 'increasing' if increasing[i] else 'decreasing',
+                'pattern': pattern_type,
+                'explanation': explanation
+            })
+        return results
+
+    def _ragged_matrix(self, windows, width=None):
+        """
+        Right-aligned (n, width) float matrix of the last `width` points of each window,
+        NaN where a window is shorter (width defaults to the longest window)
+        """
+        if isinstance(windows, np.ndarray) and windows.ndim == 2:
+            matrix = np.asarray(windows, dtype=np.float64)
+            if width is None or matrix.shape[1] >= width:
+                return matrix[:, -width:] if width else matrix
+            padding = np.full((len(matrix), width - matrix.shape[1]), np.nan)
+            return np.hstack([padding, matrix])
+
+        windows = [np.asarray(window, dtype=np.float64).reshape(-1) for window in windows]
+        width = width or max((len(window) for window in windows), default=0)
+        matrix = np.full((len(windows), width), np.nan)
+        for i, window in enumerate(windows):
+            window = window[len(window) - width:] if len(window) > width else window
+            if len(window):
+                matrix[i, width - len(window):] = window
+        return matrix
+
+    def _fill_short(self, matrix):
+        """Replace the NaN padding of short windows with each window's median (0.5 if empty)"""
+        missing = np.isnan(matrix)
+        if not missing.any():
+            return matrix
+        counts = (~missing).sum(axis=1)
+        medians = np.full(len(matrix), 0.5)
+        has_data = counts > 0
+        medians[has_data] = np.nanmedian(matrix[has_data], axis=1)
+        return np.where(missing, medians[:, None], matrix)
+
+    def _window_matrix(self, windows):
+        """Last window_size points of each window as one (n, window_size) array, median-padded if short"""
+        return self._fill_short(self._ragged_matrix(windows, self.window_size))
+
+    def _simple_scores(self, matrix):
+        """
+        Rule-based fallback (see _simple_detect) for a NaN-padded matrix of windows
+        Returns:
+            (errors, is_anomaly, confidence, matrix) arrays
+        """
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+        values = np.where(valid, matrix, 0.0)
+
+        mean = values.sum(axis=1) / np.maximum(counts, 1)
+        std = np.sqrt((np.where(valid, matrix - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(counts, 1))
+
+        # z-score of the last value; windows with fewer than 2 points are never anomalous
+        last = values[:, -1] if matrix.shape[1] else np.zeros(len(matrix))
+        usable = (counts >= 2) & (std > 0)
+        z_score = np.zeros(len(matrix))
+        z_score[usable] = np.abs(last[usable] - mean[usable]) / std[usable]
+
+        is_anomaly = z_score > 2.5
+        errors = z_score / 10  # Normalize to similar scale
+        confidence = np.where(is_anomaly, np.minimum(z_score / 2.5, 1.0), 0.5)
+        return errors, is_anomaly, confidence, matrix
+
+    def _window_stats(self, matrix):
+        """Mean level and whether the last point is above the first, per window (NaN padding ignored)"""
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+        mean_level = np.where(valid, matrix, 0.0).sum(axis=1) / np.maximum(counts, 1)
+
+        rows = np.arange(len(matrix))
+        first = matrix[rows, valid.argmax(axis=1)] if matrix.shape[1] else np.zeros(len(matrix))
+        last = matrix[:, -1] if matrix.shape[1] else np.zeros(len(matrix))
+        increasing = (counts > 0) & (last > first)
+        return mean_level, increasing
+
+    def reconstruction_errors(self, windows):
+        """
+        Autoencoder reconstruction error (MSE) of each row, in one forward pass
+        Args:
+            windows: (n, window_size) array of crowd levels
+        """
+        self.model.eval()
+        X = torch.from_numpy(((windows - self.scaler_mean) / self.scaler_scale).astype(np.float32))
         with torch.no_grad():
             reconstructed = self.model(X)
+        return ((reconstructed - X) ** 2).mean(dim=1).numpy()
 
-        # Calculate reconstruction error
-        error = nn.MSELoss()(reconstructed, X).item()
+    def _result(self, error, threshold=None):
+        """detect() result dictionary for one reconstruction error"""
+        threshold = self.threshold if threshold is None else threshold
 
         # Determine if anomalous
-        is_anomaly = error > self.threshold
+        is_anomaly = error > threshold
 
         # Calculate confidence (how far from threshold)
         if is_anomaly:
-            confidence = min((error - self.threshold) / self.threshold, 1.0)
+            confidence = min((error - threshold) / threshold, 1.0)
         else:
-            confidence = 1.0 - (error / self.threshold)
+            confidence = 1.0 - (error / threshold)
 
         return {
             'is_anomaly': is_anomaly,
             'reconstruction_error': error,
-            'threshold': self.threshold,
+            'threshold': threshold,
             'confidence': confidence,
-            'severity': self._get_severity(error)
+            'severity': self._get_severity(error, threshold)
         }
 
     def _simple_detect(self, recent_data):
@@ -191,65 +497,281 @@ class AnomalyDetector:
             'severity': self._get_severity(error)
         }
 
-    def _get_severity(self, error):
+    def _get_severities(self, errors, thresholds=None):
+        """_get_severity for an array of errors (and optionally per-error thresholds)"""
+        thresholds = self.threshold if thresholds is None else thresholds
+        return np.select(
+            [errors > thresholds * 3, errors > thresholds * 2, errors > thresholds],
+            ['critical', 'high', 'medium'],
+            default='normal'
+        ).tolist()
+
+    def _get_severity(self, error, threshold=None):
         """Determine severity level based on error"""
-        if error > self.threshold * 3:
+        threshold = self.threshold if threshold is None else threshold
+        if error > threshold * 3:
             return 'critical'
-        elif error > self.threshold * 2:
+        elif error > threshold * 2:
             return 'high'
-        elif error > self.threshold:
+        elif error > threshold:
             return 'medium'
         else:
             return 'normal'
 
     def get_anomaly_explanation(self, recent_data, location_name):
         """Generate human-readable explanation of anomaly"""
-        result = self.detect(recent_data)
+        return self.detect_many([recent_data], [location_name])[0]['explanation']
 
-        if not result['is_anomaly']:
-            return "Normal crowd pattern detected."
+    def save_model(self, path):
+        """Save model, standardization and calibrated thresholds (tensors only)"""
+        checkpoint = {
+            'model_state_dict': self.model.state_dict(),
+            'scaler_mean': torch.from_numpy(np.asarray(self.scaler_mean, dtype=np.float64)),
+            'scaler_scale': torch.from_numpy(np.asarray(self.scaler_scale, dtype=np.float64)),
+            'window_size': self.window_size,
+            'threshold': self.threshold
+        }
+        if self.location_thresholds is not None:
+            checkpoint['threshold_location_ids'] = torch.from_numpy(self.threshold_location_ids)
+            checkpoint['location_thresholds'] = torch.from_numpy(self.location_thresholds)
+            if self.hour_thresholds is not None:
+                checkpoint['hour_thresholds'] = torch.from_numpy(self.hour_thresholds)
+        torch.save(checkpoint, path)
+        print(f"Anomaly detector saved to {path}")
 
-        # Analyze pattern
-        recent_array = np.array(recent_data[-self.window_size:])
-        mean_level = np.mean(recent_array)
-        trend = "increasing" if recent_array[-1] > recent_array[0] else "decreasing"
+    def load_model(self, path):
+        """Load model, standardization and calibrated thresholds"""
+        try:
+            # Checkpoints hold only tensors and numbers, so the safe loader suffices
+            checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=True)
+        except pickle.UnpicklingError:
+            print(f"Legacy checkpoint format at {path}; re-save it with save_model() to convert it")
+            checkpoint = _load_legacy_checkpoint(path)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.scaler_mean = checkpoint['scaler_mean'].numpy()
+        self.scaler_scale = checkpoint['scaler_scale'].numpy()
+        self.window_size = checkpoint['window_size']
+        self.threshold = checkpoint['threshold']
 
-        severity_emoji = {
-            'medium': '⚠️',
-            'high': '🚨',
-            'critical': '🔴'
-        }
+        if 'location_thresholds' in checkpoint:
+            self.threshold_location_ids = checkpoint['threshold_location_ids'].numpy()
+            self.location_thresholds = checkpoint['location_thresholds'].numpy()
+            hour_thresholds = checkpoint.get('hour_thresholds')
+            self.hour_thresholds = hour_thresholds.numpy() if hour_thresholds is not None else None
+        self.is_trained = True
+        print(f"Anomaly detector loaded from {path}")
 
-        emoji = severity_emoji.get(result['severity'], '⚠️')
 
-        if mean_level > 0.7:
-            pattern_type = "unusually high crowd levels"
-        elif mean_level < 0.3:
-            pattern_type = "unusually low crowd levels"
-        else:
-            pattern_type = f"unusual {trend} pattern"
+class CampusAutoencoder(nn.Module):
+    """Autoencoder over the whole (locations x window) matrix, so it learns how locations move together"""
 
-        explanation = f"{emoji} Anomaly detected at {location_name}: {pattern_type}. "
-        explanation += f"Confidence: {result['confidence']*100:.0f}%"
+    def __init__(self, n_locations, window_size=12, hidden_size=128, encoding_dim=16):
+        super(CampusAutoencoder, self).__init__()
+        input_size = n_locations * window_size
 
-        return explanation
+        self.encoder = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(input_size, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, encoding_dim),
+            nn.ReLU()
+        )
+
+        # Standardized inputs are unbounded, so the decoder output is linear
+        self.decoder = nn.Sequential(
+            nn.Linear(encoding_dim, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, input_size),
+            nn.Unflatten(1, (n_locations, window_size))
+        )
+
+    def forward(self, x):
+        # x shape: (batch_size, n_locations, window_size)
+        return self.decoder(self.encoder(x))
+
+
+class CampusAnomalyDetector:
+    """
+    Multivariate anomaly detection: scores every location of the campus in one forward pass
+    Besides per-location reconstruction errors it reports a global score (mean error
+    over the campus) and a correlated score (the part of the residual shared by all
+    locations), so a campus-wide event raises one alert instead of one per location.
+    """
+
+    def __init__(self, location_ids, model_path=None, window_size=12, quantile=0.99):
+        """
+        Initialize campus anomaly detector
+        Args:
+            location_ids: Ids of the locations, in matrix row order
+            model_path: Path to saved model (optional)
+            window_size: Size of the time window to analyze
+            quantile: Training-error quantile used for every threshold
+        """
+        self.location_ids = np.asarray(location_ids, dtype=np.int64)
+        self.window_size = window_size
+        self.quantile = quantile
+        self.model = CampusAutoencoder(len(self.location_ids), window_size)
+
+        # Per-location standardization and thresholds, set by train()
+        self.mean = np.zeros(len(self.location_ids), dtype=np.float32)
+        self.std = np.ones(len(self.location_ids), dtype=np.float32)
+        self.location_thresholds = np.full(len(self.location_ids), np.inf)
+        self.global_threshold = np.inf
+        self.correlated_threshold = np.inf
+        self.is_trained = False
+
+        if model_path and os.path.exists(model_path):
+            self.load_model(model_path)
+
+    def _campus_windows(self, levels):
+        """(n_windows, n_locations, window_size) strided view of a (locations x time) panel"""
+        return sliding_windows(np.asarray(levels, dtype=np.float32).T, self.window_size).transpose(0, 2, 1)
+
+    def train(self, levels, epochs=30, lr=0.001, batch_size=128):
+        """
+        Train on a normal history panel and set thresholds from its errors
+        Args:
+            levels: (locations x time) crowd levels, rows in location_ids order
+            epochs: Number of training epochs
+            lr: Learning rate
+            batch_size: Campus windows per mini-batch
+        """
+        levels = np.asarray(levels, dtype=np.float32)
+        if levels.shape[0] != len(self.location_ids):
+            raise ValueError(f"Expected {len(self.location_ids)} location rows, got {levels.shape[0]}")
+
+        windows = self._campus_windows(levels)
+        if len(windows) == 0:
+            print("Not enough data to train")
+            return
+
+        self.mean = levels.mean(axis=1)
+        self.std = np.maximum(levels.std(axis=1), 1e-3).astype(np.float32)
+
+        criterion = nn.MSELoss()
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=lr)
+
+        for epoch in range(epochs):
+            self.model.train()
+            total_loss = 0.0
+            for batch in np.array_split(np.random.permutation(len(windows)), max(len(windows) // batch_size, 1)):
+                X = self._standardize(windows[batch])
+                optimizer.zero_grad()
+                loss = criterion(self.model(X), X)
+                loss.backward()
+                optimizer.step()
+                total_loss += loss.item() * len(batch)
+
+            if (epoch + 1) % 10 == 0:
+                print(f'Epoch [{epoch+1}/{epochs}], Loss: {total_loss / len(windows):.4f}')
+
+        # Thresholds: quantiles of the training scores
+        scores = self.score(windows)
+        self.location_thresholds = np.quantile(scores['location_scores'], self.quantile, axis=0)
+        self.global_threshold = float(np.quantile(scores['global_score'], self.quantile))
+        self.correlated_threshold = float(np.quantile(scores['correlated_score'], self.quantile))
+
+        self.is_trained = True
+        print("Campus anomaly detector training completed!")
+
+    def _standardize(self, windows):
+        """Standardized (batch, locations, window) tensor"""
+        windows = np.asarray(windows, dtype=np.float32)
+        return torch.from_numpy((windows - self.mean[:, None]) / self.std[:, None])
+
+    def score(self, windows, batch_size=4096):
+        """
+        Raw anomaly scores for campus windows
+        Args:
+            windows: (locations x window_size) matrix, or a (batch, locations, window_size) array
+        Returns:
+            Dict of arrays: location_scores (batch, locations), global_score (batch,),
+            correlated_score (batch,)
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim == 2:
+            windows = windows[None]
+
+        self.model.eval()
+        location_scores, correlated_scores = [], []
+        with torch.no_grad():
+            for i in range(0, len(windows), batch_size):
+                X = self._standardize(windows[i:i + batch_size])
+                residual = X - self.model(X)
+                location_scores.append((residual ** 2).mean(dim=2).numpy())
+                # Residual component shared by all locations at each step
+                correlated_scores.append((residual.mean(dim=1) ** 2).mean(dim=1).numpy())
+
+        location_scores = np.concatenate(location_scores)
+        return {
+            'location_scores': location_scores,
+            'global_score': location_scores.mean(axis=1),
+            'correlated_score': np.concatenate(correlated_scores)
+        }
+
+    def detect(self, matrix):
+        """
+        Score the whole campus for one time window
+        Args:
+            matrix: (locations x window_size) recent crowd levels, rows in location_ids order
+        Returns:
+            Dictionary with per-location scores and flags, the global and correlated
+            scores, and is_campus_event when the campus as a whole is anomalous
+        """
+        return self.detect_many(np.asarray(matrix)[None])[0]
+
+    def detect_many(self, windows):
+        """detect() for a (batch, locations, window_size) array of campus windows"""
+        if not self.is_trained:
+            raise ValueError("Train or load the campus detector before detecting")
+
+        scores = self.score(windows)
+        location_anomalies = scores['location_scores'] > self.location_thresholds
+        is_global = scores['global_score'] > self.global_threshold
+        is_correlated = scores['correlated_score'] > self.correlated_threshold
+
+        return [
+            {
+                'location_ids': self.location_ids,
+                'location_scores': scores['location_scores'][i],
+                'location_anomalies': location_anomalies[i],
+                'n_anomalous': int(location_anomalies[i].sum()),
+                'global_score': float(scores['global_score'][i]),
+                'correlated_score': float(scores['correlated_score'][i]),
+                'is_campus_event': bool(is_global[i] or is_correlated[i])
+            }
+            for i in range(len(scores['global_score']))
+        ]
 
     def save_model(self, path):
-        """Save model and scaler"""
+        """Save model, standardization and thresholds (tensors only)"""
         torch.save({
             'model_state_dict': self.model.state_dict(),
-            'scaler': self.scaler,
+            'location_ids': torch.from_numpy(self.location_ids),
             'window_size': self.window_size,
-            'threshold': self.threshold
+            'quantile': self.quantile,
+            'mean': torch.from_numpy(self.mean),
+            'std': torch.from_numpy(self.std),
+            'location_thresholds': torch.from_numpy(np.asarray(self.location_thresholds, dtype=np.float64)),
+            'global_threshold': self.global_threshold,
+            'correlated_threshold': self.correlated_threshold
         }, path)
-        print(f"Anomaly detector saved to {path}")
+        print(f"Campus anomaly detector saved to {path}")
 
     def load_model(self, path):
-        """Load model and scaler"""
-        checkpoint = torch.load(path, map_location=torch.device('cpu'))
-        self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.scaler = checkpoint['scaler']
+        """Load model, standardization and thresholds"""
+        checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=True)
+        location_ids = checkpoint['location_ids'].numpy()
+        if not np.array_equal(location_ids, self.location_ids):
+            raise ValueError("Checkpoint was trained for a different set of locations")
         self.window_size = checkpoint['window_size']
-        self.threshold = checkpoint['threshold']
+        self.quantile = checkpoint['quantile']
+        self.model = CampusAutoencoder(len(location_ids), self.window_size)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.mean = checkpoint['mean'].numpy()
+        self.std = checkpoint['std'].numpy()
+        self.location_thresholds = checkpoint['location_thresholds'].numpy()
+        self.global_threshold = checkpoint['global_threshold']
+        self.correlated_threshold = checkpoint['correlated_threshold']
         self.is_trained = True
-        print(f"Anomaly detector loaded from {path}")
+        print(f"Campus anomaly detector loaded from {path}")
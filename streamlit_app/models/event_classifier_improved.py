@@ -304,6 +304,52 @@ class ImprovedEventCategorizer:
             'suggested_tags': suggested_tags
         }
 
+    def predict_many(self, events):
+        """
+        Predict categories for many events with one tokenizer call and one forward pass
+        Args:
+            events: List of (title, description) pairs
+        Returns:
+            List of predict() result dictionaries, in input order
+        """
+        if not events:
+            return []
+        if self.tokenizer is None or self.model is None or not self.is_trained:
+            return [self._rule_based_classify(title, description) for title, description in events]
+
+        self.model.eval()
+
+        encoding = self.tokenizer(
+            [f"{title} [SEP] {description}" for title, description in events],
+            add_special_tokens=True,
+            max_length=128,
+            padding='max_length',
+            truncation=True,
+            return_tensors='pt'
+        )
+
+        input_ids = encoding['input_ids'].to(self.device)
+        attention_mask = encoding['attention_mask'].to(self.device)
+
+        with torch.no_grad():
+            outputs = self.model(input_ids, attention_mask)
+            # Same temperature scaling as predict()
+            probabilities = torch.softmax(outputs / 1.5, dim=1).cpu().numpy()
+
+        results = []
+        for (title, description), row in zip(events, probabilities):
+            predicted_category = self.categories[int(row.argmax())]
+            results.append({
+                'category': predicted_category,
+                'confidence': float(row.max()),
+                'all_probabilities': {
+                    self.categories[i]: float(row[i])
+                    for i in range(self.num_classes)
+                },
+                'suggested_tags': self._extract_tags(title, description, predicted_category)
+            })
+        return results
+
     def _rule_based_classify(self, title, description):
         """Enhanced rule-based classification as fallback"""
         text = f"{title} {description}".lower()
@@ -0,0 +1,187 @@
+"""
+Shared forecast cache
+Caches per-location forecasts for the whole process, keyed by
+(location_id, 10-minute bucket, model_version), so every page and session
+reuses one forecast per location per bucket instead of re-running the LSTM.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from models.inference_executor import get_inference_executor
+
+# Record hit/miss/eviction counts when Prometheus metrics are available
+try:
+    from monitoring.prometheus_metrics import MetricsCollector
+    PROMETHEUS_ENABLED = True
+except ImportError:
+    PROMETHEUS_ENABLED = False
+
+DEFAULT_BUCKET_MINUTES = 10
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, array header)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class ForecastCache:
+    """Process-wide LRU cache of forecasts with a memory cap and single-flight misses"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, bucket_minutes=DEFAULT_BUCKET_MINUTES, cache_type='forecast',
+                 executor=None):
+        """
+        Initialize forecast cache
+        Args:
+            max_bytes: Approximate memory cap; least recently used forecasts are evicted beyond it
+            bucket_minutes: Forecast lifetime; requests in one bucket share a forecast
+            cache_type: Label used for the Prometheus cache counters
+            executor: InferenceExecutor that batches misses with other sessions' requests
+                      (default: call predict_many directly)
+        """
+        self.max_bytes = max_bytes
+        self.bucket_seconds = bucket_minutes * 60
+        self.cache_type = cache_type
+        self.executor = executor
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, at=None):
+        """Bucket index for a time (default: now), on the same local wall clock as the ring-buffer steps"""
+        seconds = np.datetime64(at if at is not None else datetime.now(), 's').astype(np.int64)
+        return int(seconds // self.bucket_seconds)
+
+    def _record(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+        if PROMETHEUS_ENABLED:
+            if hits:
+                MetricsCollector.record_cache_access(self.cache_type, True, hits)
+            if misses:
+                MetricsCollector.record_cache_access(self.cache_type, False, misses)
+
+    def _store(self, key, forecast):
+        """Insert a forecast and evict down to the memory cap. Caller holds the lock."""
+        forecast = np.array(forecast, copy=True)
+        forecast.flags.writeable = False
+
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key).nbytes + ENTRY_OVERHEAD_BYTES
+        self._entries[key] = forecast
+        self.bytes += forecast.nbytes + ENTRY_OVERHEAD_BYTES
+
+        evicted = 0
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= old.nbytes + ENTRY_OVERHEAD_BYTES
+            evicted += 1
+
+        if evicted:
+            self.evictions += evicted
+            if PROMETHEUS_ENABLED:
+                MetricsCollector.record_cache_eviction(self.cache_type, evicted)
+
+    def get_many(self, forecaster, locations, recent_levels, at=None):
+        """
+        Forecasts for many locations, computing all misses in one predict_many call
+        Concurrent requests for a forecast that is already being computed wait for
+        that computation instead of repeating it.
+        Args:
+            forecaster: CrowdForecaster (its model_version is part of the key)
+            locations: Location dicts
+            recent_levels: Function location -> recent crowd levels, called for misses only
+            at: Request time (default: now)
+        Returns:
+            (len(locations), forecast_steps) array of predicted crowd levels
+        """
+        bucket = self.bucket(at)
+        keys = [(location['id'], bucket, forecaster.model_version) for location in locations]
+        results = [None] * len(keys)
+        owned, waiting = [], []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    results[i] = self._entries[key]
+                elif key in self._inflight:
+                    waiting.append(i)
+                else:
+                    self._inflight[key] = threading.Event()
+                    owned.append(i)
+        # Waiters share another request's computation, so they count as hits
+        self._record(hits=len(keys) - len(owned), misses=len(owned))
+
+        if owned:
+            try:
+                sequences = [recent_levels(locations[i]) for i in owned]
+                if self.executor is not None:
+                    futures = self.executor.submit_many('forecaster', forecaster, sequences)
+                    predictions = [future.result() for future in futures]
+                else:
+                    predictions = forecaster.predict_many(sequences)
+                with self._lock:
+                    for i, forecast in zip(owned, predictions):
+                        self._store(keys[i], forecast)
+                        results[i] = self._entries[keys[i]]
+            finally:
+                # Wake waiters even if the computation failed; they will retry themselves
+                with self._lock:
+                    for i in owned:
+                        self._inflight.pop(keys[i]).set()
+
+        for i in waiting:
+            event = self._inflight.get(keys[i])
+            if event is not None:
+                event.wait()
+            with self._lock:
+                results[i] = self._entries.get(keys[i])
+            if results[i] is None:
+                # Evicted or failed before we could read it
+                results[i] = self.get_many(forecaster, [locations[i]], recent_levels, at)[0]
+
+        if not results:
+            return np.zeros((0, forecaster.forecast_steps))
+        return np.vstack(results)
+
+    def get(self, forecaster, location, recent_levels, at=None):
+        """Forecast for one location (see get_many)"""
+        return self.get_many(forecaster, [location], recent_levels, at)[0]
+
+    def stats(self):
+        """Hit/miss/eviction counters and memory use"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def clear(self):
+        """Drop all cached forecasts"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+# Global instance
+_forecast_cache = None
+_forecast_cache_lock = threading.Lock()
+
+def get_forecast_cache() -> ForecastCache:
+    """Get process-wide forecast cache instance"""
+    global _forecast_cache
+    if _forecast_cache is None:
+        with _forecast_cache_lock:
+            if _forecast_cache is None:
+                _forecast_cache = ForecastCache(executor=get_inference_executor())
+    return _forecast_cache
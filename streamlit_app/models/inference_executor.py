@@ -0,0 +1,269 @@
+"""
+Shared micro-batching inference executor
+Streamlit runs every session on its own script thread. Instead of each thread
+calling the models directly (and PyTorch oversubscribing cores with intra-op
+threads), requests are queued here, collected for a few milliseconds, and run
+as one batched call per model instance:
+
+    forecaster        CrowdForecaster.predict_many(sequences)
+    anomaly_detector  AnomalyDetector.detect_many(windows, location_ids=..., timestamps=...)
+                      from (window, location_id, timestamp) requests
+    event_classifier  ImprovedEventCategorizer.predict_many([(title, description), ...])
+
+Each request gets a concurrent.futures.Future for its own result.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+
+from utils.config import INFERENCE_CONFIG
+
+# Record batch sizes and queue depth when Prometheus metrics are available
+try:
+    from monitoring.prometheus_metrics import MetricsCollector
+    PROMETHEUS_ENABLED = True
+except ImportError:
+    PROMETHEUS_ENABLED = False
+
+DEFAULT_MAX_WAIT_MS = 5
+DEFAULT_MAX_BATCH_SIZE = 512
+
+_STOP = object()
+
+
+def detect_many(detector, requests):
+    """
+    AnomalyDetector.detect_many over (window, location_id, timestamp) requests
+    Ids and times are passed on so calibrated thresholds apply; a None id uses the
+    all-location thresholds and a None time the hour-independent ones.
+    """
+    windows = [window for window, _, _ in requests]
+    location_ids = None
+    if any(location_id is not None for _, location_id, _ in requests):
+        location_ids = np.array([-1 if location_id is None else location_id for _, location_id, _ in requests],
+                                dtype=np.int64)
+    timed = np.array([timestamp is not None for _, _, timestamp in requests])
+    if timed.all() or not timed.any():
+        timestamps = [timestamp for _, _, timestamp in requests] if timed.all() else None
+        return detector.detect_many(windows, location_ids=location_ids, timestamps=timestamps)
+
+    # Score requests with and without a time separately, then restore the input order
+    results = [None] * len(requests)
+    for mask in (timed, ~timed):
+        rows = np.flatnonzero(mask)
+        part = detector.detect_many(
+            [windows[i] for i in rows],
+            location_ids=location_ids[rows] if location_ids is not None else None,
+            timestamps=[requests[i][2] for i in rows] if mask is timed else None
+        )
+        for i, result in zip(rows.tolist(), part):
+            results[i] = result
+    return results
+
+
+# Batched call for each request type
+MODEL_CALLS = {
+    'forecaster': lambda model, inputs: model.predict_many(inputs),
+    'anomaly_detector': detect_many,
+    'event_classifier': lambda model, inputs: model.predict_many(inputs)
+}
+
+
+def configure_threads(num_threads=None, interop_threads=None):
+    """
+    Set PyTorch's intra-op and inter-op thread pools for this process
+    Args:
+        num_threads: torch.set_num_threads value (None leaves it unchanged)
+        interop_threads: torch.set_num_interop_threads value (None leaves it unchanged).
+                         PyTorch only accepts this before any inter-op work has started.
+    Returns:
+        (num_threads, interop_threads) in effect
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    if interop_threads is not None and interop_threads != torch.get_num_interop_threads():
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            print(f"Warning: Could not set inter-op threads: {e}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+class InferenceExecutor:
+    """Queues model requests from many threads and serves them in batches"""
+
+    def __init__(self, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 num_threads=None, interop_threads=None):
+        """
+        Initialize inference executor
+        Args:
+            max_wait_ms: How long a batch collects requests after its first one arrives
+            max_batch_size: Most requests served by one batched call
+            num_threads: PyTorch intra-op threads (see configure_threads)
+            interop_threads: PyTorch inter-op threads (see configure_threads)
+        """
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.num_threads, self.interop_threads = configure_threads(num_threads, interop_threads)
+
+        # One queue and worker per request type, started on first use
+        self._queues = {}
+        self._workers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, model_type):
+        if model_type not in MODEL_CALLS:
+            raise ValueError(f"Unknown model type '{model_type}', expected one of {list(MODEL_CALLS)}")
+        requests = self._queues.get(model_type)
+        if requests is None:
+            with self._lock:
+                requests = self._queues.get(model_type)
+                if requests is None:
+                    requests = queue.Queue()
+                    self._stats[model_type] = {'requests': 0, 'batches': 0, 'max_batch_size': 0, 'max_queue_depth': 0}
+                    worker = threading.Thread(
+                        target=self._serve, args=(model_type, requests),
+                        name=f'inference-{model_type}', daemon=True
+                    )
+                    self._queues[model_type] = requests
+                    self._workers[model_type] = worker
+                    worker.start()
+        return requests
+
+    def submit_many(self, model_type, model, inputs):
+        """
+        Queue several inputs for one model
+        Args:
+            model_type: 'forecaster', 'anomaly_detector' or 'event_classifier'
+            model: Model instance; requests for the same instance are batched together
+            inputs: Per-request inputs: a sequence ('forecaster'), a (window, location_id,
+                    timestamp) tuple ('anomaly_detector') or a (title, description) pair
+        Returns:
+            List of Futures, one per input
+        """
+        requests = self._queue(model_type)
+        futures = []
+        for model_input in inputs:
+            future = Future()
+            requests.put((model, model_input, future))
+            futures.append(future)
+        return futures
+
+    def submit(self, model_type, model, model_input):
+        """Queue one input for one model (see submit_many). Returns a Future."""
+        return self.submit_many(model_type, model, [model_input])[0]
+
+    def forecast(self, forecaster, sequence):
+        """Future for CrowdForecaster.predict(sequence)"""
+        return self.submit('forecaster', forecaster, sequence)
+
+    def detect(self, detector, recent_data, location_id=None, timestamp=None):
+        """Future for AnomalyDetector.detect(recent_data, location_id, timestamp)"""
+        return self.submit('anomaly_detector', detector, (recent_data, location_id, timestamp))
+
+    def classify(self, classifier, title, description):
+        """Future for ImprovedEventCategorizer.predict(title, description)"""
+        return self.submit('event_classifier', classifier, (title, description))
+
+    def _collect(self, requests):
+        """Block for one request, then gather more until max_wait has passed or the batch is full"""
+        batch = [requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self, model_type, requests):
+        call = MODEL_CALLS[model_type]
+        while True:
+            batch = self._collect(requests)
+            stop = any(request is _STOP for request in batch)
+            batch = [request for request in batch if request is not _STOP]
+
+            # One batched call per model instance in this batch
+            groups = {}
+            for model, model_input, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(id(model), (model, []))[1].append((model_input, future))
+
+            for model, items in groups.values():
+                start = time.perf_counter()
+                try:
+                    results = list(call(model, [model_input for model_input, _ in items]))
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                duration = time.perf_counter() - start
+
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+                # A short result list must not leave callers waiting forever
+                for _, future in items[len(results):]:
+                    future.set_exception(RuntimeError(
+                        f"{model_type} returned {len(results)} results for {len(items)} inputs"
+                    ))
+
+                # Metrics are best effort; a failure here must not kill the worker
+                try:
+                    self._record(model_type, len(items), requests.qsize(), duration)
+                except Exception as e:
+                    print(f"Error recording {model_type} inference metrics: {str(e)}")
+
+            if stop:
+                return
+
+    def _record(self, model_type, batch_size, queue_depth, duration):
+        stats = self._stats[model_type]
+        stats['requests'] += batch_size
+        stats['batches'] += 1
+        stats['max_batch_size'] = max(stats['max_batch_size'], batch_size)
+        stats['max_queue_depth'] = max(stats['max_queue_depth'], queue_depth)
+        if PROMETHEUS_ENABLED:
+            MetricsCollector.record_inference_batch(model_type, batch_size, queue_depth)
+            MetricsCollector.record_model_prediction(model_type, duration)
+
+    def stats(self):
+        """Per model type request/batch counts, mean and largest batch, current and peak queue depth"""
+        return {
+            model_type: dict(
+                stats,
+                mean_batch_size=stats['requests'] / max(stats['batches'], 1),
+                queue_depth=self._queues[model_type].qsize() if model_type in self._queues else 0
+            )
+            for model_type, stats in self._stats.items()
+        }
+
+    def shutdown(self):
+        """Serve what is already queued, then stop the workers"""
+        with self._lock:
+            for requests in self._queues.values():
+                requests.put(_STOP)
+            workers = list(self._workers.values())
+            self._queues.clear()
+            self._workers.clear()
+        for worker in workers:
+            worker.join()
+
+
+# Global instance
+_inference_executor = None
+_inference_executor_lock = threading.Lock()
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get process-wide inference executor instance (configured by INFERENCE_CONFIG)"""
+    global _inference_executor
+    if _inference_executor is None:
+        with _inference_executor_lock:
+            if _inference_executor is None:
+                _inference_executor = InferenceExecutor(**INFERENCE_CONFIG)
+    return _inference_executor
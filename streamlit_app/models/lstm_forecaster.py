@@ -1,12 +1,66 @@
 """
 LSTM-based time series forecaster for crowd prediction
 """
+import copy
+import hashlib
+import pickle
+import time
 import torch
 import torch.nn as nn
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
 import os
 
+from models.windowing import series_boundaries, sliding_windows, window_starts
+
+# Optional ONNX Runtime backend
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# Inference backends, in fallback order
+BACKENDS = ['onnxruntime', 'torchscript', 'torch']
+
+# Long-horizon forecasts: 144 x 10 minutes = 24 hours
+DEFAULT_HORIZON_STEPS = 144
+
+# Exported artifacts sit next to the .pth checkpoint with these suffixes
+TORCHSCRIPT_SUFFIX = '.torchscript.pt'
+ONNX_SUFFIX = '.onnx'
+
+
+def export_paths(model_path):
+    """TorchScript and ONNX artifact paths for a .pth checkpoint path"""
+    base = os.path.splitext(model_path)[0]
+    return {'torchscript': base + TORCHSCRIPT_SUFFIX, 'onnxruntime': base + ONNX_SUFFIX}
+
+
+def _load_legacy_checkpoint(path):
+    """
+    Read a checkpoint that pickles a sklearn MinMaxScaler (the format before plain
+    scaling tensors) and convert it to the current layout. Needs scikit-learn.
+    """
+    checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=False)
+    scaler = checkpoint.pop('scaler')
+    checkpoint['scaler_scale'] = torch.tensor(scaler.scale_, dtype=torch.float32)
+    checkpoint['scaler_min'] = torch.tensor(scaler.min_, dtype=torch.float32)
+    return checkpoint
+
+
+def migrate_checkpoint(path, output_path=None):
+    """
+    Rewrite a legacy lstm_crowd_model.pth so it loads with weights_only=True
+    Args:
+        path: Legacy checkpoint
+        output_path: Where to write the converted checkpoint (default: overwrite path)
+    """
+    checkpoint = _load_legacy_checkpoint(path)
+    torch.save(checkpoint, output_path or path)
+    print(f"Checkpoint migrated to {output_path or path}")
+
+
 class LSTMForecaster(nn.Module):
     def __init__(self, input_size=1, hidden_size=64, num_layers=2, output_size=6, dropout=0.2):
         super(LSTMForecaster, self).__init__()
@@ -32,14 +86,71 @@ class LSTMForecaster(nn.Module):
         return predictions
 
 
+class ScaledForecaster(nn.Module):
+    """
+    LSTMForecaster with the MinMaxScaler baked in, for export
+    Takes raw crowd levels (batch, sequence_length) and returns clipped
+    crowd levels (batch, forecast_steps).
+    """
+
+    def __init__(self, model, scale, offset):
+        super(ScaledForecaster, self).__init__()
+        self.model = model
+        self.register_buffer('scale', torch.as_tensor(scale, dtype=torch.float32).clone())
+        self.register_buffer('offset', torch.as_tensor(offset, dtype=torch.float32).clone())
+
+    def forward(self, x):
+        scaled = (x * self.scale + self.offset).unsqueeze(-1)
+        predictions = self.model(scaled)
+        return torch.clamp((predictions - self.offset) / self.scale, 0, 1)
+
+
+class SequenceDataset(Dataset):
+    """
+    (input, target) training pairs read from a strided window view of a scaled series
+    Indexed with a list of positions (one mini-batch at a time), so only the
+    current batch of windows is ever copied out of the view.
+    """
+
+    def __init__(self, series, starts, sequence_length, forecast_steps):
+        """
+        Args:
+            series: 1-D float32 array of scaled crowd levels
+            starts: Start index of each usable window in series (see window_starts)
+            sequence_length: Input steps per window
+            forecast_steps: Target steps following each input
+        """
+        self.windows = sliding_windows(np.ascontiguousarray(series, dtype=np.float32),
+                                       sequence_length + forecast_steps)
+        self.starts = np.asarray(starts)
+        self.sequence_length = sequence_length
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, indices):
+        batch = torch.from_numpy(self.windows[self.starts[indices]])
+        X = batch[:, :self.sequence_length].unsqueeze(-1)
+        y = batch[:, self.sequence_length:]
+        return X, y
+
+
 class CrowdForecaster:
-    def __init__(self, model_path=None, sequence_length=12):
+    def __init__(self, model_path=None, sequence_length=12, backend='torch', quantized=False):
         """
         Initialize crowd forecaster
         Args:
             model_path: Path to saved model (optional)
             sequence_length: Number of past time steps to use (default: 12 = 2 hours)
+            backend: 'torch', 'torchscript' or 'onnxruntime'. Exported backends need the
+                     artifacts written by export(); if one can't be loaded the next backend
+                     in BACKENDS is tried, ending with the plain torch model.
+            quantized: Run the torch backend on a dynamically quantized int8 copy of the model
+                       (exported backends serve the float graph, so backend must be 'torch')
         """
+        if quantized and backend != 'torch':
+            raise ValueError(f"quantized=True needs the 'torch' backend; '{backend}' serves the float model")
+
         self.sequence_length = sequence_length
         self.forecast_steps = 6  # Predict next 6 steps (1 hour)
         self.model = LSTMForecaster(
@@ -48,62 +159,197 @@ class CrowdForecaster:
             num_layers=2,
             output_size=self.forecast_steps
         )
-        self.scaler = MinMaxScaler()
+        # Min-max scaling to [0, 1] as plain tensors: scaled = level * scaler_scale + scaler_min
+        self.scaler_scale = torch.ones(1)
+        self.scaler_min = torch.zeros(1)
         self.is_trained = False
+        self.backend = 'torch'
+        self.quantized = False
+        self.model_version = 'untrained'
+        self._runner = None
+
+        # Optional direct multi-output model for long horizons (see train_horizon_model)
+        self.horizon_model = None
+        self.horizon_steps = 0
+        self.horizon_sequence_length = 0
 
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
+            if quantized:
+                self.quantize()
+            if backend != 'torch':
+                self.set_backend(backend, model_path)
 
-    def prepare_sequences(self, data):
-        """Prepare sequences for training"""
-        X, y = [], []
-
-        for i in range(len(data) - self.sequence_length - self.forecast_steps + 1):
-            X.append(data[i:i + self.sequence_length])
-            y.append(data[i + self.sequence_length:i + self.sequence_length + self.forecast_steps])
-
-        return np.array(X), np.array(y)
-
-    def train(self, historical_data, epochs=50, lr=0.001):
+    def prepare_sequences(self, data, boundaries=None):
         """
-        Train the LSTM model
+        Prepare (input, target) sequences for training
         Args:
-            historical_data: DataFrame with 'crowd_level' column
-            epochs: Number of training epochs
-            lr: Learning rate
+            data: Series of crowd levels (1-D, or (n, 1))
+            boundaries: Series start offsets (see series_boundaries) for concatenated histories
         """
-        # Extract crowd levels
-        crowd_levels = historical_data['crowd_level'].values.reshape(-1, 1)
+        windows = sliding_windows(data, self.sequence_length + self.forecast_steps, boundaries)
+        return windows[:, :self.sequence_length], windows[:, self.sequence_length:]
 
-        # Normalize data
-        scaled_data = self.scaler.fit_transform(crowd_levels)
+    def _fit_scaling(self, crowd_levels):
+        """
+        Min-max scaling of crowd levels to [0, 1] (a constant series keeps scale 1)
+        Returns:
+            (scaler_scale, scaler_min) tensors; the caller commits them once training succeeds
+        """
+        low = float(crowd_levels.min()) if len(crowd_levels) else 0.0
+        data_range = float(crowd_levels.max()) - low if len(crowd_levels) else 0.0
+        scale = 1.0 / data_range if data_range > 0 else 1.0
+        return torch.tensor([scale], dtype=torch.float32), torch.tensor([-low * scale], dtype=torch.float32)
 
-        # Prepare sequences
-        X, y = self.prepare_sequences(scaled_data)
+    def _split_starts(self, historical_data, starts, val_fraction, window):
+        """
+        Time-based train/validation split of window start indices
+        Windows whose targets end before the cutoff train; windows starting at or after it validate.
+        Without timestamps, or if the time cutoff leaves no validation windows, the last
+        val_fraction of the windows (at least one) validate.
+        """
+        if val_fraction <= 0:
+            return starts, starts[:0]
+
+        if 'timestamp' in historical_data:
+            times = historical_data['timestamp'].to_numpy()
+            cutoff = np.sort(times)[int(len(times) * (1 - val_fraction))]
+            val_starts = starts[times[starts] >= cutoff]
+            if len(val_starts):
+                return starts[times[starts + window - 1] < cutoff], val_starts
+            print(f"No windows start after the {val_fraction:.0%} validation cutoff; "
+                  f"validating on the last windows instead")
+
+        n_val = max(int(len(starts) * val_fraction), 1)
+        val_starts = starts[len(starts) - n_val:]
+        return starts[starts + window <= val_starts[0]], val_starts
+
+    def _evaluate(self, model, loader, criterion):
+        """Mean loss of a model over a loader"""
+        model.eval()
+        total, count = 0.0, 0
+        with torch.no_grad():
+            for X, y in loader:
+                total += criterion(model(X), y).item() * len(X)
+                count += len(X)
+        return total / max(count, 1)
 
-        if len(X) == 0:
+    def _fit(self, model, historical_data, scaling, sequence_length, forecast_steps, epochs, lr, batch_size,
+             val_fraction, patience):
+        """
+        Mini-batch training loop shared by the step model and the long-horizon model
+        Trains on data scaled with `scaling` (see _fit_scaling); see train() for the other arguments.
+        Returns:
+            False if there was not enough data to train
+        """
+        scaler_scale, scaler_min = scaling
+        crowd_levels = historical_data['crowd_level'].to_numpy(dtype=np.float32)
+        scaled_data = crowd_levels * scaler_scale.item() + scaler_min.item()
+
+        # Windows never span two locations of a concatenated history
+        window = sequence_length + forecast_steps
+        starts = window_starts(len(scaled_data), window, series_boundaries(historical_data))
+        if len(starts) == 0:
             print("Not enough data to train")
-            return
+            return False
+
+        train_starts, val_starts = self._split_starts(historical_data, starts, val_fraction, window)
+        if len(train_starts) == 0:
+            print("Not enough data to train")
+            return False
 
-        # Convert to tensors
-        X_tensor = torch.FloatTensor(X)
-        y_tensor = torch.FloatTensor(y)
+        # Windows are copied out per batch, so memory stays at one copy of the series
+        train_set = SequenceDataset(scaled_data, train_starts, sequence_length, forecast_steps)
+        train_loader = DataLoader(
+            train_set, batch_size=None,
+            sampler=BatchSampler(RandomSampler(train_set), batch_size=batch_size, drop_last=False)
+        )
+        val_loader = None
+        if len(val_starts):
+            val_set = SequenceDataset(scaled_data, val_starts, sequence_length, forecast_steps)
+            val_loader = DataLoader(
+                val_set, batch_size=None,
+                sampler=BatchSampler(SequentialSampler(val_set), batch_size=batch_size, drop_last=False)
+            )
 
         # Training setup
         criterion = nn.MSELoss()
-        optimizer = torch.optim.Adam(self.model.parameters(), lr=lr)
+        optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
+        best_loss = float('inf')
+        best_state = None
+        stale_epochs = 0
 
         # Training loop
-        self.model.train()
         for epoch in range(epochs):
-            optimizer.zero_grad()
-            outputs = self.model(X_tensor)
-            loss = criterion(outputs, y_tensor.squeeze(-1))
-            loss.backward()
-            optimizer.step()
+            model.train()
+            epoch_start = time.perf_counter()
+            total_loss = 0.0
+
+            for X, y in train_loader:
+                optimizer.zero_grad()
+                outputs = model(X)
+                loss = criterion(outputs, y)
+                loss.backward()
+                optimizer.step()
+                total_loss += loss.item() * len(X)
+
+            elapsed = time.perf_counter() - epoch_start
+            train_loss = total_loss / len(train_set)
+            val_loss = self._evaluate(model, val_loader, criterion) if val_loader is not None else train_loss
+
+            print(f'Epoch [{epoch+1}/{epochs}], Loss: {train_loss:.4f}, Val Loss: {val_loss:.4f}, '
+                  f'{len(train_set) / elapsed:.0f} sequences/s')
+
+            # Early stopping on validation loss
+            if val_loss < best_loss:
+                best_loss = val_loss
+                best_state = copy.deepcopy(model.state_dict())
+                stale_epochs = 0
+            else:
+                stale_epochs += 1
+                if stale_epochs >= patience:
+                    print(f'Early stopping after epoch {epoch+1} (best Val Loss: {best_loss:.4f})')
+                    break
+
+        if best_state is not None:
+            model.load_state_dict(best_state)
+        return True
+
+    def train(self, historical_data, epochs=50, lr=0.001, batch_size=256, val_fraction=0.1, patience=5):
+        """
+        Train the LSTM model with mini-batches
+        Args:
+            historical_data: DataFrame with 'crowd_level' column (and optionally 'timestamp'
+                             for a time-based validation split)
+            epochs: Maximum number of training epochs
+            lr: Learning rate
+            batch_size: Sequences per mini-batch
+            val_fraction: Share of the most recent data held out for validation (0 disables)
+            patience: Epochs without validation improvement before stopping early;
+                      the best weights are restored at the end
+        """
+        if self.quantized:
+            raise ValueError("A quantized model can't be trained; train the float model and quantize afterwards")
+
+        # Extract crowd levels
+        crowd_levels = historical_data['crowd_level'].to_numpy(dtype=np.float32)
+
+        # Normalize data (a loaded model keeps its scaling if there isn't enough data to train)
+        scaling = self._fit_scaling(crowd_levels)
 
-            if (epoch + 1) % 10 == 0:
-                print(f'Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.4f}')
+        if not self._fit(self.model, historical_data, scaling, self.sequence_length, self.forecast_steps,
+                         epochs, lr, batch_size, val_fraction, patience):
+            return
+
+        self.scaler_scale, self.scaler_min = scaling
+
+        # Exported artifacts (and a horizon model on the old scaling) no longer match
+        self._runner = None
+        self.backend = 'torch'
+        self.horizon_model = None
+        self.horizon_steps = 0
+        self.model_version = f'trained-{int(time.time())}'
 
         self.is_trained = True
         print("Training completed!")
@@ -116,76 +362,304 @@ class CrowdForecaster:
         Returns:
             Array of predicted crowd levels for next forecast_steps
         """
+        return self.predict_many([recent_data])[0]
+
+    def _pad_sequences(self, sequences, length=None):
+        """
+        Left-pad (with 0.5) or trim sequences to exactly `length` points (default: sequence_length)
+        Accepts an (n, seq_len) array or a list of sequences of any lengths.
+        """
+        length = length or self.sequence_length
+        if isinstance(sequences, np.ndarray) and sequences.ndim == 2:
+            batch = sequences[:, -length:].astype(np.float32)
+            if batch.shape[1] < length:
+                padding = np.full((len(batch), length - batch.shape[1]), 0.5, dtype=np.float32)
+                batch = np.hstack([padding, batch])
+            return batch
+
+        batch = np.full((len(sequences), length), 0.5, dtype=np.float32)
+        for i, sequence in enumerate(sequences):
+            sequence = np.asarray(sequence, dtype=np.float32)[-length:]
+            if len(sequence):
+                batch[i, -len(sequence):] = sequence
+        return batch
+
+    def predict_many(self, sequences):
+        """
+        Predict future crowd levels for many locations in one batched forward pass
+        Args:
+            sequences: (n_locations, seq_len) array, or a list of per-location sequences
+                       (shorter sequences are padded like predict())
+        Returns:
+            (n_locations, forecast_steps) array of predicted crowd levels
+        """
+        if len(sequences) == 0:
+            return np.zeros((0, self.forecast_steps), dtype=np.float32)
+
         if not self.is_trained:
             # If not trained, return simple persistence forecast
-            return self._persistence_forecast(recent_data)
+            return self._persistence_forecast(sequences)
+
+        batch = self._pad_sequences(sequences)
+
+        # Exported backends have the scaler baked in
+        if self._runner is not None:
+            return self._runner(batch)
 
         self.model.eval()
 
-        # Ensure we have enough data
-        if len(recent_data) < self.sequence_length:
-            # Pad with zeros if needed
-            padding = [0.5] * (self.sequence_length - len(recent_data))
-            recent_data = padding + list(recent_data)
+        with torch.no_grad():
+            # Normalize (one fused multiply-add)
+            X = torch.addcmul(self.scaler_min, torch.from_numpy(batch), self.scaler_scale).unsqueeze(-1)
 
-        # Take last sequence_length points
-        recent_data = recent_data[-self.sequence_length:]
+            # Predict
+            predictions = self.model(X)
 
-        # Normalize
-        recent_array = np.array(recent_data).reshape(-1, 1)
-        scaled_data = self.scaler.transform(recent_array)
+            # Denormalize and clip to valid range, in place
+            return predictions.sub_(self.scaler_min).div_(self.scaler_scale).clamp_(0, 1).numpy()
 
-        # Prepare input
-        X = torch.FloatTensor(scaled_data).unsqueeze(0)  # Add batch dimension
+    def _persistence_forecast(self, sequences, steps=None):
+        """Simple persistence forecast (use last value) for every sequence, forecast_steps (or steps) ahead"""
+        steps = steps or self.forecast_steps
+        predictions = np.full((len(sequences), steps), 0.5)
 
-        # Predict
-        with torch.no_grad():
-            predictions = self.model(X)
+        last_values = np.array([sequence[-1] if len(sequence) else np.nan for sequence in sequences], dtype=float)
+        has_data = ~np.isnan(last_values)
+
+        # Random walk with slight variation from the last value
+        current = last_values[has_data]
+        for step in range(steps):
+            current = np.clip(current + np.random.normal(0, 0.05, len(current)), 0, 1)
+            predictions[has_data, step] = current
+
+        return predictions
+
+    def predict_horizon(self, sequences, horizon_steps=DEFAULT_HORIZON_STEPS, method='auto'):
+        """
+        Long-horizon forecast (e.g. 144 steps = 24 hours) for many locations at once
+        Args:
+            sequences: (n_locations, seq_len) array, or a list of per-location sequences
+            horizon_steps: Steps to forecast
+            method: 'autoregressive' rolls the step model forward forecast_steps at a time,
+                    feeding its predictions back in; 'direct' uses the multi-output model from
+                    train_horizon_model (inputs padded/trimmed to horizon_sequence_length);
+                    'auto' picks direct when a horizon model covering horizon_steps is trained
+        Returns:
+            (n_locations, horizon_steps) array of predicted crowd levels
+        """
+        if method not in ('auto', 'autoregressive', 'direct'):
+            raise ValueError(f"Unknown method '{method}', expected 'auto', 'autoregressive' or 'direct'")
+
+        has_direct = self.horizon_model is not None and self.horizon_steps >= horizon_steps
+        if method == 'direct' and not has_direct:
+            raise ValueError(f"No horizon model covering {horizon_steps} steps; call train_horizon_model first")
+
+        if len(sequences) == 0:
+            return np.zeros((0, horizon_steps), dtype=np.float32)
+
+        if not self.is_trained:
+            return self._persistence_forecast(sequences, horizon_steps)
+
+        if has_direct and method != 'autoregressive':
+            batch = self._pad_sequences(sequences, self.horizon_sequence_length)
+            self.horizon_model.eval()
+            with torch.no_grad():
+                X = torch.addcmul(self.scaler_min, torch.from_numpy(batch), self.scaler_scale).unsqueeze(-1)
+                predictions = self.horizon_model(X)[:, :horizon_steps]
+                return predictions.sub_(self.scaler_min).div_(self.scaler_scale).clamp_(0, 1).numpy()
+
+        # Autoregressive: one buffer of inputs followed by the forecast; every round is one
+        # batched predict_many over all locations, so the Python loop runs per round, not per location
+        n_rounds = -(-horizon_steps // self.forecast_steps)
+        rolled = np.empty((len(sequences), self.sequence_length + n_rounds * self.forecast_steps), dtype=np.float32)
+        rolled[:, :self.sequence_length] = self._pad_sequences(sequences)
+
+        for round_index in range(n_rounds):
+            start = round_index * self.forecast_steps
+            end = start + self.sequence_length
+            rolled[:, end:end + self.forecast_steps] = self.predict_many(rolled[:, start:end])
+
+        return rolled[:, self.sequence_length:self.sequence_length + horizon_steps]
+
+    def train_horizon_model(self, historical_data, horizon_steps=DEFAULT_HORIZON_STEPS, sequence_length=None,
+                            epochs=20, lr=0.001, batch_size=256, val_fraction=0.1, patience=3):
+        """
+        Train a direct multi-output model that predicts all horizon_steps at once
+        Shares the step model's scaling (fitted here if the step model isn't trained yet).
+        Args:
+            historical_data: DataFrame with 'crowd_level' column (see train)
+            horizon_steps: Steps the model predicts
+            sequence_length: Input steps (default: horizon_steps, i.e. as much history as horizon)
+            epochs, lr, batch_size, val_fraction, patience: As in train()
+        """
+        if self.quantized:
+            raise ValueError("Train the horizon model on the float forecaster")
 
-        # Denormalize
-        predictions_array = predictions.numpy().reshape(-1, 1)
-        predictions_denorm = self.scaler.inverse_transform(predictions_array)
+        sequence_length = sequence_length or horizon_steps
+        if self.is_trained:
+            scaling = (self.scaler_scale, self.scaler_min)
+        else:
+            scaling = self._fit_scaling(historical_data['crowd_level'].to_numpy(dtype=np.float32))
 
-        # Clip to valid range
-        predictions_denorm = np.clip(predictions_denorm, 0, 1)
+        model = LSTMForecaster(input_size=1, hidden_size=64, num_layers=2, output_size=horizon_steps)
+        if not self._fit(model, historical_data, scaling, sequence_length, horizon_steps,
+                         epochs, lr, batch_size, val_fraction, patience):
+            return
 
-        return predictions_denorm.flatten()
+        self.scaler_scale, self.scaler_min = scaling
 
-    def _persistence_forecast(self, recent_data):
-        """Simple persistence forecast (use last value)"""
-        if len(recent_data) == 0:
-            return np.array([0.5] * self.forecast_steps)
+        self.horizon_model = model.eval()
+        self.horizon_steps = horizon_steps
+        self.horizon_sequence_length = sequence_length
+        print("Horizon model training completed!")
 
-        last_value = recent_data[-1]
-        # Add slight random variation
-        predictions = []
-        current = last_value
-        for _ in range(self.forecast_steps):
-            variation = np.random.normal(0, 0.05)
-            current = np.clip(current + variation, 0, 1)
-            predictions.append(current)
+    def quantize(self):
+        """
+        Swap in a dynamically quantized int8 copy of the model for CPU inference
+        nn.LSTM and nn.Linear weights are stored as int8; activations are quantized
+        on the fly. Falls back to the float model if no quantized engine is available.
+        """
+        if not self.is_trained:
+            raise ValueError("Train or load the model before quantizing")
+        if self._runner is not None:
+            raise ValueError(f"The '{self.backend}' backend serves the float model; switch to 'torch' to quantize")
+
+        try:
+            self.model = torch.ao.quantization.quantize_dynamic(
+                copy.deepcopy(self.model).eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8
+            )
+            self.quantized = True
+            self.model_version += '-int8'
+        except Exception as e:
+            print(f"Quantization unavailable ({e}), keeping the float model")
+
+        return self.quantized
+
+    def _scaled_model(self):
+        """Eval-mode ScaledForecaster sharing this forecaster's weights"""
+        self.model.eval()
+        return ScaledForecaster(self.model, self.scaler_scale, self.scaler_min).eval()
 
-        return np.array(predictions)
+    def export(self, model_path):
+        """
+        Write TorchScript and ONNX artifacts (scaler baked in) next to a checkpoint
+        Args:
+            model_path: Path of the .pth checkpoint the artifacts belong to
+        Returns:
+            Dict of backend name -> artifact path written
+        """
+        if not self.is_trained:
+            raise ValueError("Train or load the model before exporting")
+        if self.quantized:
+            raise ValueError("Export the float model; quantization is applied at load time")
+
+        paths = export_paths(model_path)
+        scaled_model = self._scaled_model()
+        example = torch.full((1, self.sequence_length), 0.5)
+
+        with torch.no_grad():
+            torch.jit.trace(scaled_model, example).save(paths['torchscript'])
+            torch.onnx.export(
+                scaled_model, (example,), paths['onnxruntime'],
+                input_names=['levels'], output_names=['forecast'],
+                dynamic_axes={'levels': {0: 'batch'}, 'forecast': {0: 'batch'}},
+                opset_version=17, dynamo=False
+            )
+
+        print(f"Model exported to {paths['torchscript']} and {paths['onnxruntime']}")
+        return paths
+
+    def set_backend(self, backend, model_path):
+        """
+        Switch the inference backend, falling back along BACKENDS on failure
+        Args:
+            backend: 'torch', 'torchscript' or 'onnxruntime'
+            model_path: Path of the .pth checkpoint whose exported artifacts to load
+        Returns:
+            Name of the backend now in use
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        if self.quantized and backend != 'torch':
+            raise ValueError(f"The quantized model only runs on the 'torch' backend, not '{backend}'")
+
+        paths = export_paths(model_path)
+        for candidate in BACKENDS[BACKENDS.index(backend):]:
+            try:
+                self._runner = self._load_runner(candidate, paths)
+                self.backend = candidate
+                return candidate
+            except Exception as e:
+                print(f"Backend '{candidate}' unavailable ({e}), falling back")
+
+        return self.backend
+
+    def _load_runner(self, backend, paths):
+        """Batch inference function (numpy in, numpy out) for a backend; None for plain torch"""
+        if backend == 'torch':
+            return None
+
+        if backend == 'torchscript':
+            module = torch.jit.load(paths['torchscript'], map_location=torch.device('cpu'))
+            module.eval()
+
+            def run_torchscript(batch):
+                with torch.no_grad():
+                    return module(torch.from_numpy(batch)).numpy()
+            return run_torchscript
+
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is not installed")
+        session = onnxruntime.InferenceSession(paths['onnxruntime'], providers=['CPUExecutionProvider'])
+
+        def run_onnxruntime(batch):
+            return session.run(None, {'levels': batch})[0]
+        return run_onnxruntime
 
     def save_model(self, path):
         """Save model and scaler"""
-        torch.save({
+        if self.quantized:
+            raise ValueError("Save the float model; quantization is applied at load time")
+        checkpoint = {
             'model_state_dict': self.model.state_dict(),
-            'scaler': self.scaler,
+            'scaler_scale': self.scaler_scale,
+            'scaler_min': self.scaler_min,
             'sequence_length': self.sequence_length,
             'forecast_steps': self.forecast_steps
-        }, path)
+        }
+        if self.horizon_model is not None:
+            checkpoint['horizon_state_dict'] = self.horizon_model.state_dict()
+            checkpoint['horizon_steps'] = self.horizon_steps
+            checkpoint['horizon_sequence_length'] = self.horizon_sequence_length
+        torch.save(checkpoint, path)
         print(f"Model saved to {path}")
 
     def load_model(self, path):
         """Load model and scaler"""
-        # Use weights_only=False to load sklearn scaler (safe for self-trained models)
-        checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=False)
+        try:
+            # Checkpoints hold only tensors and ints, so the safe loader suffices
+            checkpoint = torch.load(path, map_location=torch.device('cpu'), weights_only=True)
+        except pickle.UnpicklingError:
+            print(f"Legacy checkpoint format at {path}; convert it with migrate_checkpoint()")
+            checkpoint = _load_legacy_checkpoint(path)
         self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.scaler = checkpoint['scaler']
+        self.scaler_scale = checkpoint['scaler_scale'].reshape(1).float()
+        self.scaler_min = checkpoint['scaler_min'].reshape(1).float()
         self.sequence_length = checkpoint['sequence_length']
         self.forecast_steps = checkpoint['forecast_steps']
         self.is_trained = True
+
+        if 'horizon_state_dict' in checkpoint:
+            self.horizon_steps = checkpoint['horizon_steps']
+            self.horizon_sequence_length = checkpoint['horizon_sequence_length']
+            self.horizon_model = LSTMForecaster(input_size=1, hidden_size=64, num_layers=2,
+                                                output_size=self.horizon_steps)
+            self.horizon_model.load_state_dict(checkpoint['horizon_state_dict'])
+            self.horizon_model.eval()
+
+        # Content hash of the checkpoint identifies the weights (e.g. for forecast caching)
+        with open(path, 'rb') as f:
+            self.model_version = hashlib.sha1(f.read()).hexdigest()[:12]
         print(f"Model loaded from {path}")
 
     def get_forecast_label(self, predicted_level):
@@ -200,3 +674,13 @@ class CrowdForecaster:
             return "Busy", "🟠"
         else:
             return "Very Busy", "🔴"
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m models.lstm_forecaster <legacy.pth> [output.pth]")
+        sys.exit(1)
+
+    migrate_checkpoint(*sys.argv[1:])
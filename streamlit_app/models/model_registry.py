@@ -0,0 +1,303 @@
+"""
+Versioned model registry with hot reload
+Checkpoints are published into a versioned directory with a JSON manifest:
+
+    <root>/<name>/manifest.json          {"current": "v2", "versions": [...]}
+    <root>/<name>/<version>/model.pth
+
+Each process serves one shared, read-only model per registry. A background
+watcher polls the manifest and loads a newly published version off the request
+path, then swaps it in with a single reference assignment.
+
+Nothing is written until a version is published (bootstrap() publishes the
+bundled checkpoint explicitly). Manifest updates take an exclusive file lock so
+several processes (e.g. app replicas and a training job) can publish safely.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from models.lstm_forecaster import CrowdForecaster
+from utils.config import MODEL_REGISTRY_CONFIG
+
+# Cross-process locking of the manifest (POSIX); elsewhere only threads are serialized
+try:
+    import fcntl
+    FILE_LOCKS_ENABLED = True
+except ImportError:
+    FILE_LOCKS_ENABLED = False
+
+# Record load times and active versions when Prometheus metrics are available
+try:
+    from monitoring.prometheus_metrics import MetricsCollector
+    PROMETHEUS_ENABLED = True
+except ImportError:
+    PROMETHEUS_ENABLED = False
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REGISTRY_PATH = os.path.join(MODELS_DIR, 'registry')
+BUNDLED_LSTM_PATH = os.path.join(MODELS_DIR, 'lstm_crowd_model.pth')
+
+MANIFEST_FILE = 'manifest.json'
+CHECKPOINT_FILE = 'model.pth'
+LOCK_FILE = '.lock'
+DEFAULT_POLL_SECONDS = 30
+
+
+def load_forecaster(path):
+    """Load a CrowdForecaster checkpoint for shared, read-only serving"""
+    forecaster = CrowdForecaster(model_path=path)
+    forecaster.model.eval()
+    forecaster.model.requires_grad_(False)
+    return forecaster
+
+
+class ModelRegistry:
+    """Versioned checkpoints for one model, served as a single shared instance"""
+
+    def __init__(self, name='lstm_forecaster', root=None, loader=load_forecaster,
+                 poll_seconds=DEFAULT_POLL_SECONDS):
+        """
+        Initialize model registry
+        Args:
+            name: Model name (subdirectory of root)
+            root: Registry directory, created on first publish
+                  (default: MODEL_REGISTRY_CONFIG['root'], else DEFAULT_REGISTRY_PATH)
+            loader: Function checkpoint path -> model object
+            poll_seconds: How often the watcher checks the manifest
+        """
+        self.name = name
+        self.directory = os.path.join(root or MODEL_REGISTRY_CONFIG['root'] or DEFAULT_REGISTRY_PATH, name)
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+
+        self.loads = 0
+        self.last_load_seconds = None
+
+        # (version, model) swapped as one reference so readers never see a mix
+        self._current = (None, None)
+        self._empty_checked_at = None
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'current': None, 'versions': []}
+
+    def _write_manifest(self, manifest):
+        """Replace the manifest atomically so the watcher never reads a partial file"""
+        tmp_path = f"{self._manifest_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    @contextmanager
+    def _manifest_lock(self):
+        """Serialize manifest read-modify-write across threads and (where supported) processes"""
+        with self._publish_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if not FILE_LOCKS_ENABLED:
+                yield
+                return
+            with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def versions(self):
+        """Published version entries, oldest first"""
+        return self._read_manifest()['versions']
+
+    def current_version(self):
+        """Version the manifest marks as current (None if nothing is published)"""
+        return self._read_manifest()['current']
+
+    def publish(self, checkpoint_path, version=None, make_current=True):
+        """
+        Copy a checkpoint into the registry as a new version
+        Args:
+            checkpoint_path: Checkpoint file to publish
+            version: Version name (default: v<n>)
+            make_current: Point the manifest at the new version
+        Returns:
+            Version name
+        """
+        with self._manifest_lock():
+            return self._publish(self._read_manifest(), checkpoint_path, version, make_current)
+
+    def _publish(self, manifest, checkpoint_path, version, make_current):
+        """Copy a checkpoint in and record it in the manifest (caller holds the manifest lock)"""
+        version = version or f"v{len(manifest['versions']) + 1}"
+        if any(entry['version'] == version for entry in manifest['versions']):
+            raise ValueError(f"Version '{version}' already exists for {self.name}")
+
+        # Copy under a temporary name so a loader never sees a partial checkpoint
+        version_dir = os.path.join(self.directory, version)
+        os.makedirs(version_dir, exist_ok=True)
+        target = os.path.join(version_dir, CHECKPOINT_FILE)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(checkpoint_path, tmp_path)
+        os.replace(tmp_path, target)
+
+        with open(target, 'rb') as f:
+            sha1 = hashlib.sha1(f.read()).hexdigest()
+
+        manifest['versions'].append({
+            'version': version,
+            'file': os.path.join(version, CHECKPOINT_FILE),
+            'sha1': sha1,
+            'published_at': datetime.now().isoformat(timespec='seconds')
+        })
+        if make_current:
+            manifest['current'] = version
+        self._write_manifest(manifest)
+        return version
+
+    def bootstrap(self, checkpoint_path=BUNDLED_LSTM_PATH):
+        """
+        Publish a checkpoint (default: the bundled one) as the first version of an empty registry
+        Returns:
+            Version name, or None if versions already exist or the checkpoint is missing
+        """
+        if not os.path.exists(checkpoint_path):
+            return None
+        with self._manifest_lock():
+            manifest = self._read_manifest()
+            if manifest['versions']:
+                return None
+            return self._publish(manifest, checkpoint_path, None, True)
+
+    def set_current(self, version):
+        """Point the manifest at an already published version (e.g. to roll back)"""
+        with self._manifest_lock():
+            manifest = self._read_manifest()
+            if not any(entry['version'] == version for entry in manifest['versions']):
+                raise KeyError(f"Unknown version '{version}' for {self.name}")
+            manifest['current'] = version
+            self._write_manifest(manifest)
+
+    def _load(self, version):
+        """Load a version and swap it in"""
+        entry = next((entry for entry in self.versions() if entry['version'] == version), None)
+        if entry is None:
+            raise KeyError(f"Unknown version '{version}' for {self.name}")
+        start = time.perf_counter()
+        model = self.loader(os.path.join(self.directory, entry['file']))
+        duration = time.perf_counter() - start
+
+        previous_version = self._current[0]
+        self._current = (version, model)
+        self.loads += 1
+        self.last_load_seconds = duration
+
+        if PROMETHEUS_ENABLED:
+            MetricsCollector.record_model_load(self.name, version, duration, previous_version)
+        print(f"{self.name} {version} loaded in {duration * 1000:.0f} ms")
+        return model
+
+    def refresh(self):
+        """Load the manifest's current version if it isn't the one being served"""
+        version = self.current_version()
+        if version is None or version == self._current[0]:
+            return False
+        with self._lock:
+            if version == self._current[0]:
+                return False
+            self._load(version)
+        return True
+
+    def current(self):
+        """
+        The shared model for the current version
+        Only the first call in a process loads synchronously; later versions are
+        picked up by the watcher (or refresh()). While nothing is published the
+        manifest is read at most once per poll interval.
+        Returns:
+            Model object, or None if nothing has been published
+        """
+        version, model = self._current
+        if model is None:
+            checked_at = self._empty_checked_at
+            if checked_at is not None and time.monotonic() - checked_at < self.poll_seconds:
+                return None
+            self._empty_checked_at = time.monotonic()
+            self.refresh()
+            version, model = self._current
+        return model
+
+    @property
+    def version(self):
+        """Version currently being served"""
+        return self._current[0]
+
+    def _watch(self):
+        while not self._stop_event.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the loaded version if a new one fails to load
+                print(f"Error loading new {self.name} version: {str(e)}")
+
+    def start_watcher(self):
+        """Poll the manifest on a daemon thread and hot-swap new versions"""
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop_event.clear()
+            self._watcher = threading.Thread(target=self._watch, name=f'registry-{self.name}', daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop_watcher(self):
+        """Stop the watcher thread"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+
+# Global instance
+_model_registry = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Get process-wide LSTM forecaster registry (watcher started on first use)"""
+    global _model_registry
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry(poll_seconds=MODEL_REGISTRY_CONFIG['poll_seconds']).start_watcher()
+    return _model_registry
+
+
+_fallback_forecaster = None
+_fallback_forecaster_lock = threading.Lock()
+
+def get_shared_forecaster():
+    """
+    Shared read-only CrowdForecaster for this process
+    Until a version is published, every caller gets the same fallback: the bundled
+    checkpoint if present, else an untrained (persistence) forecaster.
+    """
+    global _fallback_forecaster
+    forecaster = get_model_registry().current()
+    if forecaster is not None:
+        return forecaster
+    if _fallback_forecaster is None:
+        with _fallback_forecaster_lock:
+            if _fallback_forecaster is None:
+                _fallback_forecaster = (load_forecaster(BUNDLED_LSTM_PATH) if os.path.exists(BUNDLED_LSTM_PATH)
+                                        else CrowdForecaster())
+    return _fallback_forecaster
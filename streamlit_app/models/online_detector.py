@@ -0,0 +1,311 @@
+"""
+Online (streaming) anomaly detection for many locations
+Keeps running statistics per location in preallocated arrays and updates
+them in O(1) per reading, one vectorized call per tick for all zones:
+
+    Welford     running mean and variance of every reading seen
+    Seasonal    EWMA of the level in each slot of the week (e.g. Tuesday 09:10-09:20),
+                plus an EWMA offset for recent shifts: the baseline a reading is expected at
+    Robust      streaming median and MAD of the residuals against that baseline
+                (insensitive to the spikes being flagged)
+
+Crowd levels follow the weekly timetable, so residuals are taken against the
+seasonal baseline rather than the recent level; otherwise every scheduled jump
+(a class letting out) looks like an anomaly. A slot only has a baseline after it
+has been seen once, so a location can't be flagged during its first week.
+With season_minutes=None there is a single slot and the baseline is a plain EWMA
+of the level (usable from the first readings, but much less precise).
+
+During warm-up the residuals are summarized by Welford mean and variance. Once
+that estimate has converged (it moves by less than convergence_tol on a new
+residual, after at least `warmup` residuals) the median and MAD are seeded from
+it and from then on step towards each residual by a fraction of the current MAD.
+Each reading is scored against the statistics from before it arrived, then
+folded in. State can be snapshotted and restored so it survives restarts.
+"""
+import os
+
+import numpy as np
+
+from data.timeseries_store import DEFAULT_STEP_MINUTES
+
+# Scale factor that makes the MAD a consistent estimate of the standard deviation
+MAD_TO_STD = 1.4826
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+# 1970-01-01 was a Thursday, 3 days after the start of its week
+EPOCH_WEEK_OFFSET_MINUTES = 3 * 24 * 60
+
+STATE_ARRAYS = ['count', 'mean', 'm2', 'ewma', 'ewm_var', 'seasonal', 'seasonal_seen',
+                'residual_count', 'residual_mean', 'residual_m2', 'warm', 'median', 'mad']
+
+
+class OnlineAnomalyDetector:
+    """Per-location running statistics with vectorized O(1) updates"""
+
+    def __init__(self, location_ids, threshold=3.5, ewma_alpha=0.1, seasonal_alpha=0.3,
+                 season_minutes=DEFAULT_STEP_MINUTES, robust_rate=0.02, warmup=12, convergence_tol=0.05):
+        """
+        Initialize online detector
+        Args:
+            location_ids: Ids of the locations to track, in state row order
+            threshold: Robust z-score above which a reading is anomalous
+            ewma_alpha: Weight of the newest residual in the baseline offset and EWMA variance
+            seasonal_alpha: Weight of the newest reading in its week slot's baseline
+            season_minutes: Width of a week slot (None: no seasonality, one slot)
+            robust_rate: Step size of the streaming median/MAD estimates, as a fraction of the current MAD
+            warmup: Fewest residuals a location needs before it can be flagged
+            convergence_tol: Largest relative change of the warm-up residual spread on the
+                             latest residual for the warm-up to count as converged
+        """
+        self.threshold = threshold
+        self.ewma_alpha = ewma_alpha
+        self.seasonal_alpha = seasonal_alpha
+        self.season_minutes = season_minutes
+        self.robust_rate = robust_rate
+        self.warmup = warmup
+        self.convergence_tol = convergence_tol
+
+        self.location_ids = np.asarray(location_ids, dtype=np.int64)
+        self._sorter = np.argsort(self.location_ids, kind='stable')
+        self._sorted_ids = self.location_ids[self._sorter]
+
+        n = len(self.location_ids)
+        n_slots = MINUTES_PER_WEEK // season_minutes if season_minutes else 1
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.ewma = np.zeros(n)
+        self.ewm_var = np.zeros(n)
+        self.seasonal = np.zeros((n, n_slots))
+        self.seasonal_seen = np.zeros((n, n_slots), dtype=bool)
+        self.residual_count = np.zeros(n, dtype=np.int64)
+        self.residual_mean = np.zeros(n)
+        self.residual_m2 = np.zeros(n)
+        self.warm = np.zeros(n, dtype=bool)
+        self.median = np.zeros(n)
+        self.mad = np.zeros(n)
+
+    def _rows(self, location_ids):
+        """State rows for location ids (all rows, in order, if None)"""
+        if location_ids is None:
+            return np.arange(len(self.location_ids))
+        location_ids = np.asarray(location_ids, dtype=np.int64)
+        if location_ids.shape == self.location_ids.shape and np.array_equal(location_ids, self.location_ids):
+            return np.arange(len(self.location_ids))
+
+        positions = np.searchsorted(self._sorted_ids, location_ids)
+        positions = np.minimum(positions, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[positions] == location_ids
+        if not found.all():
+            raise KeyError(f"Untracked locations: {location_ids[~found].tolist()}")
+        return self._sorter[positions]
+
+    def _slot(self, timestamp):
+        """Week slot of a reading time (always 0 without seasonality)"""
+        if not self.season_minutes:
+            return 0
+        if timestamp is None:
+            raise ValueError("A seasonal OnlineAnomalyDetector needs the reading timestamp")
+        minutes = int(np.asarray(timestamp, dtype='datetime64[m]').astype(np.int64))
+        return (minutes + EPOCH_WEEK_OFFSET_MINUTES) % MINUTES_PER_WEEK // self.season_minutes
+
+    @property
+    def std(self):
+        """Welford standard deviation per location"""
+        return np.sqrt(self.m2 / np.maximum(self.count, 1))
+
+    def score(self, levels, location_ids=None, timestamp=None):
+        """
+        Score readings against the current statistics without updating them
+        Args:
+            levels: One crowd level per location
+            location_ids: Locations of the readings (default: all, in state order)
+            timestamp: Time of the readings (required unless season_minutes is None)
+        Returns:
+            Dict of arrays: is_anomaly, robust_z, z_score (Welford), ewma_z, severity
+        """
+        rows = self._rows(location_ids)
+        levels = np.asarray(levels, dtype=np.float64).reshape(-1)
+        return self._score(rows, levels, self._slot(timestamp))
+
+    def _score(self, rows, levels, slot):
+        count = self.count[rows]
+        seen = self.seasonal_seen[rows, slot]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(self.m2[rows] / np.maximum(count, 1))
+            z_score = np.where(std > 0, np.abs(levels - self.mean[rows]) / std, 0.0)
+
+            # Residual against the expected level for this slot, relative to its typical (robust) spread
+            residual = levels - (self.seasonal[rows, slot] + self.ewma[rows])
+            ewm_std = np.sqrt(self.ewm_var[rows])
+            ewma_z = np.where(seen & (ewm_std > 0), np.abs(residual) / ewm_std, 0.0)
+
+            robust_std = self.mad[rows] * MAD_TO_STD
+            robust_z = np.where(seen & (robust_std > 0), np.abs(residual - self.median[rows]) / robust_std, 0.0)
+
+        valid = ~np.isnan(levels)
+        is_anomaly = valid & seen & self.warm[rows] & (robust_z > self.threshold)
+
+        severity = np.select(
+            [robust_z > self.threshold * 3, robust_z > self.threshold * 2, robust_z > self.threshold],
+            ['critical', 'high', 'medium'],
+            default='normal'
+        )
+        severity[~is_anomaly] = 'normal'
+
+        return {
+            'location_ids': self.location_ids[rows],
+            'is_anomaly': is_anomaly,
+            'robust_z': np.where(valid, robust_z, 0.0),
+            'z_score': np.where(valid, z_score, 0.0),
+            'ewma_z': np.where(valid, ewma_z, 0.0),
+            'severity': severity
+        }
+
+    def update(self, levels, location_ids=None, timestamp=None):
+        """
+        Score one reading per location, then fold it into that location's statistics
+        NaN readings are scored as normal and leave the statistics unchanged.
+        Args:
+            levels: One crowd level per location
+            location_ids: Locations of the readings (default: all, in state order)
+            timestamp: Time of the readings (required unless season_minutes is None)
+        Returns:
+            Scores from before the update (see score())
+        """
+        rows = self._rows(location_ids)
+        levels = np.asarray(levels, dtype=np.float64).reshape(-1)
+        slot = self._slot(timestamp)
+        result = self._score(rows, levels, slot)
+
+        valid = ~np.isnan(levels)
+        rows, x = rows[valid], levels[valid]
+
+        # Welford
+        count = self.count[rows] + 1
+        delta = x - self.mean[rows]
+        mean = self.mean[rows] + delta / count
+        self.m2[rows] += delta * (x - mean)
+        self.mean[rows] = mean
+        self.count[rows] = count
+
+        # Residual against the slot baseline; a slot seen for the first time has none yet
+        seen = self.seasonal_seen[rows, slot]
+        residual = x - (self.seasonal[rows, slot] + self.ewma[rows])
+
+        # Welford mean and variance of the residuals
+        residual_count = self.residual_count[rows] + seen
+        residual_delta = residual - self.residual_mean[rows]
+        residual_mean = self.residual_mean[rows] + np.where(seen, residual_delta / np.maximum(residual_count, 1), 0.0)
+        residual_m2 = self.residual_m2[rows] + np.where(seen, residual_delta * (residual - residual_mean), 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            old_std = np.sqrt(self.residual_m2[rows] / np.maximum(residual_count - 1, 1))
+            new_std = np.sqrt(residual_m2 / np.maximum(residual_count, 1))
+            settled = seen & (np.abs(new_std - old_std) <= self.convergence_tol * new_std)
+        self.residual_count[rows] = residual_count
+        self.residual_mean[rows] = residual_mean
+        self.residual_m2[rows] = residual_m2
+
+        # Streaming median and MAD of the residual: step towards each new residual by a
+        # fraction of the current MAD, so the step shrinks and grows with the spread.
+        # Readings pinned at 0 or 1 say nothing about the spread and leave both unchanged.
+        warm = self.warm[rows]
+        step = self.robust_rate * self.mad[rows] * (seen & (x > 0) & (x < 1))
+        median = self.median[rows] + step * np.sign(residual - self.median[rows])
+        mad = np.maximum(self.mad[rows] + step * np.sign(np.abs(residual - median) - self.mad[rows]), 0.0)
+
+        # Seed them from the Welford estimate once it has converged
+        seed = ~warm & (residual_count >= self.warmup) & (new_std > 0) & settled
+        self.median[rows] = np.where(seed, residual_mean, np.where(warm, median, 0.0))
+        self.mad[rows] = np.where(seed, new_std / MAD_TO_STD, np.where(warm, mad, 0.0))
+        self.warm[rows] = warm | seed
+
+        # Flagged readings move the baseline by at most the threshold spread, so an anomaly
+        # doesn't drag it along and make the normal readings after it look anomalous
+        bound = np.where(warm | seed, self.threshold * MAD_TO_STD * self.mad[rows], np.inf)
+        clipped = np.clip(residual, self.median[rows] - bound, self.median[rows] + bound)
+
+        # Slot baseline (initialized on first sight) and the offset shared by all slots
+        self.seasonal[rows, slot] = np.where(
+            seen, self.seasonal[rows, slot] + self.seasonal_alpha * clipped, x - self.ewma[rows]
+        )
+        self.seasonal_seen[rows, slot] = True
+
+        alpha = self.ewma_alpha
+        increment = alpha * np.where(seen, clipped, 0.0)
+        self.ewma[rows] += increment
+        self.ewm_var[rows] = np.where(seen, (1 - alpha) * (self.ewm_var[rows] + residual * increment),
+                                      self.ewm_var[rows])
+
+        return result
+
+    def reset(self, location_ids=None):
+        """Clear the statistics of some (default: all) locations"""
+        rows = self._rows(location_ids)
+        for name in STATE_ARRAYS:
+            getattr(self, name)[rows] = 0
+
+    def snapshot(self):
+        """Copy of the full detector state (parameters, location ids and statistics)"""
+        state = {name: getattr(self, name).copy() for name in STATE_ARRAYS}
+        state.update({
+            'location_ids': self.location_ids.copy(),
+            'threshold': self.threshold,
+            'ewma_alpha': self.ewma_alpha,
+            'seasonal_alpha': self.seasonal_alpha,
+            'season_minutes': self.season_minutes or 0,
+            'robust_rate': self.robust_rate,
+            'warmup': self.warmup,
+            'convergence_tol': self.convergence_tol
+        })
+        return state
+
+    def restore(self, state):
+        """
+        Load statistics from a snapshot
+        Locations present in both keep their snapshot statistics; locations new to
+        this detector start empty, and snapshot locations no longer tracked are dropped.
+        """
+        snapshot_ids = np.asarray(state['location_ids'], dtype=np.int64)
+        positions = {location_id: i for i, location_id in enumerate(snapshot_ids.tolist())}
+        source = np.array([positions.get(location_id, -1) for location_id in self.location_ids.tolist()],
+                          dtype=np.intp)
+        known = source >= 0
+
+        # Arrays missing from older snapshots, or with a different number of week slots,
+        # start empty (those locations warm up again)
+        for name in STATE_ARRAYS:
+            values = getattr(self, name)
+            values[:] = 0
+            if name in state and np.shape(state[name])[1:] == values.shape[1:]:
+                values[known] = np.asarray(state[name])[source[known]]
+
+    def save(self, path):
+        """Write a snapshot to an .npz file (replaced atomically)"""
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **self.snapshot())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, location_ids=None):
+        """
+        Detector restored from a file written by save()
+        Args:
+            path: Snapshot file
+            location_ids: Locations to track (default: the snapshot's)
+        """
+        with np.load(path) as data:
+            state = {name: data[name] for name in data.files}
+        detector = cls(
+            state['location_ids'] if location_ids is None else location_ids,
+            threshold=float(state['threshold']),
+            ewma_alpha=float(state['ewma_alpha']),
+            seasonal_alpha=float(state.get('seasonal_alpha', 0.3)),
+            season_minutes=int(state.get('season_minutes', 0)) or None,
+            robust_rate=float(state['robust_rate']),
+            warmup=int(state['warmup']),
+            convergence_tol=float(state.get('convergence_tol', 0.05))
+        )
+        detector.restore(state)
+        return detector
@@ -0,0 +1,178 @@
+"""
+Streaming (stateful) inference for the LSTM crowd forecaster
+Keeps every location's LSTM (h, c) state in one batched tensor and advances it
+one step per new reading, so a forecast costs only the linear head instead of
+re-running the LSTM over the whole input window.
+
+The model was trained on fixed sequence_length windows starting from a zero
+state, so a carried state drifts from the windowed forecast as its context
+grows (max difference ~0.04 after 2 extra steps, ~0.15 after 12). Two modes
+trade accuracy against cost:
+
+    rewarm_every=k     (default 4) each location is rebuilt from its last
+                       sequence_length readings every k steps, staggered so each
+                       tick rebuilds ~1/k of them: 1 + sequence_length/k LSTM
+                       steps per location per tick (4 at the defaults, against 12
+                       for predict_many). MAE stays within STREAMING_MAE_TOLERANCE
+                       of predict_many.
+    rewarm_every=None  the state is only ever advanced: exactly one LSTM step per
+                       location per tick (O(1) in sequence_length), but forecasts
+                       see an ever-growing context the model was not trained on
+                       (MAE ~0.008 worse than predict_many on the simulated panel).
+
+The default deliberately departs from pure O(1) streaming: the accuracy lost
+without re-warming is larger than the differences between model versions.
+benchmark_forecaster.py reports both modes and checks the tolerance.
+"""
+import numpy as np
+import torch
+
+from data.timeseries_store import DEFAULT_STEP_MINUTES
+
+# Steps a location's state is carried before it is rebuilt from its last window
+DEFAULT_REWARM_EVERY = 4
+
+# Allowed increase of streaming forecast MAE over the windowed predict_many MAE
+# (with re-warming at DEFAULT_REWARM_EVERY; measured ~0.0015 on the simulated panel)
+STREAMING_MAE_TOLERANCE = 0.005
+
+
+class StreamingForecaster:
+    """Per-location recurrent state on top of a trained CrowdForecaster"""
+
+    def __init__(self, forecaster, location_ids, step_minutes=DEFAULT_STEP_MINUTES,
+                 rewarm_every=DEFAULT_REWARM_EVERY):
+        """
+        Initialize streaming forecaster
+        Args:
+            forecaster: Trained CrowdForecaster (torch backend, float or quantized)
+            location_ids: Ids of the locations to track, in state row order
+            step_minutes: Model time step; timestamped readings advance the state once per step
+            rewarm_every: Steps between rebuilding a location's state from its last window
+                          (1 matches predict_many exactly; larger is cheaper but drifts more;
+                          None never rebuilds: one LSTM step per location per tick)
+        """
+        if not forecaster.is_trained:
+            raise ValueError("StreamingForecaster needs a trained CrowdForecaster")
+
+        self.forecaster = forecaster
+        self.model = forecaster.model.eval()
+        self.step_seconds = step_minutes * 60
+
+        self.location_ids = np.asarray(location_ids, dtype=np.int64)
+        self._index = {location_id: i for i, location_id in enumerate(self.location_ids.tolist())}
+
+        self._scale = np.float32(forecaster.scaler_scale.item())
+        self._offset = np.float32(forecaster.scaler_min.item())
+        self.sequence_length = forecaster.sequence_length
+        self.rewarm_every = max(1, rewarm_every) if rewarm_every is not None else None
+
+        n = len(self.location_ids)
+        lstm = self.model.lstm
+        self.h = torch.zeros(lstm.num_layers, n, lstm.hidden_size)
+        self.c = torch.zeros(lstm.num_layers, n, lstm.hidden_size)
+        self.last_step = np.full(n, -1, dtype=np.int64)
+
+        # Last sequence_length scaled inputs per location (oldest first, padded like
+        # predict_many) and steps advanced since the state was last rebuilt from them
+        self.recent = np.full((n, self.sequence_length), 0.5 * self._scale + self._offset, dtype=np.float32)
+        self.steps_since_warm = np.zeros(n, dtype=np.int64)
+
+    def _rows(self, location_ids):
+        """State rows for location ids (all rows if None)"""
+        if location_ids is None:
+            return np.arange(len(self.location_ids))
+        rows = np.array([self._index.get(location_id, -1) for location_id in location_ids], dtype=np.intp)
+        if (rows < 0).any():
+            raise KeyError(f"Untracked locations: {np.asarray(location_ids)[rows < 0].tolist()}")
+        return rows
+
+    def _advance(self, rows, scaled_inputs, from_zero=False):
+        """Run the LSTM over (len(rows), steps) scaled inputs starting from the stored (or a zero) state"""
+        rows_t = torch.from_numpy(rows)
+        x = torch.from_numpy(np.ascontiguousarray(scaled_inputs, dtype=np.float32)).unsqueeze(-1)
+        with torch.no_grad():
+            if from_zero:
+                _, (h, c) = self.model.lstm(x)
+            else:
+                _, (h, c) = self.model.lstm(x, (self.h[:, rows_t].contiguous(), self.c[:, rows_t].contiguous()))
+        self.h[:, rows_t] = h
+        self.c[:, rows_t] = c
+
+    def _rewarm(self, rows):
+        """Rebuild the state of rows from their last sequence_length inputs (as predict_many sees them)"""
+        if len(rows):
+            self._advance(rows, self.recent[rows], from_zero=True)
+            # Stagger the next re-warm so the work spreads evenly over ticks
+            self.steps_since_warm[rows] = rows % self.rewarm_every if self.rewarm_every else 0
+
+    def warm_up(self, histories, location_ids=None):
+        """
+        Reset and prime the state from recent history
+        Args:
+            histories: (n_locations, n_steps) array of crowd levels, oldest first
+            location_ids: Locations of the history rows (default: all, in state order)
+        """
+        rows = self._rows(location_ids)
+        self.reset(self.location_ids[rows])
+        histories = np.asarray(histories, dtype=np.float32)
+
+        # Same window (and padding) predict_many would see, run from a zero state
+        tail = histories[:, -self.sequence_length:] * self._scale + self._offset
+        self.recent[rows, self.sequence_length - tail.shape[1]:] = tail
+        self._rewarm(rows)
+
+    def update(self, levels, location_ids=None, timestamp=None):
+        """
+        Advance the state by one reading per location
+        Args:
+            levels: Crowd level per location
+            location_ids: Locations of the readings (default: all, in state order)
+            timestamp: Reading time; when given, only the first reading of each new step
+                       advances a location (later readings in the same step are ignored)
+        Returns:
+            Number of locations advanced
+        """
+        rows = self._rows(location_ids)
+        levels = np.asarray(levels, dtype=np.float32).reshape(-1)
+
+        if timestamp is not None:
+            step = int(np.asarray(timestamp, dtype='datetime64[s]').astype(np.int64)) // self.step_seconds
+            new = self.last_step[rows] < step
+            rows, levels = rows[new], levels[new]
+            self.last_step[rows] = step
+
+        if len(rows) and self.rewarm_every is None:
+            # O(1) mode: one LSTM step, no window kept
+            self._advance(rows, (levels * self._scale + self._offset)[:, None])
+        elif len(rows):
+            scaled = levels * self._scale + self._offset
+            self.recent[rows, :-1] = self.recent[rows, 1:]
+            self.recent[rows, -1] = scaled
+            self.steps_since_warm[rows] += 1
+
+            # Rows that have carried their state rewarm_every steps start over from the last window
+            due = self.steps_since_warm[rows] >= self.rewarm_every
+            self._advance(rows[~due], scaled[~due, None])
+            self._rewarm(rows[due])
+        return len(rows)
+
+    def forecast(self, location_ids=None):
+        """
+        Forecast from the stored state, without re-running the LSTM
+        Returns:
+            (n_locations, forecast_steps) array of predicted crowd levels
+        """
+        rows = torch.from_numpy(self._rows(location_ids))
+        with torch.no_grad():
+            predictions = self.model.fc(self.h[-1, rows]).numpy()
+        return np.clip((predictions - self._offset) / self._scale, 0, 1)
+
+    def reset(self, location_ids=None):
+        """Clear the state of some (default: all) locations"""
+        rows = torch.from_numpy(self._rows(location_ids))
+        self.h[:, rows] = 0
+        self.c[:, rows] = 0
+        self.recent[rows.numpy()] = 0.5 * self._scale + self._offset
+        self.steps_since_warm[rows.numpy()] = 0
+        self.last_step[rows.numpy()] = -1
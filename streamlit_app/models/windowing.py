@@ -0,0 +1,70 @@
+"""
+Sliding-window utilities shared by the forecaster and anomaly detector
+Windows are strided views (numpy.lib.stride_tricks.sliding_window_view) over
+one copy of the series. When several locations' histories are concatenated,
+windows never cross from one location into the next.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def series_boundaries(historical_data):
+    """
+    Start offset of each independent series in a (possibly concatenated) history
+    Series are split where 'location_id' changes or, without that column, where the
+    timestamp stops increasing (as with pd.concat of per-location histories).
+    Args:
+        historical_data: DataFrame with 'timestamp' and/or 'location_id' columns
+    Returns:
+        Sorted int array of series start offsets, always beginning with 0
+    """
+    n = len(historical_data)
+    if n == 0:
+        return np.zeros(1, dtype=np.int64)
+
+    if 'location_id' in historical_data:
+        ids = historical_data['location_id'].to_numpy()
+        breaks = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    elif 'timestamp' in historical_data:
+        times = historical_data['timestamp'].to_numpy()
+        breaks = np.flatnonzero(times[1:] <= times[:-1]) + 1
+    else:
+        breaks = np.zeros(0, dtype=np.int64)
+
+    return np.r_[0, breaks].astype(np.int64)
+
+
+def window_starts(length, window, boundaries=None):
+    """
+    Start index of every window of `window` points that stays inside one series
+    Args:
+        length: Total number of points
+        window: Points per window
+        boundaries: Series start offsets from series_boundaries (default: one series)
+    """
+    if boundaries is None or len(boundaries) <= 1:
+        return np.arange(max(length - window + 1, 0))
+
+    # End of the series containing each candidate start
+    ends = np.r_[boundaries[1:], length]
+    starts = np.arange(max(length - window + 1, 0))
+    series_end = ends[np.searchsorted(boundaries, starts, side='right') - 1]
+    return starts[starts + window <= series_end]
+
+
+def sliding_windows(values, window, boundaries=None):
+    """
+    All windows of `window` consecutive values, one per row
+    Returns a read-only strided view when the data is one series; with boundaries,
+    windows crossing a series boundary are dropped (which copies).
+    """
+    values = np.asarray(values)
+    if len(values) < window:
+        return np.zeros((0, window) + values.shape[1:], dtype=values.dtype)
+
+    # sliding_window_view puts the window axis last; keep it as axis 1
+    windows = np.moveaxis(sliding_window_view(values, window, axis=0), -1, 1)
+    if boundaries is None or len(boundaries) <= 1:
+        return windows
+    return windows[window_starts(len(values), window, boundaries)]
+
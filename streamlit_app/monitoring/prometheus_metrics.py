@@ -89,6 +89,32 @@ model_error_rate = Counter(
     ['model_type', 'error_type']
 )
 
+model_load_duration = Histogram(
+    'campus_pulse_model_load_seconds',
+    'Time taken to load a model version',
+    ['model_type'],
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0]
+)
+
+model_version_info = Gauge(
+    'campus_pulse_model_version_info',
+    'Model version currently serving (1 = active)',
+    ['model_type', 'version']
+)
+
+inference_queue_depth = Gauge(
+    'campus_pulse_inference_queue_depth',
+    'Requests waiting in the shared inference executor',
+    ['model_type']
+)
+
+inference_batch_size = Histogram(
+    'campus_pulse_inference_batch_size',
+    'Requests served per batched forward pass',
+    ['model_type'],
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+)
+
 # Event Classification Metrics
 event_classifications = Counter(
     'campus_pulse_event_classifications_total',
@@ -164,6 +190,12 @@ cache_misses = Counter(
     ['cache_type']
 )
 
+cache_evictions = Counter(
+    'campus_pulse_cache_evictions_total',
+    'Total cache evictions',
+    ['cache_type']
+)
+
 
 class MetricsCollector:
     """Helper class to collect and update metrics"""
@@ -226,6 +258,20 @@ class MetricsCollector:
         if duration is not None:
             model_latency.labels(model_type=model_type).observe(duration)
 
+    @staticmethod
+    def record_model_load(model_type, version, duration, previous_version=None):
+        """Record a model version load and mark it as the active version"""
+        model_load_duration.labels(model_type=model_type).observe(duration)
+        if previous_version is not None and previous_version != version:
+            model_version_info.labels(model_type=model_type, version=previous_version).set(0)
+        model_version_info.labels(model_type=model_type, version=version).set(1)
+
+    @staticmethod
+    def record_inference_batch(model_type, batch_size, queue_depth):
+        """Record one executor batch and the requests still queued behind it"""
+        inference_batch_size.labels(model_type=model_type).observe(batch_size)
+        inference_queue_depth.labels(model_type=model_type).set(queue_depth)
+
     @staticmethod
     def record_model_error(model_type, error_type):
         """Record a model error"""
@@ -261,6 +307,19 @@ class MetricsCollector:
         """Record an anomaly detection"""
         anomalies_detected.labels(location_type=location_type, anomaly_type=anomaly_type).inc()
 
+    @staticmethod
+    def record_cache_access(cache_type, hit, count=1):
+        """Record cache hits or misses"""
+        if hit:
+            cache_hits.labels(cache_type=cache_type).inc(count)
+        else:
+            cache_misses.labels(cache_type=cache_type).inc(count)
+
+    @staticmethod
+    def record_cache_eviction(cache_type, count=1):
+        """Record cache evictions"""
+        cache_evictions.labels(cache_type=cache_type).inc(count)
+
     @staticmethod
     def update_events_count(count):
         """Update total events count"""
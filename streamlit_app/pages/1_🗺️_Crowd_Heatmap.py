@@ -11,11 +11,14 @@ from datetime import datetime, timedelta
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from streamlit_folium import st_folium
-from data.simulator import CrowdDataSimulator
+from data.simulator import CrowdDataSimulator, panel_frame
+from data.snapshot_cache import get_snapshot_provider, get_history_panel_provider
 from data.locations import UF_LOCATIONS, get_locations_by_category
 from data.uf_events_real import UFEventGenerator
 from models.lstm_forecaster import CrowdForecaster
 from models.anomaly_detector import AnomalyDetector
+from models.forecast_cache import get_forecast_cache
+from models.model_registry import get_shared_forecaster
 from utils.map_utils import create_base_map, add_heatmap_layer, add_location_markers, get_crowd_color, get_crowd_label
 from utils.chart_utils import create_sparkline, create_forecast_chart, create_comparison_bar_chart
 from utils.config import UF_CENTER
@@ -113,24 +116,19 @@ st.markdown("""
 # Initialize session state
 if 'simulator' not in st.session_state or st.session_state.simulator is None:
     st.session_state.simulator = CrowdDataSimulator()
-if 'forecaster' not in st.session_state:
-    # Load LSTM RNN model for time series forecasting
-    lstm_model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'lstm_crowd_model.pth')
-    if os.path.exists(lstm_model_path):
-        try:
-            st.session_state.forecaster = CrowdForecaster(model_path=lstm_model_path)
-        except ModuleNotFoundError as e:
-            # PyTorch not installed
-            st.session_state.forecaster = CrowdForecaster()
-            st.warning(f"⚠️ PyTorch not installed. Install with: pip install torch")
-        except Exception as e:
-            # Other loading error - show the actual error for debugging
-            st.session_state.forecaster = CrowdForecaster()
-            st.error(f"⚠️ LSTM model loading error: {str(e)}")
-            st.info("Using fallback persistence forecast. Check if PyTorch is installed.")
-    else:
-        # No trained model yet
-        st.session_state.forecaster = CrowdForecaster()
+# LSTM RNN model for time series forecasting: the process-wide model from the
+# registry, re-read every run so hot-swapped versions reach this session
+try:
+    st.session_state.forecaster = get_shared_forecaster()
+except ModuleNotFoundError as e:
+    # PyTorch not installed
+    st.session_state.forecaster = CrowdForecaster()
+    st.warning(f"⚠️ PyTorch not installed. Install with: pip install torch")
+except Exception as e:
+    # Other loading error - show the actual error for debugging
+    st.session_state.forecaster = CrowdForecaster()
+    st.error(f"⚠️ LSTM model loading error: {str(e)}")
+    st.info("Using fallback persistence forecast. Check if PyTorch is installed.")
 if 'anomaly_detector' not in st.session_state:
     st.session_state.anomaly_detector = AnomalyDetector()
 if 'event_generator' not in st.session_state:
@@ -185,9 +183,11 @@ cache_key = f'crowd_data_{selected_filter}'
 
 # Get or generate crowd data (only regenerate on explicit refresh or new filter)
 if cache_key not in st.session_state or 'force_refresh' in st.session_state:
+    # Shared campus snapshot (one computation per minute across all sessions)
+    snapshot_provider = get_snapshot_provider()
     crowd_data = []
     for location in filtered_locations:
-        crowd = st.session_state.simulator.get_current_crowd(location)
+        crowd = dict(snapshot_provider.get_crowd(location['id']))
         crowd['lat'] = location['lat']
         crowd['lon'] = location['lon']
         crowd_data.append(crowd)
@@ -198,6 +198,14 @@ if cache_key not in st.session_state or 'force_refresh' in st.session_state:
 else:
     crowd_data = st.session_state[cache_key]
 
+# One day of step-aligned history for all filtered locations from the shared panel (cached similarly);
+# the charts, forecasts and anomaly checks are all sliced from it so they share one timeline
+history_cache_key = f'history_panel_{selected_filter}'
+if history_cache_key not in st.session_state or 'force_refresh' in st.session_state:
+    st.session_state[history_cache_key] = get_history_panel_provider().get_panel(filtered_locations)
+history_timestamps, history_levels = st.session_state[history_cache_key]
+recent_levels = {location['id']: history_levels[i, -12:] for i, location in enumerate(filtered_locations)}
+
 # Generate forecasts using LSTM RNN (cached similarly)
 forecast_cache_key = f'forecasts_{selected_filter}'
 if forecast_cache_key not in st.session_state or 'force_refresh' in st.session_state:
@@ -206,22 +214,21 @@ if forecast_cache_key not in st.session_state or 'force_refresh' in st.session_s
     # Track total LSTM inference time
     total_inference_start = time_module.time()
 
-    for location in filtered_locations:
-        # Generate historical data for time series input
-        hist_data = st.session_state.simulator.generate_historical_data(location, days=1, interval_minutes=10)
-
-        # Get last 2 hours of data (12 time steps) for LSTM input
-        recent_levels = hist_data['crowd_level'].values[-12:]
-
-        # Predict next hour (6 time steps) using LSTM - Track inference time
-        inference_start = time_module.time()
-        predictions = st.session_state.forecaster.predict(recent_levels)
-        inference_time_ms = (time_module.time() - inference_start) * 1000
+    # Predict next hour (6 time steps) for all locations from the shared forecast cache;
+    # misses run as one batched pass over the last 2 hours (12 time steps) of the history panel
+    inference_start = time_module.time()
+    all_predictions = get_forecast_cache().get_many(
+        st.session_state.forecaster,
+        filtered_locations,
+        lambda location: recent_levels[location['id']]
+    )
+    inference_time_ms = (time_module.time() - inference_start) * 1000
 
-        # Record model inference performance
-        if METRICS_ENABLED and metrics_tracker:
-            metrics_tracker.record_model_inference("LSTM_Forecaster", inference_time_ms, num_predictions=len(predictions))
+    # Record model inference performance once for the whole batch
+    if METRICS_ENABLED and metrics_tracker:
+        metrics_tracker.record_model_inference("LSTM_Forecaster", inference_time_ms, num_predictions=len(all_predictions))
 
+    for location, predictions in zip(filtered_locations, all_predictions):
         label, emoji = st.session_state.forecaster.get_forecast_label(predictions)
 
         forecasts.append({
@@ -244,19 +251,22 @@ else:
 # Check for anomalies (cached)
 anomaly_cache_key = f'anomalies_{selected_filter}'
 if anomaly_cache_key not in st.session_state or 'force_refresh' in st.session_state:
-    anomalies = []
-    for location in filtered_locations:
-        hist_data = st.session_state.simulator.generate_historical_data(location, days=1, interval_minutes=10)
-        recent_levels = hist_data['crowd_level'].values[-12:]
-
-        anomaly_result = st.session_state.anomaly_detector.detect(recent_levels)
-
-        if anomaly_result['is_anomaly']:
-            anomalies.append({
-                'location_name': location['name'],
-                'severity': anomaly_result['severity'],
-                'explanation': st.session_state.anomaly_detector.get_anomaly_explanation(recent_levels, location['name'])
-            })
+    # One batched pass scores every location and builds the explanations
+    anomaly_results = st.session_state.anomaly_detector.detect_many(
+        [recent_levels[location['id']] for location in filtered_locations],
+        [location['name'] for location in filtered_locations],
+        location_ids=[location['id'] for location in filtered_locations],
+        timestamps=history_timestamps[-1]
+    )
+    anomalies = [
+        {
+            'location_name': location['name'],
+            'severity': anomaly_result['severity'],
+            'explanation': anomaly_result['explanation']
+        }
+        for location, anomaly_result in zip(filtered_locations, anomaly_results)
+        if anomaly_result['is_anomaly']
+    ]
     st.session_state[anomaly_cache_key] = anomalies
 else:
     anomalies = st.session_state[anomaly_cache_key]
@@ -383,8 +393,9 @@ if selected_location:
     # Historical and forecast chart
     st.markdown("#### Trend & Forecast")
 
-    # Generate historical data
-    hist_data = st.session_state.simulator.generate_historical_data(selected_location, days=1, interval_minutes=10)
+    # Historical data for this location from the shared history panel
+    location_index = filtered_locations.index(selected_location)
+    hist_data = panel_frame(history_timestamps[-36:], history_levels[location_index, -36:], selected_location)
 
     # Create forecast timestamps
     last_timestamp = hist_data['timestamp'].iloc[-1]
@@ -396,7 +407,7 @@ if selected_location:
     })
 
     # Plot
-    fig = create_forecast_chart(hist_data.tail(36), forecast_df, selected_location['name'])  # Show last 6 hours
+    fig = create_forecast_chart(hist_data, forecast_df, selected_location['name'])  # Show last 6 hours
     st.plotly_chart(fig, use_container_width=True)
 
     # Events at this location
@@ -420,7 +431,7 @@ with col2:
         st.session_state.simulator = CrowdDataSimulator()
         st.session_state.last_refresh = datetime.now()
         # Clear all caches
-        keys_to_delete = [k for k in list(st.session_state.keys()) if any(x in k for x in ['crowd_data_', 'forecasts_', 'anomalies_', 'map_object_', 'events_by_location_'])]
+        keys_to_delete = [k for k in list(st.session_state.keys()) if any(x in k for x in ['crowd_data_', 'history_panel_', 'forecasts_', 'anomalies_', 'map_object_', 'events_by_location_'])]
         for key in keys_to_delete:
             del st.session_state[key]
         st.rerun()
@@ -14,7 +14,9 @@ from data.simulator import CrowdDataSimulator
 from data.uf_events_real import UFEventGenerator, TRAINING_EVENTS
 from data.locations import UF_LOCATIONS, get_location_by_id
 from models.event_classifier_improved import ImprovedEventCategorizer
-from models.lstm_forecaster import CrowdForecaster
+from models.forecast_cache import get_forecast_cache
+from models.inference_executor import get_inference_executor
+from models.model_registry import get_shared_forecaster
 from utils.chart_utils import create_category_distribution
 from utils.navigation import create_top_navbar
 from database.feedback_db import get_user_role
@@ -104,10 +106,8 @@ try:
         st.session_state.events = st.session_state.event_generator.generate_semester_events(50)
     if 'event_classifier' not in st.session_state or st.session_state.event_classifier is None:
         st.session_state.event_classifier = ImprovedEventCategorizer()
-    if 'forecaster' not in st.session_state or st.session_state.forecaster is None:
-        # Load the trained LSTM model
-        model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'lstm_crowd_model.pth')
-        st.session_state.forecaster = CrowdForecaster(model_path=model_path)
+    # Shared LSTM model from the registry (re-read every run to pick up new versions)
+    st.session_state.forecaster = get_shared_forecaster()
     if 'user_created_events' not in st.session_state:
         st.session_state.user_created_events = []
 except Exception as e:
@@ -326,9 +326,11 @@ with tab1:
                     if location and st.session_state.simulator is not None and st.session_state.forecaster is not None:
                         with st.expander("Crowd Forecast"):
                             try:
-                                hist_data = st.session_state.simulator.generate_historical_data(location, days=1)
-                                recent_levels = hist_data['crowd_level'].values[-12:]
-                                predictions = st.session_state.forecaster.predict(recent_levels)
+                                predictions = get_forecast_cache().get(
+                                    st.session_state.forecaster,
+                                    location,
+                                    lambda loc: st.session_state.simulator.recent_levels(loc, 12)
+                                )
                                 label, emoji = st.session_state.forecaster.get_forecast_label(predictions)
 
                                 st.write(f"{emoji} Expected crowd: **{label}**")
@@ -428,7 +430,9 @@ with tab2:
                     st.stop()
 
                 try:
-                    ai_result = st.session_state.event_classifier.predict(event_title, event_description)
+                    ai_result = get_inference_executor().classify(
+                        st.session_state.event_classifier, event_title, event_description
+                    ).result()
                 except Exception as e:
                     st.error(f"Error categorizing event: {str(e)}")
                     st.stop()
@@ -536,10 +540,11 @@ with tab3:
                 st.error("Event classifier not initialized. Please refresh the page.")
             else:
                 try:
-                    result = st.session_state.event_classifier.predict(
+                    result = get_inference_executor().classify(
+                        st.session_state.event_classifier,
                         test_title or "Untitled Event",
                         test_description or ""
-                    )
+                    ).result()
 
                     st.markdown("### Results")
 
@@ -10,11 +10,13 @@ from datetime import datetime, timedelta
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data.simulator import CrowdDataSimulator
+from data.simulator import CrowdDataSimulator, panel_frame
+from data.snapshot_cache import get_snapshot_provider, get_history_panel_provider
 from data.locations import UF_LOCATIONS, get_location_by_id
 from data.uf_events_real import UFEventGenerator
-from models.lstm_forecaster import CrowdForecaster
 from models.anomaly_detector import AnomalyDetector
+from models.forecast_cache import get_forecast_cache
+from models.model_registry import get_shared_forecaster
 from utils.map_utils import get_crowd_color, get_crowd_label
 from utils.chart_utils import create_forecast_chart, create_crowd_gauge
 from utils.navigation import create_top_navbar
@@ -78,10 +80,8 @@ st.markdown("""
 # Initialize session state
 if 'simulator' not in st.session_state:
     st.session_state.simulator = CrowdDataSimulator()
-if 'forecaster' not in st.session_state:
-    # Load the trained LSTM model
-    model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'lstm_crowd_model.pth')
-    st.session_state.forecaster = CrowdForecaster(model_path=model_path)
+# Shared LSTM model from the registry (re-read every run to pick up new versions)
+st.session_state.forecaster = get_shared_forecaster()
 if 'anomaly_detector' not in st.session_state:
     st.session_state.anomaly_detector = AnomalyDetector()
 if 'event_generator' not in st.session_state:
@@ -137,12 +137,38 @@ else:
     for loc_id in st.session_state.saved_locations:
         location = get_location_by_id(loc_id)
         if location:
-            crowd = st.session_state.simulator.get_current_crowd(location)
+            crowd = get_snapshot_provider().get_crowd(location['id'])
             saved_locations_data.append({
                 'location': location,
                 'crowd': crowd
             })
 
+    # One day of step-aligned history for all saved locations from the shared panel (built once
+    # per 10-minute step); the charts and the model inputs are both sliced from it
+    history_timestamps, history_levels = get_history_panel_provider().get_panel(
+        [d['location'] for d in saved_locations_data]
+    )
+    for i, loc_data in enumerate(saved_locations_data):
+        loc_data['recent_levels'] = history_levels[i, -12:]
+    recent_by_id = {d['location']['id']: d['recent_levels'] for d in saved_locations_data}
+    # Forecasts come from the shared forecast cache (one batched pass for any misses)
+    saved_predictions = get_forecast_cache().get_many(
+        st.session_state.forecaster,
+        [d['location'] for d in saved_locations_data],
+        lambda location: recent_by_id[location['id']]
+    )
+    # Anomaly status for all saved locations in one batched pass
+    saved_anomalies = st.session_state.anomaly_detector.detect_many(
+        [d['recent_levels'] for d in saved_locations_data],
+        [d['location']['name'] for d in saved_locations_data],
+        location_ids=[d['location']['id'] for d in saved_locations_data],
+        timestamps=history_timestamps[-1]
+    )
+    for i, loc_data in enumerate(saved_locations_data):
+        loc_data['predictions'] = saved_predictions[i]
+        loc_data['anomaly'] = saved_anomalies[i]
+        loc_data['history'] = panel_frame(history_timestamps[-36:], history_levels[i, -36:], loc_data['location'])
+
     with summary_col1:
         avg_occupancy = sum(d['crowd']['percentage'] for d in saved_locations_data) / len(saved_locations_data)
         st.metric("Average Occupancy", f"{avg_occupancy:.0f}%")
@@ -164,6 +190,8 @@ else:
     for loc_data in saved_locations_data:
         location = loc_data['location']
         crowd = loc_data['crowd']
+        recent_levels = loc_data['recent_levels']
+        predictions = loc_data['predictions']
 
         with st.container():
             # Header with location name and remove button
@@ -194,16 +222,12 @@ else:
 
             with metric_col2:
                 # Get forecast
-                hist_data = st.session_state.simulator.generate_historical_data(location, days=1, interval_minutes=10)
-                recent_levels = hist_data['crowd_level'].values[-12:]
-                predictions = st.session_state.forecaster.predict(recent_levels)
                 label, emoji = st.session_state.forecaster.get_forecast_label(predictions)
 
                 st.metric("1h Forecast", f"{emoji} {label}")
 
             with metric_col3:
-                # Check for anomaly
-                anomaly_result = st.session_state.anomaly_detector.detect(recent_levels)
+                anomaly_result = loc_data['anomaly']
 
                 if anomaly_result['is_anomaly']:
                     severity_emoji = {'medium': '⚠️', 'high': '🚨', 'critical': '🔴'}
@@ -223,8 +247,8 @@ else:
 
             with detail_col1:
                 with st.expander("📊 View Forecast Chart"):
-                    # Generate historical data
-                    hist_data = st.session_state.simulator.generate_historical_data(location, days=1, interval_minutes=10)
+                    # Historical data from the shared history panel
+                    hist_data = loc_data['history']
 
                     # Create forecast timestamps
                     last_timestamp = hist_data['timestamp'].iloc[-1]
@@ -236,7 +260,7 @@ else:
                     })
 
                     # Plot
-                    fig = create_forecast_chart(hist_data.tail(36), forecast_df, location['name'])
+                    fig = create_forecast_chart(hist_data, forecast_df, location['name'])
                     st.plotly_chart(fig, use_container_width=True)
 
             with detail_col2:
@@ -304,11 +328,7 @@ else:
         future_available = []
         for loc_data in saved_locations_data:
             location = loc_data['location']
-            hist_data = st.session_state.simulator.generate_historical_data(location, days=1)
-            recent_levels = hist_data['crowd_level'].values[-12:]
-            predictions = st.session_state.forecaster.predict(recent_levels)
-
-            avg_prediction = predictions.mean()
+            avg_prediction = loc_data['predictions'].mean()
             if avg_prediction < 0.6:
                 future_available.append({
                     'location': location,
@@ -27,6 +27,20 @@ ANOMALY_THRESHOLD = 0.15
 FORECAST_STEPS = 6  # 6 x 10 minutes = 1 hour
 TIME_INTERVAL = 10  # minutes
 
+# Shared inference executor (None keeps PyTorch's default thread counts)
+INFERENCE_CONFIG = {
+    'max_wait_ms': 5,
+    'max_batch_size': 512,
+    'num_threads': None,
+    'interop_threads': None
+}
+
+# Versioned model registry (root None: streamlit_app/models/registry)
+MODEL_REGISTRY_CONFIG = {
+    'root': None,
+    'poll_seconds': 30
+}
+
 # Event Categories
 EVENT_CATEGORIES = ['Academic', 'Social', 'Sports', 'Cultural', 'Other']
 
@@ -12,6 +12,7 @@ from datetime import datetime
 sys.path.insert(0, 'streamlit_app')
 
 from models.lstm_forecaster import CrowdForecaster
+from models.model_registry import ModelRegistry
 from data.simulator import CrowdDataSimulator
 from data.locations import UF_LOCATIONS
 
@@ -63,13 +64,17 @@ def train_lstm():
     model_path = 'streamlit_app/models/lstm_crowd_model.pth'
     forecaster.save_model(model_path)
 
+    # Publish as a new registry version; running apps hot-swap to it
+    version = ModelRegistry().publish(model_path)
+
     print(f"\n{'='*60}")
     print(f"✅ SUCCESS!")
     print(f"{'='*60}")
     print(f"✓ LSTM model trained and saved to {model_path}")
+    print(f"✓ Published to the model registry as {version}")
     print(f"✓ Model type: 2-layer LSTM (PyTorch)")
     print(f"✓ Ready for real-time crowd forecasting")
-    print(f"\n🚀 Now restart your Streamlit app to use the LSTM model!")
+    print(f"\n🚀 Running Streamlit apps pick up the new version automatically")
     print(f"{'='*60}\n")
 
     # Test prediction